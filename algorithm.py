@@ -1,8 +1,12 @@
 import pulp
 import random
 import copy
+import time
 from pulp import LpVariable, LpProblem, LpMinimize, LpStatusOptimal, PULP_CBC_CMD
 
+from optimizer.solver import FAILED, FEASIBLE, Deadline, solve_model, solver_settings
+from optimizer.template import acquire_template, release_template
+
 # 🔧 הגדרת seed קבוע לתוצאות עקביות\nRANDOM_SEED = 42
 
 
@@ -11,7 +15,7 @@ class MenuOptimizer:
     כיתה לאופטימיזציה של תפריט תזונתי באמצעות MILP
     """
 
-    def __init__(self, foods_db, user_params):
+    def __init__(self, foods_db, user_params, solver=None):
 
         # 🔧 הגדרת seed קבוע לתוצאות עקביות\n        random.seed(RANDOM_SEED)
         """
@@ -20,6 +24,8 @@ class MenuOptimizer:
         Args:
             foods_db: רשימת מזונות ממסד הנתונים
             user_params: פרמטרים מהמשתמש (קלוריות, חלבון, וכו')
+            solver: הגדרות הפותר (backend, time_limit, mip_gap, threads, deadline),
+                    ראו optimizer.solver.DEFAULT_SOLVER
         """
         # המרת מזונות ממסד הנתונים לפורמט של האלגוריתם
         self.foods = []
@@ -102,6 +108,9 @@ class MenuOptimizer:
         self.min_veg_qty = 30
         self.max_qty = 500
 
+        # הגדרות הפותר
+        self.solver = solver_settings(solver)
+
         # שמירת רשימות מקוריות
         self.original_foods = self.foods[:]
         self.original_protein = self.protein[:]
@@ -163,129 +172,133 @@ class MenuOptimizer:
 
         model = pulp.LpProblem("תפריט_תזונתי_אופטימלי", pulp.LpMinimize)
 
-        # משתנים רציפים לכמויות המזון (גרמים)
-        x = {}
-        # משתני בינארי לזיהוי אם המזון נבחר כפחמימה, חלבון, פרי, ירק בארוחה
-        y_carb = {}
-        y_protein = {}
-        y_fruit = {}
-        y_veg = {}
+        x, usage = self._add_day_block(model, self.allowed_foods, excluded_foods, run_number)
 
-        # יצירת משתנים
-        for j, meal in enumerate(self.meals):
-            for i, food in enumerate(self.foods):
-                allowed = (food in self.allowed_foods[meal]) and (food not in excluded_foods)
-                x[(i, j)] = pulp.LpVariable(
-                    f"x_{i}_{j}",
-                    lowBound=0,
-                    upBound=self.max_qty if allowed else 0
-                )
+        # פונקציית מטרה - מינימום עלות כוללת
+        model += pulp.lpSum(self.price[i] * x[(i, j)] for (i, j) in x), f"עלות_כוללת_{run_number}"
 
-        # אילוץ שהמזונות לא מותרים בארוחה יקבלו 0
-        for j, meal in enumerate(self.meals):
-            for i, food in enumerate(self.foods):
-                if food not in self.allowed_foods[meal]:
-                    model += x[(i, j)] == 0, f"exclude_food_{food}_{meal}_{run_number}"
+        return model, x
 
-        # משתני בינארי רק למזונות שמתאימים לתפקידם בארוחה
+    def _compile_pairs(self, allowed_foods, excluded_foods):
+        """
+        הזוגות (i, j, role) שנכנסים למודל של יום אחד - רק מזונות מותרים שלא הוצאו.
+        role הוא תפקיד המזון בארוחה ("carb"/"protein"/"fruit"/"veg"), או None.
+        משותף לכל ה-backends, כך שכולם בונים בדיוק את אותו מודל.
+        """
+        pairs = []
         for j, meal in enumerate(self.meals):
             for i, food in enumerate(self.foods):
-                if food in self.carb_foods and food in self.allowed_foods[meal] and food not in excluded_foods:
-                    y_carb[(i, j)] = pulp.LpVariable(f"y_carb_{i}_{j}", cat="Binary")
-                else:
-                    y_carb[(i, j)] = None
+                if food not in allowed_foods[meal] or food in excluded_foods:
+                    continue
+                pairs.append((i, j, self._pair_role(food, j)))
+        return pairs
+
+    def _pair_role(self, food, j):
+        """תפקיד המזון בארוחה j: "carb"/"protein"/"fruit"/"veg", או None"""
+        j_tosafot = self.meals.index("תוספות")
+
+        if food in self.carb_foods:
+            return "carb"
+        if food in self.protein_foods:
+            return "protein"
+        # פרי - רק בתוספות
+        if j == j_tosafot and food in self.fruits:
+            return "fruit"
+        # ירק - בכל הארוחות מלבד תוספות
+        if j != j_tosafot and food in self.vegetables:
+            return "veg"
+        return None
+
+    def _role_min_qty(self):
+        """כמות מינימלית (בגרמים) למזון שנבחר בתפקיד"""
+        return {
+            "carb": self.min_carb_qty,
+            "protein": self.min_protein_qty,
+            "fruit": self.min_fruit_qty,
+            "veg": self.min_veg_qty,
+        }
 
-                if food in self.protein_foods and food in self.allowed_foods[meal] and food not in excluded_foods:
-                    y_protein[(i, j)] = pulp.LpVariable(f"y_protein_{i}_{j}", cat="Binary")
-                else:
-                    y_protein[(i, j)] = None
+    def _add_day_block(self, model, allowed_foods, excluded_foods, tag):
+        """
+        מוסיף למודל את המשתנים והאילוצים של יום אחד (בלי פונקציית מטרה).
+        tag מבדיל בין שמות המשתנים והאילוצים של ימים שונים באותו מודל.
 
-                # פרי - רק בתוספות
-                if meal == "תוספות" and food in self.fruits and food in self.allowed_foods[meal] and food not in excluded_foods:
-                    y_fruit[(i, j)] = pulp.LpVariable(f"y_fruit_{i}_{j}", cat="Binary")
-                else:
-                    y_fruit[(i, j)] = None
+        המודל דליל: משתנים נוצרים רק לזוגות (מזון, ארוחה) מותרים שלא הוצאו,
+        ולכל זוג יש משתנה בינארי אחד בלבד (usage) - משתנה התפקיד שלו
+        (פחמימה/חלבון/פרי/ירק) אם יש כזה, אחרת משתנה בחירה כללי.
 
-                # ירק - בכל הארוחות מלבד תוספות
-                if meal != "תוספות" and food in self.vegetables and food in self.allowed_foods[meal] and food not in excluded_foods:
-                    y_veg[(i, j)] = pulp.LpVariable(f"y_veg_{i}_{j}", cat="Binary")
-                else:
-                    y_veg[(i, j)] = None
+        Returns:
+            x: כמויות לכל (מזון, ארוחה) מותר
+            usage: משתנה בינארי לכל (מזון, ארוחה) מותר - 1 כשהמזון נבחר
+        """
+        pairs = self._compile_pairs(allowed_foods, excluded_foods)
+        role_min_qty = self._role_min_qty()
 
-        # פונקציית מטרה - מינימום עלות כוללת
-        model += pulp.lpSum(self.price[i] * x[(i, j)] for (i, j) in x), f"עלות_כוללת_{run_number}"
+        # משתנים רציפים לכמויות המזון (גרמים), ומשתנה בינארי אחד לכל זוג
+        x = {}
+        usage = {}
+        roles = {}
+        for i, j, role in pairs:
+            x[(i, j)] = pulp.LpVariable(f"x_{i}_{j}_{tag}", lowBound=0, upBound=self.max_qty)
+            prefix = f"y_{role}" if role else "u"
+            usage[(i, j)] = pulp.LpVariable(f"{prefix}_{i}_{j}_{tag}", cat="Binary")
+            roles[(i, j)] = role
 
-        # אילוצי תזונה כלליים על סך כל הארוחות
-        model += pulp.lpSum(self.protein[i] * x[(i, j)] for (i, j) in x) >= self.min_protein, f"min_protein_{run_number}"
-        model += pulp.lpSum(self.protein[i] * x[(i, j)] for (i, j) in x) <= self.max_protein, f"max_protein_{run_number}"
+        # אילוצי תזונה כלליים על סך כל הארוחות - כל ביטוי נבנה פעם אחת
+        total_protein = pulp.lpSum(self.protein[i] * var for (i, j), var in x.items())
+        total_calories = pulp.lpSum(self.calories[i] * var for (i, j), var in x.items())
+        total_carbs = pulp.lpSum(self.carbs[i] * var for (i, j), var in x.items())
+        total_fat = pulp.lpSum(self.fat[i] * var for (i, j), var in x.items())
 
-        model += pulp.lpSum(self.calories[i] * x[(i, j)] for (i, j) in x) >= self.min_calories, f"min_calories_{run_number}"
-        model += pulp.lpSum(self.calories[i] * x[(i, j)] for (i, j) in x) <= self.max_calories, f"max_calories_{run_number}"
+        model += total_protein >= self.min_protein, f"min_protein_{tag}"
+        model += total_protein <= self.max_protein, f"max_protein_{tag}"
 
-        model += pulp.lpSum(self.carbs[i] * x[(i, j)] for (i, j) in x) <= self.max_carbs, f"max_carbs_{run_number}"
+        model += total_calories >= self.min_calories, f"min_calories_{tag}"
+        model += total_calories <= self.max_calories, f"max_calories_{tag}"
 
-        model += pulp.lpSum(self.fat[i] * x[(i, j)] for (i, j) in x) >= self.min_fat, f"min_fat_{run_number}"
-        model += pulp.lpSum(self.fat[i] * x[(i, j)] for (i, j) in x) <= self.max_fat, f"max_fat_{run_number}"
+        model += total_carbs <= self.max_carbs, f"max_carbs_{tag}"
+
+        model += total_fat >= self.min_fat, f"min_fat_{tag}"
+        model += total_fat <= self.max_fat, f"max_fat_{tag}"
 
         # אילוצי קלוריות לפי ארוחה
         for j, meal in enumerate(self.meals):
             min_pct = self.min_calories_meal_pct[meal]
             max_pct = self.max_calories_meal_pct[meal]
-            model += pulp.lpSum(self.calories[i] * x[(i, j)] for i in range(len(self.calories))) >= min_pct * self.min_calories, f"min_calories_{meal}_{run_number}"
-            model += pulp.lpSum(self.calories[i] * x[(i, j)] for i in range(len(self.calories))) <= max_pct * self.max_calories, f"max_calories_{meal}_{run_number}"
+            meal_calories = pulp.lpSum(self.calories[i] * var for (i, jj), var in x.items() if jj == j)
+            model += meal_calories >= min_pct * self.min_calories, f"min_calories_{meal}_{tag}"
+            model += meal_calories <= max_pct * self.max_calories, f"max_calories_{meal}_{tag}"
 
         # --- אילוצים לפי ארוחה ---
+        def role_sum(role, j):
+            return pulp.lpSum(var for key, var in usage.items() if key[1] == j and roles[key] == role)
+
         for meal_name in ["בוקר", "צהריים", "ערב"]:
             j = self.meals.index(meal_name)
 
-            carb_indices = [i for i in range(len(self.foods))
-                            if self.foods[i] in self.carb_foods and self.foods[i] in self.allowed_foods[meal_name]]
-            model += pulp.lpSum(y_carb[(i, j)] for i in carb_indices if y_carb[(i, j)] is not None) == 1, f"exactly_one_carb_{meal_name}_{run_number}"
-
-            protein_indices = [i for i in range(len(self.foods))
-                               if self.foods[i] in self.protein_foods and self.foods[i] in self.allowed_foods[meal_name]]
-            model += pulp.lpSum(y_protein[(i, j)] for i in protein_indices if y_protein[(i, j)] is not None) == 1, f"exactly_one_protein_{meal_name}_{run_number}"
-
-            veg_indices = [i for i in range(len(self.foods))
-                           if self.foods[i] in self.vegetables and self.foods[i] in self.allowed_foods[meal_name]]
-            model += pulp.lpSum(y_veg[(i, j)] for i in veg_indices if y_veg[(i, j)] is not None) >= 1, f"min_one_veg_{meal_name}_{run_number}"
+            model += role_sum("carb", j) == 1, f"exactly_one_carb_{meal_name}_{tag}"
+            model += role_sum("protein", j) == 1, f"exactly_one_protein_{meal_name}_{tag}"
+            model += role_sum("veg", j) >= 1, f"min_one_veg_{meal_name}_{tag}"
 
         # תוספות: לפחות פרי אחד
-        j = self.meals.index("תוספות")
-        fruit_indices = [i for i in range(len(self.foods))
-                         if self.foods[i] in self.fruits and self.foods[i] in self.allowed_foods["תוספות"]]
-        model += pulp.lpSum(y_fruit[(i, j)] for i in fruit_indices if y_fruit[(i, j)] is not None) >= 1, f"min_one_fruit_tosafot_{run_number}"
+        model += role_sum("fruit", self.meals.index("תוספות")) >= 1, f"min_one_fruit_tosafot_{tag}"
 
         # --- חיבור בין משתני בינארי לכמויות ---
-        for j, meal in enumerate(self.meals):
-            for i, food in enumerate(self.foods):
-                if y_carb.get((i, j)) is not None:
-                    model += x[(i, j)] >= self.min_carb_qty * y_carb[(i, j)], f"carb_min_qty_{i}_{j}_{run_number}"
-                    model += x[(i, j)] <= self.max_qty * y_carb[(i, j)], f"carb_max_qty_{i}_{j}_{run_number}"
-
-                if y_protein.get((i, j)) is not None:
-                    model += x[(i, j)] >= self.min_protein_qty * y_protein[(i, j)], f"protein_min_qty_{i}_{j}_{run_number}"
-                    model += x[(i, j)] <= self.max_qty * y_protein[(i, j)], f"protein_max_qty_{i}_{j}_{run_number}"
-
-                if y_fruit.get((i, j)) is not None:
-                    model += x[(i, j)] >= self.min_fruit_qty * y_fruit[(i, j)], f"fruit_min_qty_{i}_{j}_{run_number}"
-                    model += x[(i, j)] <= self.max_qty * y_fruit[(i, j)], f"fruit_max_qty_{i}_{j}_{run_number}"
-
-                if y_veg.get((i, j)) is not None:
-                    model += x[(i, j)] >= self.min_veg_qty * y_veg[(i, j)], f"veg_min_qty_{i}_{j}_{run_number}"
-                    model += x[(i, j)] <= self.max_qty * y_veg[(i, j)], f"veg_max_qty_{i}_{j}_{run_number}"
+        for (i, j), var in x.items():
+            role = roles[(i, j)]
+            if role:
+                model += var >= role_min_qty[role] * usage[(i, j)], f"min_qty_{i}_{j}_{tag}"
+            model += var <= self.max_qty * usage[(i, j)], f"max_qty_{i}_{j}_{tag}"
 
         # מניעת אותו מזון בבוקר וגם בערב (אם מותר בשניהם)
         j_boker = self.meals.index("בוקר")
         j_erev = self.meals.index("ערב")
 
         for i, food in enumerate(self.foods):
-            if food in self.allowed_foods["בוקר"] and food in self.allowed_foods["ערב"]:
-                z = pulp.LpVariable(f"z_boker_erev_{i}_{run_number}", cat="Binary")
-                model += x[(i, j_boker)] <= self.max_qty * (1 - z), f"limit_boker_{i}_{run_number}"
-                model += x[(i, j_erev)] <= self.max_qty * z, f"limit_erev_{i}_{run_number}"
+            if (i, j_boker) in usage and (i, j_erev) in usage:
+                model += usage[(i, j_boker)] + usage[(i, j_erev)] <= 1, f"boker_or_erev_{i}_{tag}"
 
-        return model, x
+        return x, usage
 
     def shuffle_and_filter_meals(self, meals_list, target_days):
         max_attempts = 100
@@ -339,7 +352,42 @@ class MenuOptimizer:
 
         return filtered
 
-    def generate_menu(self, num_days=7):
+    def generate_menu(self, num_days=7, mode="sequential", backend=None, progress=None):
+        """
+        מחשב תפריט ל-num_days ימים.
+
+        mode:
+            "sequential" - פתרון נפרד לכל יום (ברירת המחדל)
+            "horizon"    - מודל אחד לכל הימים, ראו generate_menu_horizon
+        מצב sequential: עם self.solver["warm_start"], כל יום מתחיל מהפתרון של היום הקודם
+        (ראו _warm_start). זמני הפתרון של כל יום מוחזרים תחת result["solver"]["solve_times"],
+        ומספר הימים שה-backend באמת התחיל מהפתרון הזה - תחת "warm_started_days" (ב-highs תמיד 0).
+
+        backend (ברירת המחדל - self.solver["backend"]):
+            "cbc"   - PuLP + CBC
+            "highs" - מטריצות NumPy דלילות ו-HiGHS של SciPy, בתוך התהליך
+
+        מגבלות הפותר (self.solver): כשפתרון יום נעצר על time_limit - נלקח הפתרון
+        הטוב ביותר שנמצא. כשנגמר ה-deadline - הימים שנותרו משוכפלים מהימים שכבר נפתרו
+        (היום הראשון נפתר תמיד, מוגבל רק ב-time_limit).
+        בשני המקרים התוצאה מוצלחת, עם "optimal": False.
+
+        progress - אם הועבר, נקרא progress(ימים_מוכנים, num_days) בכל פעם שימים נוספים מוכנים.
+        """
+        backend = backend or self.solver["backend"]
+        if mode == "horizon":
+            return self.generate_menu_horizon(num_days, backend=backend, progress=progress)
+
+        deadline = Deadline(self.solver["deadline"])
+        non_optimal_days = 0
+        deadline_reached = False
+        # זמן הפתרון של כל יום (שניות), והפתרון של היום הקודם - בסיס ל-warm start
+        solve_times = []
+        prev_values = None
+        # ימים שה-backend באמת התחיל מפתרון ההתחלה (highs מתעלם ממנו)
+        warm_started_days = 0
+
+        template = None
         try:
 
             # 🔧 הגדרת seed קבוע לתוצאות עקביות\n            
@@ -348,12 +396,28 @@ class MenuOptimizer:
             all_days_meals = []
             saved_meals = []
             saved_days_full = []
+            saved_days_cost = []
             pizza = 0
             fail_count = 0
             run = 0
             total_cost_alldays = 0
 
+            template = acquire_template(self, backend)
+            template.set_prices(self.price)
+
             while run < max_days:
+                # היום הראשון נפתר תמיד (מוגבל רק ב-time_limit) - כדי שיהיה מה להחזיר
+                if saved_days_full and deadline.expired():
+                    print(f"\n⏱️ נגמר הזמן לחישוב אחרי {run} ימים")
+                    deadline_reached = True
+
+                    days, cost = self._repeat_saved_days(saved_days_full, saved_days_cost, max_days - run)
+                    all_days_meals.extend(days)
+                    total_cost_alldays += cost
+                    if progress:
+                        progress(max_days, max_days)
+                    break
+
                 if pizza == 1:
                     self.allowed_foods = copy.deepcopy(self.original_allowed_foods)
 
@@ -372,21 +436,8 @@ class MenuOptimizer:
                     prev_tosafot = {food for food, qty in prev_day["תוספות"]}
                     self.allowed_foods["תוספות"] -= prev_tosafot
 
-                model, x = self.build_model(run_number=run)
-
-                # y: האם מזון i נבחר בארוחה j
-                y = {}
-                max_qty = self.max_qty
-
-                for i in range(len(self.foods)):
-                    for j in range(len(self.meals)):
-                        y[(i, j)] = pulp.LpVariable(f"y_{i}_{j}", cat="Binary")
-
-                # קישור y ל-x
-                for i in range(len(self.foods)):
-                    for j in range(len(self.meals)):
-                        model += x[(i, j)] <= max_qty * y[(i, j)]
-                        model += x[(i, j)] >= 0.001 * y[(i, j)]
+                # המבנה משותף לכל החנויות והימים - מוסיפים רק את אילוצי היום
+                template.start_day(self.allowed_foods)
 
                 # ✅ מניעת שכפול ארוחה
                 for prev_day in saved_meals:
@@ -403,12 +454,31 @@ class MenuOptimizer:
                                 safe_indices.append(self.food_index[food])
 
                         if safe_indices:
-                            model += pulp.lpSum([y[(idx, j)] for idx in safe_indices]) <= len(safe_indices) - 1
-
-                model.solve(pulp.PULP_CBC_CMD(msg=False))
-
-                if model.status == pulp.LpStatusOptimal:
-                    total_cost = pulp.value(model.objective)
+                            template.add_cut([(idx, j) for idx in safe_indices])
+
+                time_limit = self.solver["time_limit"]
+                if saved_days_full:
+                    time_limit = deadline.time_limit(time_limit)
+
+                start = None
+                if self.solver["warm_start"] and prev_values:
+                    start = self._warm_start(prev_values)
+
+                solve_started = time.perf_counter()
+                status, total_cost, values = template.solve(
+                    time_limit=time_limit,
+                    mip_gap=self.solver["mip_gap"],
+                    threads=self.solver["threads"],
+                    start=start,
+                )
+                solve_times.append(time.perf_counter() - solve_started)
+                if template.start_used:
+                    warm_started_days += 1
+
+                if status != FAILED:
+                    prev_values = values
+                    if status == FEASIBLE:
+                        non_optimal_days += 1
                     total_cost_alldays += total_cost
                     run += 1
 
@@ -416,9 +486,8 @@ class MenuOptimizer:
 
                     for j, meal in enumerate(self.meals):
                         for i, food in enumerate(self.foods):
-                            var = x.get((i, j))
-                            if var is not None and var.varValue is not None and var.varValue > 0:
-                                day_meals[meal].append((food, var.varValue))
+                            if (i, j) in values:
+                                day_meals[meal].append((food, values[(i, j)]))
 
                     all_days_meals.append(day_meals)
 
@@ -431,6 +500,10 @@ class MenuOptimizer:
 
                     saved_meals.append(day_without_tosafot)
                     saved_days_full.append(copy.deepcopy(day_meals))
+                    saved_days_cost.append(total_cost)
+
+                    if progress:
+                        progress(run, max_days)
 
                     pizza = 0
                     fail_count = 0
@@ -448,63 +521,328 @@ class MenuOptimizer:
                                 "message": "לא נמצא אף פתרון אפילו ליום אחד. בדקי אילוצים או מזונות מותרים."
                             }
 
-                        days_needed = max_days - len(saved_meals)
-                        all_meals_to_use = saved_days_full * ((days_needed // len(saved_days_full)) + 1)
-                        all_meals_to_use = all_meals_to_use[:days_needed]
-                        
-
-                        for day in all_meals_to_use:
-                            day_meals = {meal: [] for meal in self.meals}
-                            for meal_name in self.meals:
-                                for food_name, qty in day.get(meal_name, []):
-                                    day_meals[meal_name].append((food_name, qty))
-                            all_days_meals.append(day_meals)
-                            run += 1
+                        days, cost = self._repeat_saved_days(
+                            saved_days_full, saved_days_cost, max_days - len(saved_meals)
+                        )
+                        all_days_meals.extend(days)
+                        total_cost_alldays += cost
+                        run += len(days)
+                        if progress:
+                            progress(run, max_days)
 
                         break
 
                     continue
 
             # תוצאות סופיות
-            formatted_days = []
-            for day in all_days_meals:
-                day_protein = day_calories = day_fat = day_carbs = 0
-
-                formatted_day = {
-                    "breakfast": [],
-                    "lunch": [],
-                    "dinner": [],
-                    "snacks": []
-                }
+            result = self._format_result(all_days_meals, total_cost_alldays, num_days)
+            result["optimal"] = non_optimal_days == 0 and not deadline_reached
+            result["solver"] = {
+                "backend": backend,
+                "non_optimal_days": non_optimal_days,
+                "deadline_reached": deadline_reached,
+                "warm_start": warm_started_days > 0,
+                "warm_started_days": warm_started_days,
+                "solve_times": [round(t, 4) for t in solve_times],
+            }
+            return result
 
-                for meal_name, english_name in [("בוקר", "breakfast"), ("צהריים", "lunch"), ("ערב", "dinner"), ("תוספות", "snacks")]:
-                    for food, qty in day.get(meal_name, []):
-                        formatted_day[english_name].append((food, qty))
-                        if food not in self.food_index:
-                            continue
-                        i = self.food_index[food]
-                        day_protein += self.protein[i] * qty
-                        day_calories += self.calories[i] * qty
-                        day_fat += self.fat[i] * qty
-                        day_carbs += self.carbs[i] * qty
-
-                formatted_day["nutrition"] = {
-                    "protein": round(day_protein, 1),
-                    "calories": round(day_calories, 1),
-                    "carbs": round(day_carbs, 1),
-                    "fat": round(day_fat, 1)
-                }
+        except Exception as e:
+            print(f"❌ שגיאה בחישוב: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {
+                "success": False,
+                "message": f"שגיאה בחישוב: {str(e)}"
+            }
 
-                formatted_days.append(formatted_day)
+        finally:
+            if template is not None:
+                release_template(template)
 
-            avg_cost_per_day = total_cost_alldays / num_days if num_days > 0 else 0
+    def _warm_start(self, prev_values):
+        """
+        פתרון התחלה (MIP start) ליום הבא, מתוקן מהפתרון של היום הקודם:
+        כל מזון שכבר לא מותר בארוחה מוחלף במזון הזול ביותר מאותה קטגוריה שמותר בה,
+        בכמות עם אותן קלוריות (בגבולות הכמות המינימלית והמקסימלית).
 
-            return {
-                "success": True,
-                "days": formatted_days,
-                "total_cost": round(total_cost_alldays, 2),
-                "avg_cost_per_day": round(avg_cost_per_day, 2)
+        Args:
+            prev_values: {(i, j): כמות} של היום הקודם
+        Returns:
+            {(i, j): כמות} - CBC מקבע את משתני הבינארי לפי ההתחלה ומשלים את
+            הכמויות ב-LP, כך שהכמויות כאן הן רק רמז
+        """
+        j_boker = self.meals.index("בוקר")
+        j_erev = self.meals.index("ערב")
+        role_min_qty = self._role_min_qty()
+
+        start = {}
+        to_replace = []
+        for (i, j), qty in sorted(prev_values.items()):
+            if self.foods[i] in self.allowed_foods[self.meals[j]]:
+                start[(i, j)] = qty
+            else:
+                to_replace.append((i, j, qty))
+
+        for i, j, qty in to_replace:
+            food = self.foods[i]
+            category = self.food_categories[food]
+
+            candidates = []
+            for other in self.allowed_foods[self.meals[j]]:
+                k = self.food_index[other]
+                if self.food_categories[other] != category or (k, j) in start:
+                    continue
+                # אותו מזון לא גם בבוקר וגם בערב
+                if (j == j_boker and (k, j_erev) in start) or (j == j_erev and (k, j_boker) in start):
+                    continue
+                candidates.append((self.price[k], other, k))
+
+            if not candidates:
+                continue
+            price, other, k = min(candidates)
+
+            if self.calories[k] > 0:
+                qty = qty * self.calories[i] / self.calories[k]
+            role = self._pair_role(other, j)
+            min_qty = role_min_qty[role] if role else 0
+            start[(k, j)] = min(max(qty, min_qty), self.max_qty)
+
+        return start
+
+    def _repeat_saved_days(self, saved_days_full, saved_days_cost, days_needed):
+        """
+        משכפל את הימים שכבר נפתרו כדי להשלים days_needed ימים.
+        הימים המשוכפלים נכנסים גם לעלות הכוללת.
+
+        Returns:
+            (days, cost)
+        """
+        repeats = (days_needed // len(saved_days_full)) + 1
+        all_meals_to_use = (saved_days_full * repeats)[:days_needed]
+        cost = sum((saved_days_cost * repeats)[:days_needed])
+
+        days = []
+        for day in all_meals_to_use:
+            day_meals = {meal: [] for meal in self.meals}
+            for meal_name in self.meals:
+                for food_name, qty in day.get(meal_name, []):
+                    day_meals[meal_name].append((food_name, qty))
+            days.append(day_meals)
+        return days, cost
+
+    def lp_lower_bound(self, num_days, backend=None):
+        """
+        חסם תחתון לעלות התפריט: num_days × הפתרון של הרלקסציה הרציפה (LP)
+        של יום בלי אף מזון מוצא. כל יום בתפריט (בשני המצבים) מוגבל יותר מהמודל הזה,
+        ולכן עולה לפחות כמוהו.
+
+        מחזיר None אם גם הרלקסציה לא פתירה.
+        """
+        template = acquire_template(self, backend or self.solver["backend"])
+        try:
+            template.set_prices(self.price)
+            status, cost, values = template.solve(relax=True, threads=self.solver["threads"])
+
+            if status == FAILED:
+                return None
+            return num_days * cost
+        finally:
+            release_template(template)
+
+    def _format_result(self, all_days_meals, total_cost_alldays, num_days):
+        """
+        ממיר רשימת ימים ({ארוחה: [(מזון, כמות)]}) לפורמט התוצאה של generate_menu
+        """
+        formatted_days = []
+        for day in all_days_meals:
+            day_protein = day_calories = day_fat = day_carbs = 0
+
+            formatted_day = {
+                "breakfast": [],
+                "lunch": [],
+                "dinner": [],
+                "snacks": []
+            }
+
+            for meal_name, english_name in [("בוקר", "breakfast"), ("צהריים", "lunch"), ("ערב", "dinner"), ("תוספות", "snacks")]:
+                for food, qty in day.get(meal_name, []):
+                    formatted_day[english_name].append((food, qty))
+                    if food not in self.food_index:
+                        continue
+                    i = self.food_index[food]
+                    day_protein += self.protein[i] * qty
+                    day_calories += self.calories[i] * qty
+                    day_fat += self.fat[i] * qty
+                    day_carbs += self.carbs[i] * qty
+
+            formatted_day["nutrition"] = {
+                "protein": round(day_protein, 1),
+                "calories": round(day_calories, 1),
+                "carbs": round(day_carbs, 1),
+                "fat": round(day_fat, 1)
+            }
+
+            formatted_days.append(formatted_day)
+
+        avg_cost_per_day = total_cost_alldays / num_days if num_days > 0 else 0
+
+        return {
+            "success": True,
+            "days": formatted_days,
+            "total_cost": round(total_cost_alldays, 2),
+            "avg_cost_per_day": round(avg_cost_per_day, 2)
+        }
+
+    # ============================
+    # 📅 מצב horizon - מודל אחד לכל הימים
+    # ============================
+
+    def _default_repeat_window(self, num_days):
+        """
+        חלון אי-החזרה הגדול ביותר שהקטלוג יכול לעמוד בו:
+        מספר המועמדים הקטן ביותר לפחמימה/חלבון בארוחות בוקר, צהריים וערב.
+        """
+        window = num_days
+        for meal_name in ["בוקר", "צהריים", "ערב"]:
+            for role_foods in (self.carb_foods, self.protein_foods):
+                candidates = len(role_foods & self.original_allowed_foods[meal_name])
+                window = min(window, candidates)
+        return max(window, 1)
+
+    def build_horizon_model(self, num_days, repeat_window):
+        """
+        בונה מודל MILP אחד לכל num_days הימים.
+
+        התפריט מחזורי: יום d משתמש במשתנים של יום d % period, כאשר
+        period = min(num_days, repeat_window). כך גודל המודל לא תלוי במספר הימים,
+        ופונקציית המטרה סופרת כל יום במחזור לפי מספר הפעמים שהוא מופיע בתפריט.
+
+        אותם כללים שהמצב הרציף אוכף ע"י צמצום allowed_foods, כאן כאילוצים:
+        - בוקר/צהריים/ערב: מזון שאינו ירק (או גזר) לא חוזר באותה ארוחה
+          בתוך repeat_window ימים רצופים (כלומר - פעם אחת לכל היותר במחזור)
+        - צהריים: ירק לא חוזר ביומיים רצופים
+        - תוספות: מזון לא חוזר ביומיים רצופים
+        - בתוך כל יום: אותו מזון לא גם בבוקר וגם בערב
+
+        Returns:
+            model, cycle_x (רשימת x לכל יום במחזור), period
+        """
+        # מחזור של יום אחד היה חוזר על עצמו ביומיים רצופים
+        period = min(num_days, max(repeat_window, 2))
+
+        model = pulp.LpProblem("תפריט_רב_יומי", pulp.LpMinimize)
+
+        cycle_x = []
+        cycle_usage = []
+        for d in range(period):
+            x, usage = self._add_day_block(model, self.original_allowed_foods, set(), f"d{d}")
+            cycle_x.append(x)
+            cycle_usage.append(usage)
+
+        # פונקציית מטרה - מינימום עלות כוללת לכל num_days הימים
+        repeats = [len(range(d, num_days, period)) for d in range(period)]
+        model += pulp.lpSum(
+            repeats[d] * self.price[i] * x[(i, j)]
+            for d, x in enumerate(cycle_x) for (i, j) in x
+        ), "עלות_כוללת"
+
+        # אי-חזרה באותה ארוחה - כל חלון של repeat_window ימים מכסה את כל המחזור
+        if repeat_window > 1:
+            for meal_name in ["בוקר", "צהריים", "ערב"]:
+                j = self.meals.index(meal_name)
+                for i, food in enumerate(self.foods):
+                    if food in self.vegetables and food != "גזר":
+                        continue
+                    if (i, j) not in cycle_usage[0]:
+                        continue
+                    model += pulp.lpSum(
+                        usage[(i, j)] for usage in cycle_usage
+                    ) <= 1, f"no_repeat_{i}_{j}"
+
+        # ירקות בצהריים ותוספות - לא ביומיים רצופים (כולל המעבר מסוף המחזור לתחילתו)
+        pairs = [(d, d + 1) for d in range(period - 1)]
+        if num_days > period:
+            pairs.append((period - 1, 0))
+
+        j_lunch = self.meals.index("צהריים")
+        j_tosafot = self.meals.index("תוספות")
+        for d, d_next in pairs:
+            for (i, j), var in cycle_usage[d].items():
+                if j == j_lunch and self.foods[i] in self.vegetables:
+                    model += var + cycle_usage[d_next][(i, j)] <= 1, f"no_consecutive_lunch_veg_{i}_{d}"
+                elif j == j_tosafot:
+                    model += var + cycle_usage[d_next][(i, j)] <= 1, f"no_consecutive_tosafot_{i}_{d}"
+
+        return model, cycle_x, period
+
+    def generate_menu_horizon(self, num_days=7, repeat_window=None, time_limit=None, gap_rel=None,
+                              backend=None, progress=None):
+        """
+        מחשב את כל התפריט בפתרון אחד של מודל רב-יומי, עם backend
+        (ברירת המחדל - self.solver["backend"], ראו optimizer.solver.solve_model).
+
+        אם repeat_window לא הוגדר, מתחילים מהחלון הגדול ביותר שהקטלוג מאפשר,
+        ומקטינים אותו כל עוד המודל לא פתיר.
+        הרלקסציה של המודל חלשה ולכן קשה להוכיח בו אופטימום מדויק - time_limit (ברירת המחדל:
+        מ-self.solver, או 10 שניות) ו-gap_rel (ברירת המחדל: self.solver["horizon_mip_gap"], או 2%,
+        ולא mip_gap של המצב הרציף) מגבילים את הפתרון, והתוצאה היא הפתרון הטוב ביותר שנמצא -
+        עם "optimal": False אם לא הוכח.
+        """
+        backend = backend or self.solver["backend"]
+        if time_limit is None:
+            time_limit = self.solver["time_limit"] or 10
+        if gap_rel is None:
+            gap_rel = self.solver["horizon_mip_gap"] if self.solver["horizon_mip_gap"] is not None else 0.02
+        deadline = Deadline(self.solver["deadline"])
+
+        try:
+            if repeat_window is None:
+                repeat_window = self._default_repeat_window(num_days)
+
+            window = repeat_window
+            while window >= 1 and not deadline.expired():
+                model, cycle_x, period = self.build_horizon_model(num_days, window)
+                # ה-preprocessing של CBC איטי מאוד על המודל הזה ולא משפר את הפתרון
+                status = solve_model(
+                    model, backend, deadline.time_limit(time_limit), gap_rel, self.solver["threads"],
+                    options=["preprocess off"]
+                )
+                if status != FAILED:
+                    break
+
+                print(f"לא נמצא פתרון רב-יומי עם חלון אי-חזרה של {window} ימים")
+                window -= 1
+            else:
+                return {
+                    "success": False,
+                    "message": "לא נמצא פתרון רב-יומי. בדקי אילוצים או מזונות מותרים."
+                }
+
+            cycle_meals = []
+            for x in cycle_x:
+                day_meals = {meal: [] for meal in self.meals}
+                for j, meal in enumerate(self.meals):
+                    for i, food in enumerate(self.foods):
+                        var = x.get((i, j))
+                        if var is not None and var.varValue is not None and var.varValue > 0:
+                            day_meals[meal].append((food, var.varValue))
+                cycle_meals.append(day_meals)
+
+            all_days_meals = [copy.deepcopy(cycle_meals[d % period]) for d in range(num_days)]
+            if progress:
+                progress(num_days, num_days)
+
+            total_cost = pulp.value(model.objective)
+            result = self._format_result(all_days_meals, total_cost, num_days)
+            result["repeat_window"] = window
+            result["optimal"] = status != FEASIBLE
+            result["solver"] = {
+                "backend": backend,
+                "non_optimal_days": num_days if status == FEASIBLE else 0,
+                "deadline_reached": deadline.expired(),
             }
+            return result
 
         except Exception as e:
             print(f"❌ שגיאה בחישוב: {str(e)}")
@@ -514,3 +852,13 @@ class MenuOptimizer:
                 "success": False,
                 "message": f"שגיאה בחישוב: {str(e)}"
             }
+
+
+def solve_menu(foods, user_params, mode="sequential", solver=None, progress=None):
+    """
+    פותר תפריט לרשימת מזונות אחת (למשל - מחירי חנות אחת).
+    פונקציה ברמת המודול כדי שאפשר יהיה להריץ אותה גם ב-ProcessPoolExecutor.
+    """
+    optimizer = MenuOptimizer(foods, user_params, solver)
+    optimizer.allowed_foods = copy.deepcopy(optimizer.original_allowed_foods)
+    return optimizer.generate_menu(num_days=user_params["num_days"], mode=mode, progress=progress)
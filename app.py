@@ -1,9 +1,10 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, send_file
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, send_file, stream_with_context
 import random
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import os
 import threading
+import time
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
@@ -21,16 +22,20 @@ import sqlite3
 import re
 import copy
 import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from io import BytesIO
-from pricing.scrapers import (
-    get_prices_shufersal,
-    get_prices_victory,
-    get_prices_from_rami_levy
-)
+from pricing.scrapers import get_prices_all_stores, price_cache, product_index, breakers, STORE_SCRAPERS
+from pricing.refresh import PriceRefresh, SKIPPED_BUDGET, SKIPPED_DELETED, SKIPPED_FAILED
+from pricing.price_cache import normalize_name
+from pricing.worker import submit_scrape
+from pricing.update_executor import PriceUpdateExecutor, QueueFull
 
-from algorithm import MenuOptimizer
+from algorithm import MenuOptimizer, solve_menu
+from optimizer.solver import Deadline
+from menu_cache import MenuCache, menu_cache_key
+from job_store import JobStore, RUNNING, COMPLETED, FAILED, FINISHED
 
 FONT_DIR = os.path.join(os.path.dirname(__file__), "fonts")
 
@@ -43,7 +48,20 @@ pdfmetrics.registerFont(
 )
 
 # ייבוא ההגדרות החדשות
-from config import SECRET_KEY, PORT, ADMIN_EMAIL
+from config import (
+    SECRET_KEY, PORT, ADMIN_EMAIL,
+    OPTIMIZER_MODE, OPTIMIZER_POOL, OPTIMIZER_WORKERS, OPTIMIZER_LP_PRUNING,
+    OPTIMIZER_BACKEND, SOLVER_TIME_LIMIT, SOLVER_MIP_GAP, HORIZON_MIP_GAP, SOLVER_THREADS, OPTIMIZER_DEADLINE,
+    OPTIMIZER_WARM_START,
+    MENU_CACHE_ENABLED, MENU_CACHE_PATH, MENU_CACHE_MAX_ENTRIES, MENU_CACHE_TTL,
+    JOB_STORE_PATH, JOB_TTL, CALCULATE_JOB_WORKERS, CALCULATE_JOB_QUEUE, CALCULATE_JOB_POLL_WAIT,
+    PRICE_TASK_STREAM_INTERVAL, PRICE_TASK_STREAM_TIMEOUT, PRICE_TASK_STREAM_RETRY, PRICE_TASK_STREAMS,
+    SCRAPER_STORE_WORKERS, SCRAPER_WORKER_ENABLED, SCRAPER_QUEUE_PATH, PRICE_CACHE_TTL,
+    PRICE_UPDATE_WORKERS, PRICE_UPDATE_QUEUE, PRICE_UPDATE_BATCH, PRICE_UPDATE_BATCH_WAIT,
+    PRICE_BULK_BATCH, PRICE_BULK_STALE,
+    PRICE_REFRESH_PATH, PRICE_REFRESH_BUDGET, PRICE_REFRESH_BATCH, PRICE_REFRESH_MENU_WEIGHT,
+    PRICE_REFRESH_VOLATILITY_WEIGHT, PRICE_REFRESH_MENU_DAYS
+)
 from database import get_db_connection, init_database
 
 
@@ -55,12 +73,45 @@ CORS(app)
 last_prices_update = None
 
 # ============================
-# 📦 מערכת ניהול משימות אסינכרונית
+# 🗄️ מטמון תוצאות /calculate
 # ============================
-import threading
+menu_cache = MenuCache(MENU_CACHE_PATH, MENU_CACHE_MAX_ENTRIES, MENU_CACHE_TTL) if MENU_CACHE_ENABLED else None
 
-price_update_tasks = {}
-tasks_lock = threading.Lock()
+
+# ============================
+# ⏳ משימות רקע של /calculate
+# ============================
+# המשימות וההתקדמות ב-SQLite (משותף ל-workers), החישוב עצמו ב-executor חסום של ה-worker
+job_store = JobStore(JOB_STORE_PATH, JOB_TTL)
+calculate_executor = ThreadPoolExecutor(max_workers=CALCULATE_JOB_WORKERS)
+# משימות שרצות או ממתינות ב-worker הזה - מעבר לזה הבקשה נדחית (429)
+calculate_slots = threading.BoundedSemaphore(CALCULATE_JOB_WORKERS + CALCULATE_JOB_QUEUE)
+# משימות עדכון המחירים של מזון בודד (אחרי הוספה/עריכה) - באותו job_store
+PRICE_TASK = 'price_update'
+# עדכון כל המחירים (/api/prices/update והרענון הלילי) - אחד בכל פעם בכל ה-workers
+BULK_PRICE_JOB = 'price_bulk'
+# תור משימות הסריקה לתהליך הסריקה (python -m pricing.worker) - רק כש-SCRAPER_WORKER_ENABLED
+scrape_queue = JobStore(SCRAPER_QUEUE_PATH, JOB_TTL)
+
+
+# ============================
+# 🌙 רענון מחירים לילי הדרגתי
+# ============================
+price_refresh = PriceRefresh(
+    PRICE_REFRESH_PATH, price_cache, STORE_SCRAPERS, PRICE_CACHE_TTL,
+    menu_weight=PRICE_REFRESH_MENU_WEIGHT,
+    volatility_weight=PRICE_REFRESH_VOLATILITY_WEIGHT,
+    menu_window_days=PRICE_REFRESH_MENU_DAYS,
+)
+
+
+def invalidate_menu_cache():
+    """
+    מנקה את המטמון אחרי שינוי בקטלוג או במחירים.
+    המפתח כולל hash של הקטלוג, כך שתוצאה ישנה ממילא לא תוחזר - הניקוי מפנה את המקום.
+    """
+    if menu_cache is not None:
+        menu_cache.clear()
 
 def is_admin():
     if 'user_id' not in session:
@@ -83,129 +134,177 @@ def is_admin():
 
 
 def add_price_update_task(food_id, food_name):
-    """הוספת משימת עדכון מחירים לרשימה"""
-    task_id = f"price_update_{food_id}_{datetime.now().timestamp()}"
-    with tasks_lock:
-        price_update_tasks[task_id] = {
-            'food_id': food_id,
-            'food_name': food_name,
-            'status': 'pending',
-            'created_at': datetime.now().isoformat(),
-            'message': 'ממתין להתחלת עדכון מחירים'
-        }
-    return task_id
+    """
+    הוספת משימת עדכון מחירים. המשימות נשמרות ב-job_store (SQLite) - משותף לכל ה-workers,
+    כך שבדיקת סטטוס יכולה להגיע ל-worker אחר; משימות שהסתיימו נמחקות אחרי JOB_TTL.
+    """
+    return job_store.create(
+        PRICE_TASK, 'ממתין להתחלת עדכון מחירים',
+        payload={'food_id': food_id, 'food_name': food_name},
+        ref=food_id
+    )
+
+def retarget_price_update_task(task_id, food_id, food_name):
+    """משימה ממתינה של מזון שנערך (וקיבל id חדש) עוברת ל-id החדש"""
+    job_store.retarget(task_id, {'food_id': food_id, 'food_name': food_name}, ref=food_id)
+
 
 def rtl(text):
     reshaped = arabic_reshaper.reshape(text)
     return get_display(reshaped)
 
 
-def update_task_status(task_id, status, message=None):
-    """עדכון סטטוס משימה"""
-    with tasks_lock:
-        if task_id in price_update_tasks:
-            price_update_tasks[task_id]['status'] = status
-            if message:
-                price_update_tasks[task_id]['message'] = message
-            if status in ['completed', 'failed']:
-                price_update_tasks[task_id]['completed_at'] = datetime.now().isoformat()
+def update_task_status(task_id, status, message=None, prices=None):
+    """עדכון סטטוס משימה (prices - המחירים החדשים של המזון, בסיום)"""
+    job_store.update(task_id, status, message, result=None if prices is None else {'prices': prices})
 
-def update_prices_for_single_food_async(food_id, task_id):
-    """עדכון מחירים אסינכרוני לפריט בודד
-    באותה לוגיקה של update_all_prices (רשימה בגודל 1)
-    """
-    try:
-        # מציאת הפריט
-        food = None
-        for f in foods_db:
-            if f['id'] == food_id:
-                food = f
-                break
 
+def price_task_view(job):
+    """משימת עדכון מחירים בפורמט של ה-API"""
+    return {
+        'id': job['id'],
+        'food_id': job['payload']['food_id'],
+        'food_name': job['payload']['food_name'],
+        'status': job['status'],
+        'message': job['message'],
+        'prices': (job['result'] or {}).get('prices'),
+        'created_at': datetime.fromtimestamp(job['created_at']).isoformat(),
+        'completed_at': datetime.fromtimestamp(job['updated_at']).isoformat() if job['status'] in FINISHED else None
+    }
+
+
+def update_prices_for_foods(batch):
+    """
+    עדכון מחירים לקבוצת מזונות שנוספו/נערכו - batch: [(task_id, food_id)].
+    באותה לוגיקה של update_all_prices: קריאה אחת לכל חנות עם כל המזונות בקבוצה.
+    """
+    tasks = []
+    for task_id, food_id in batch:
+        food = next((f for f in foods_db if f['id'] == food_id), None)
         if not food:
             print(f"❌ [ASYNC] הפריט {food_id} לא נמצא")
             update_task_status(task_id, 'failed', 'הפריט לא נמצא')
-            return
-
-        product_name = food['name']
-        separator = '=' * 60
-        print(f"\n{separator}")
-        print(f"🔍 [ASYNC] מתחיל חיפוש מחירים עבור: {product_name}")
-        print(f"{separator}")
-
-        update_task_status(task_id, 'running', f'מחפש מחירים עבור: {product_name}...')
+            continue
+        tasks.append((task_id, food))
+    if not tasks:
+        return
 
-        # === אותה לוגיקה של עדכון כללי – רשימה בגודל 1 ===
-        product_names = [product_name]
+    foods = [food for _, food in tasks]
+    product_names = [food['name'] for food in foods]
+    separator = '=' * 60
+    print(f"\n{separator}")
+    print(f"🔍 [ASYNC] מתחיל חיפוש מחירים עבור: {', '.join(product_names)}")
+    print(f"{separator}")
 
-        shufersal = get_prices_shufersal(product_names)
-        victory   = get_prices_victory(product_names)
-        rami      = get_prices_from_rami_levy(product_names)
+    for task_id, food in tasks:
+        update_task_status(task_id, 'running', f"מחפש מחירים עבור: {food['name']}...")
 
-        shuf = shufersal[0]
-        vic  = victory[0]
-        ram  = rami[0]
+    try:
+        shufersal, victory, rami = update_prices_by_names(product_names)
 
         # עדכון המחירים (בדיוק כמו update_all_prices)
-        food['prices']['shufersal'] = shuf * 100 if shuf > 0 else None
-        food['prices']['victory']   = vic  * 100 if vic  > 0 else None
-        food['prices']['rami_levy'] = ram  * 100 if ram  > 0 else None
-
-        print(f"\n📊 סיכום מחירים עבור {product_name}:")
-        if shuf > 0:
-            print(f"   • שופרסל: {shuf:.2f} ₪")
-        else:
-            print(f"   • שופרסל: לא נמצא")
-
-        if vic > 0:
-            print(f"   • ויקטורי: {vic:.2f} ₪")
-        else:
-            print(f"   • ויקטורי: לא נמצא")
-
-        if ram > 0:
-            print(f"   • רמי לוי: {ram:.2f} ₪")
-        else:
-            print(f"   • רמי לוי: לא נמצא")
-
-        print(f"{separator}\n")
-
-        update_task_status(task_id, 'completed', 'המחירים עודכנו בהצלחה')
+        apply_store_prices(foods, "shufersal", shufersal)
+        apply_store_prices(foods, "victory", victory)
+        apply_store_prices(foods, "rami_levy", rami)
+        invalidate_menu_cache()
 
     except Exception as e:
         print(f"\n❌ [ASYNC] שגיאה בעדכון מחירים: {e}")
-        update_task_status(task_id, 'failed', f'שגיאה בעדכון מחירים: {str(e)}')
+        for task_id, _ in tasks:
+            update_task_status(task_id, 'failed', f'שגיאה בעדכון מחירים: {str(e)}')
+        return
 
+    for index, (task_id, food) in enumerate(tasks):
+        print(f"\n📊 סיכום מחירים עבור {food['name']}:")
+        for store_name, prices in [("שופרסל", shufersal), ("ויקטורי", victory), ("רמי לוי", rami)]:
+            if prices is None or prices[index] is None:
+                print(f"   • {store_name}: הסריקה נכשלה")
+            elif prices[index] > 0:
+                print(f"   • {store_name}: {prices[index]:.2f} ₪")
+            else:
+                print(f"   • {store_name}: לא נמצא")
+        update_task_status(task_id, 'completed', 'המחירים עודכנו בהצלחה', prices=food['prices'])
+
+    print(f"{separator}\n")
+
+
+# מספר קבוע של threads לעדכוני מחירים, עם תור חסום (במקום thread ודפדפנים לכל מזון)
+price_update_executor = PriceUpdateExecutor(
+    add_price_update_task, update_prices_for_foods,
+    workers=PRICE_UPDATE_WORKERS,
+    max_pending=PRICE_UPDATE_QUEUE,
+    batch_size=PRICE_UPDATE_BATCH,
+    batch_wait=PRICE_UPDATE_BATCH_WAIT,
+    retarget_task=retarget_price_update_task,
+)
 
-def start_price_update_task(food_id, food_name):
-    """התחלת משימת עדכון מחירים ב-thread נפרד"""
-    task_id = add_price_update_task(food_id, food_name)
-    
-    # יצירת thread חדש לעדכון המחירים
-    thread = threading.Thread(
-        target=update_prices_for_single_food_async,
-        args=(food_id, task_id),
-        daemon=True
-    )
-    thread.start()
-    
-    return task_id
+
+def start_price_update_task(food_id, food_name, replaces=None):
+    """
+    מכניס את המזון לתור עדכוני המחירים ומחזיר את ה-task_id (משימה קיימת אם המזון כבר בתור),
+    או None אם התור מלא - המחיר הידני נשאר עד העדכון הבא.
+    replaces - ה-id הקודם של מזון שנערך, כדי שמשימה שעוד ממתינה עבורו תעבור אליו.
+    """
+    try:
+        return price_update_executor.submit(food_id, food_name, replaces)
+    except QueueFull as e:
+        print(f"⚠️ עדכון המחירים של {food_name} נדחה: {e}")
+        return None
 
 def get_task_status(task_id):
-    """קבלת סטטוס משימה"""
-    with tasks_lock:
-        return price_update_tasks.get(task_id)
+    """קבלת סטטוס משימה, או None"""
+    job = job_store.get(task_id)
+    if job is None or job['kind'] != PRICE_TASK:
+        return None
+    return price_task_view(job)
+
+
+def get_tasks_status(task_ids=(), food_ids=()):
+    """
+    סטטוס של כמה משימות בבת אחת: {task_id: משימה} ו-{food_id: המשימה האחרונה של המזון}
+    """
+    by_id = {
+        task_id: price_task_view(job)
+        for task_id, job in job_store.get_many(task_ids).items() if job['kind'] == PRICE_TASK
+    }
+    by_food = {
+        food_id: price_task_view(job)
+        for food_id, job in job_store.find_by_ref(PRICE_TASK, food_ids).items()
+    }
+    return by_id, by_food
 
 
-def update_prices_by_names(product_names):
+def update_prices_by_names(product_names, force=False):
     """
     לוגיקת מחירים משותפת
     משמשת גם לעדכון כללי וגם לפריט בודד
+
+    שלוש החנויות נסרקות במקביל (עד SCRAPER_STORE_WORKERS בו-זמנית), כך שהזמן הכולל
+    הוא בערך זמן החנות האיטית ביותר. כל רשימה באותו סדר של product_names,
+    או None אם הסריקה של החנות נכשלה.
+    מחירים שנסרקו לאחרונה נלקחים ממטמון המחירים, אלא אם force=True.
+
+    SCRAPER_WORKER_ENABLED - הסריקה עצמה רצה בתהליך הסריקה (python -m pricing.worker):
+    כאן רק נכנסת משימה לתור ומחכים לתוצאה.
     """
-    shufersal = get_prices_shufersal(product_names)
-    victory   = get_prices_victory(product_names)
-    rami      = get_prices_from_rami_levy(product_names)
+    if SCRAPER_WORKER_ENABLED:
+        prices = submit_scrape(scrape_queue, product_names, force=force)
+    else:
+        prices = get_prices_all_stores(product_names, workers=SCRAPER_STORE_WORKERS, force=force)
+    return prices["shufersal"], prices["victory"], prices["rami_levy"]
+
 
-    return shufersal, victory, rami
+def apply_store_prices(foods, store, prices):
+    """
+    מעדכן את מחיר החנות (ל-100 גרם) לכל מזון לפי האינדקס ב-prices.
+    prices=None (הסריקה נכשלה) או None למזון מסוים (לא נסרק - החנות לא זמינה) - המחיר הקיים נשאר.
+    """
+    if prices is None:
+        return
+    for food, price in zip(foods, prices):
+        if price is None:
+            continue
+        food["prices"][store] = price * 100 if price > 0 else None
 
 
 def init_db():
@@ -399,30 +498,192 @@ def get_default_foods():
 
 foods_db = get_default_foods()
 
-def update_all_prices():
+# foods_db נשמר בזיכרון של כל worker בנפרד. מחירים שנסרקו ב-worker אחר או בתהליך הסריקה
+# מגיעים דרך מטמון המחירים המשותף - זה זמן המחיר האחרון ממנו שהוחל כאן (0 - הכל, גם אחרי הפעלה מחדש)
+prices_synced_at = 0.0
+prices_sync_lock = threading.Lock()
+
+
+def sync_prices_from_cache():
+    """
+    מחיל על foods_db מחירים שנשמרו במטמון המחירים מאז הסנכרון הקודם.
+    מחיר "לא נמצא" (0) לא נשמר במטמון, ולכן לא עובר בין workers.
+    """
+    global prices_synced_at
+    if price_cache is None:
+        return
+    with prices_sync_lock:
+        rows = price_cache.changed_since(prices_synced_at)
+        if not rows:
+            return
+        foods_by_name = {}
+        for food in foods_db:
+            foods_by_name.setdefault(normalize_name(food['name']), []).append(food)
+
+        changed = False
+        for store, name, price, fetched_at in rows:
+            for food in foods_by_name.get(name, []):
+                if food['prices'].get(store) != price * 100:
+                    food['prices'][store] = price * 100
+                    changed = True
+            prices_synced_at = max(prices_synced_at, fetched_at)
+    if changed:
+        invalidate_menu_cache()
+
+
+def update_all_prices(force=False, progress=None, cancelled=None):
+    """
+    עדכון מחירים לכל הקטלוג, בשלבים של PRICE_BULK_BATCH מזונות.
+
+    progress(event) - אחרי כל שלב: כמה מזונות עודכנו, סיכום לכל חנות והמחירים החדשים של המזונות בשלב
+    cancelled() - נבדק לפני כל שלב; True עוצר (המחירים שכבר עודכנו נשארים)
+
+    Returns:
+        {"done", "total", "stores": {חנות: {"found", "not_found", "skipped", "failed"}}}
+    """
     global last_prices_update
 
-    product_names = [food["name"] for food in foods_db]
+    # צילום של הרשימה - מחיקת מזון בזמן הסריקה לא מזיזה את האינדקסים
+    foods = list(foods_db)
+    stores = {store: {"found": 0, "not_found": 0, "skipped": 0, "failed": 0} for store in STORE_SCRAPERS}
+    done = 0
 
-    shufersal = get_prices_shufersal(product_names)
-    victory = get_prices_victory(product_names)
-    rami = get_prices_from_rami_levy(product_names)
+    for start in range(0, len(foods), PRICE_BULK_BATCH):
+        if cancelled is not None and cancelled():
+            break
+        batch = foods[start:start + PRICE_BULK_BATCH]
+        results = update_prices_by_names([food["name"] for food in batch], force=force)
+
+        for store, prices in zip(STORE_SCRAPERS, results):
+            apply_store_prices(batch, store, prices)
+            for price in prices if prices is not None else [None] * len(batch):
+                if prices is None:
+                    stores[store]["failed"] += 1
+                elif price is None:
+                    stores[store]["skipped"] += 1
+                elif price > 0:
+                    stores[store]["found"] += 1
+                else:
+                    stores[store]["not_found"] += 1
+        done += len(batch)
+
+        if progress is not None:
+            progress({
+                "type": "progress",
+                "done": done,
+                "total": len(foods),
+                "stores": stores,
+                "products": [
+                    {"food_id": food["id"], "name": food["name"], "prices": dict(food["prices"])}
+                    for food in batch
+                ],
+            })
 
-    for i, food in enumerate(foods_db):
-        food["prices"]["shufersal"] = shufersal[i] * 100 if shufersal[i] > 0 else None
-        food["prices"]["victory"] = victory[i] * 100 if victory[i] > 0 else None
-        food["prices"]["rami_levy"] = rami[i] * 100 if rami[i] > 0 else None
+    if done:
+        invalidate_menu_cache()
+    if done == len(foods):
+        last_prices_update = datetime.now()
+        print(f"🕒 מחירים עודכנו ב‑{last_prices_update}")
 
-    last_prices_update = datetime.now()
-    print(f"🕒 מחירים עודכנו ב‑{last_prices_update}")
+    return {"done": done, "total": len(foods), "stores": stores}
 
 
+def run_bulk_price_update(job_id, force=False):
+    """
+    מריץ את update_all_prices ברקע ושומר התקדמות ותוצאה ב-job_store.
+    משימה שכבר לא פעילה (בוטלה, או נחשבה תקועה ועדכון אחר החליף אותה) עוצרת בשלב הבא
+    ולא דורסת את הסטטוס שלה.
+    """
+    try:
+        if not job_store.update(job_id, RUNNING, 'מעדכן מחירים...'):
+            # בוטלה עוד לפני שהתחילה
+            return
+        summary = update_all_prices(
+            force=force,
+            progress=lambda event: job_store.add_event(job_id, event),
+            cancelled=lambda: not job_store.is_active(job_id)
+        )
+        summary['breakers'] = breakers.states()
+        message = f"עודכנו {summary['done']}/{summary['total']} מזונות"
+        if not job_store.update(job_id, COMPLETED, message, result=summary):
+            # הסטטוס (cancelled/failed) נשאר; הסיכום של מה שכן עודכן - כאירוע אחרון
+            job_store.add_event(job_id, dict(summary, type='stopped', message=message))
 
+    except Exception as e:
+        print(f"❌ עדכון מחירים {job_id}: {e}")
+        job_store.update(job_id, FAILED, f'שגיאה בעדכון מחירים: {str(e)}')
+
+
+def build_foods_for_source(foods_db, source):
+    """
+    עותק של המזונות עם המחיר של חנות אחת כמחיר פעיל.
+    אם אין מחיר בחנות – ממצעים מסופרים אחרים (בלי manual), ואם גם זה חסר - המזון לא נכלל.
+    """
+    foods_copy = []
+
+    for f in foods_db:
+        price = f["prices"].get(source)
+
+        # אם אין מחיר – ממצעים מסופרים אחרים (בלי manual)
+        if price is None:
+            other_prices = [
+                p for k, p in f["prices"].items()
+                if k != "manual" and p is not None
+            ]
+            if not other_prices:
+                continue
+            price = sum(other_prices) / len(other_prices)
+
+        f_copy = copy.deepcopy(f)
+        f_copy["prices"] = {"temp": price}
+        f_copy["active_price_source"] = "temp"
+        foods_copy.append(f_copy)
+
+    return foods_copy
+
+
+def solver_config():
+    """הגדרות הפותר מ-config.py (ראו optimizer.solver.DEFAULT_SOLVER)"""
+    return {
+        "backend": OPTIMIZER_BACKEND,
+        "time_limit": SOLVER_TIME_LIMIT,
+        "mip_gap": SOLVER_MIP_GAP,
+        "horizon_mip_gap": HORIZON_MIP_GAP,
+        "threads": SOLVER_THREADS,
+        "deadline": OPTIMIZER_DEADLINE,
+        "warm_start": OPTIMIZER_WARM_START,
+    }
+
+
+def day_progress(progress, source):
+    """עוטף את progress כ-callback של generate_menu עבור חנות אחת"""
+    if progress is None:
+        return None
 
+    def report(day, num_days):
+        progress({"type": "day", "store": source, "day": day, "num_days": num_days})
+    return report
 
 
+def run_optimizer_for_all_price_sources(foods_db, user_params, price_sources, workers=None, pool=None, prune=None,
+                                        solver=None, progress=None):
+    """
+    פותר תפריט לכל חנות ומחזיר את הזול ביותר.
+    החנויות נפתרות במקביל (CBC רץ כתהליך נפרד לכל פתרון), והבחירה נעשית
+    לפי סדר price_sources - כך שהתוצאה זהה לזו של ריצה ברצף.
+
+    עם prune (OPTIMIZER_LP_PRUNING) - branch and bound בין החנויות:
+    לכל חנות מחושב קודם חסם תחתון מרלקסציית LP, החנויות נפתרות לפי סדר החסם,
+    וחנות שהחסם שלה כבר יקר מהתפריט הזול ביותר שנמצא לא נפתרת בכלל.
+    הסיכום לכל חנות (עלות, חסם, האם נגזמה) מצורף לתוצאה תחת "stores".
 
-def run_optimizer_for_all_price_sources(foods_db, user_params, price_sources):
+    solver (ברירת המחדל - solver_config()): ה-deadline שלו חל על כל החנויות יחד.
+
+    progress - אם הועבר, נקרא עם אירוע (dict) לכל יום שנפתר בכל חנות
+    ({"type": "day", "store", "day", "num_days"}) ולכל חנות שהסתיימה
+    ({"type": "store", "store", "status": solved/failed/pruned, "total_cost"}).
+    ב-pool של תהליכים אין אירועי יום - רק סיום חנות.
+    """
     store_totals = {}
     random.seed(42)
 
@@ -430,33 +691,82 @@ def run_optimizer_for_all_price_sources(foods_db, user_params, price_sources):
     best_source = None
     best_cost = None
 
-    for source in price_sources:
-        foods_copy = []
-
-        for f in foods_db:
-            price = f["prices"].get(source)
-
-            # אם אין מחיר – ממצעים מסופרים אחרים (בלי manual)
-            if price is None:
-                other_prices = [
-                    p for k, p in f["prices"].items()
-                    if k != "manual" and p is not None
-                ]
-                if not other_prices:
-                    continue
-                price = sum(other_prices) / len(other_prices)
+    workers = workers or OPTIMIZER_WORKERS
+    pool = pool or OPTIMIZER_POOL
+    if prune is None:
+        prune = OPTIMIZER_LP_PRUNING
+    solver = solver or solver_config()
+    deadline = Deadline(solver.get("deadline"))
 
-            f_copy = copy.deepcopy(f)
-            f_copy["prices"] = {"temp": price}
-            f_copy["active_price_source"] = "temp"
-            foods_copy.append(f_copy)
-
-        if not foods_copy:
-            continue
-
-        optimizer = MenuOptimizer(foods_copy, user_params)
-        optimizer.allowed_foods = copy.deepcopy(optimizer.original_allowed_foods)
-        result = optimizer.generate_menu(num_days=user_params["num_days"])
+    store_foods = {}
+    for source in price_sources:
+        foods_copy = build_foods_for_source(foods_db, source)
+        if foods_copy:
+            store_foods[source] = foods_copy
+
+    # חסמים תחתונים וסדר הפתרון
+    bounds = {}
+    if prune and len(store_foods) > 1:
+        for source, foods_copy in store_foods.items():
+            bounds[source] = MenuOptimizer(foods_copy, user_params, solver).lp_lower_bound(user_params["num_days"])
+
+        # חנות שגם ה-LP שלה לא פתיר - לא נפתרת בכלל
+        order = sorted(
+            (source for source in store_foods if bounds[source] is not None),
+            key=lambda source: bounds[source]
+        )
+        # החנות המבטיחה ביותר לבד (כדי לקבל תפריט להשוואה), והשאר במקביל
+        waves = [order[:1]] + [order[k:k + workers] for k in range(1, len(order), workers)]
+    else:
+        waves = [list(store_foods)]
+
+    results = {}
+    pruned = set(store_foods) - {source for wave in waves for source in wave}
+    if progress:
+        for source in pruned:
+            progress({"type": "store", "store": source, "status": "pruned", "total_cost": None})
+
+    executor_cls = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+    with executor_cls(max_workers=max(1, min(workers, len(store_foods) or 1))) as executor:
+        for wave in waves:
+            incumbent = min(
+                (r["total_cost"] for r in results.values() if r and r.get("success")),
+                default=None
+            )
+            to_solve = []
+            for source in wave:
+                # total_cost מעוגל ל-2 ספרות - לא גוזמים חנות שעלולה להיות שווה לזולה
+                if incumbent is not None and bounds[source] > incumbent + 0.01:
+                    pruned.add(source)
+                else:
+                    to_solve.append(source)
+
+            for source in wave:
+                if source in pruned and progress:
+                    progress({"type": "store", "store": source, "status": "pruned", "total_cost": None})
+
+            # כל חנות מקבלת את הזמן שנותר מה-deadline של כל הבקשה
+            store_solver = dict(solver, deadline=deadline.remaining())
+            futures = {
+                source: executor.submit(
+                    solve_menu, store_foods[source], user_params, OPTIMIZER_MODE, store_solver,
+                    day_progress(progress, source) if pool != "process" else None
+                )
+                for source in to_solve
+            }
+            for source, future in futures.items():
+                results[source] = future.result()
+                if progress:
+                    solved = bool(results[source] and results[source].get("success"))
+                    progress({
+                        "type": "store",
+                        "store": source,
+                        "status": "solved" if solved else "failed",
+                        "total_cost": results[source]["total_cost"] if solved else None
+                    })
+
+    for source in store_foods:
+        result = results.get(source)
 
         if result and result.get("success"):
             total_cost = result["total_cost"]
@@ -469,6 +779,25 @@ def run_optimizer_for_all_price_sources(foods_db, user_params, price_sources):
                 best_source = source
                 best_cost = total_cost
 
+    for source in store_foods:
+        if source not in pruned:
+            continue
+        bound = bounds.get(source)
+        if bound is None:
+            print(f" חנות: {source}, גם הרלקסציה לא פתירה - לא נפתרה")
+        else:
+            print(f" חנות: {source}, חסם תחתון {bound:.2f} ≥ {best_cost:.2f} - לא נפתרה")
+
+    if best_result is not None:
+        best_result["stores"] = {
+            source: {
+                "total_cost": store_totals.get(source),
+                "lp_bound": round(bounds[source], 2) if bounds.get(source) is not None else None,
+                "pruned": source in pruned
+            }
+            for source in store_foods
+        }
+
     if best_source:
         print(f"\n✅ החנות שנבחרה: {best_source} ({best_cost:.2f} ₪)")
         
@@ -483,9 +812,94 @@ def run_optimizer_for_all_price_sources(foods_db, user_params, price_sources):
 
 
 
+def refresh_prices_incremental(budget=PRICE_REFRESH_BUDGET, progress=None, cancelled=None):
+    """
+    רענון מחירים לפי סדר העדיפויות של price_refresh, בקבוצות של PRICE_REFRESH_BATCH,
+    עד שנגמר budget שניות. המיקום נשמר אחרי כל קבוצה - ריצה שנקטעה ממשיכה משם,
+    ומה שלא הספיק להתרענן נרשם כמדולג. ריצה שבוטלה נשארת פתוחה וממשיכה בפעם הבאה.
+
+    progress(event) - אחרי כל קבוצה (המיקום בתוכנית)
+    cancelled() - נבדק לפני כל קבוצה; True עוצר (בלי לסיים את הריצה - ראו PriceRefresh.cancel)
+    """
+    global last_prices_update
+
+    deadline = Deadline(budget)
+    foods_by_name = {food["name"]: food for food in foods_db}
+    run = price_refresh.start_or_resume(list(foods_by_name))
+    plan, position = run["plan"], run["position"]
+
+    if run["resumed"] and position > 0:
+        # המחירים שכבר רועננו שמורים במטמון המחירים - מחזירים אותם לקטלוג רק מהמטמון, בלי סריקה:
+        # גם מחיר שעבר את ה-ttl מאז (עד resume_window) עדיף על חזרה על כל החלק שכבר נעשה
+        print(f"🔁 ממשיך רענון שנקטע: {position}/{len(plan)}")
+        done = [foods_by_name[name] for name in plan[:position] if name in foods_by_name]
+        if price_cache is not None:
+            names = [food["name"] for food in done]
+            for store in STORE_SCRAPERS:
+                cached = price_cache.get_many(store, names, max_age=price_refresh.resume_window)
+                # מזון בלי מחיר במטמון (None) - המחיר הקיים נשאר
+                apply_store_prices(done, store, [cached.get(normalize_name(name)) for name in names])
+
+    refreshed = 0
+    stopped = False
+    while position < len(plan) and not deadline.expired():
+        if cancelled is not None and cancelled():
+            print("⏹️ הרענון נעצר - משימת עדכון המחירים כבר לא פעילה")
+            stopped = True
+            break
+        batch = plan[position:position + PRICE_REFRESH_BATCH]
+        foods = [foods_by_name[name] for name in batch if name in foods_by_name]
+        skipped = [(name, SKIPPED_DELETED) for name in batch if name not in foods_by_name]
+
+        if foods:
+            results = update_prices_by_names([food["name"] for food in foods])
+            for store, prices in zip(STORE_SCRAPERS, results):
+                apply_store_prices(foods, store, prices)
+            # לא נסרק באף חנות (הסריקה נכשלה או שהמפסק של החנות פתוח)
+            skipped += [
+                (food["name"], SKIPPED_FAILED) for i, food in enumerate(foods)
+                if all(prices is None or prices[i] is None for prices in results)
+            ]
+            refreshed += len(foods)
+
+        position += len(batch)
+        price_refresh.advance(run["id"], position, skipped)
+        if progress is not None:
+            progress({"type": "refresh", "position": position, "total": len(plan), "refreshed": refreshed})
+
+    if stopped:
+        # ריצה שבוטלה לא מסתיימת - הרענון הבא ממשיך ממנה
+        price_refresh.cancel(run["id"], position, plan[position:])
+    else:
+        price_refresh.finish(run["id"], [(name, SKIPPED_BUDGET) for name in plan[position:]])
+
+    if refreshed:
+        invalidate_menu_cache()
+        last_prices_update = datetime.now()
+    print(f"🕒 רוענו {refreshed} מזונות, {len(plan) - position} דולגו ({'בוטל' if stopped else 'נגמר הזמן'})")
+
+
 def nightly_price_update():
+    # תופס את אותו "מקום" של עדכון המחירים הכללי - לא רץ במקביל לעדכון ידני
+    job_id, created = job_store.create_exclusive(BULK_PRICE_JOB, 'רענון לילי', stale_after=PRICE_BULK_STALE)
+    if not created:
+        print("🌙 עדכון מחירים כבר רץ - מדלג על הרענון הלילי")
+        return
+
     print("🌙 התחל עדכון מחירים אוטומטי")
-    update_all_prices()
+    try:
+        if not job_store.update(job_id, RUNNING, 'רענון לילי'):
+            return
+        # אירוע אחרי כל קבוצה מעדכן את updated_at - כך הרענון (עד PRICE_REFRESH_BUDGET)
+        # לא נחשב תקוע אחרי PRICE_BULK_STALE; ביטול או השתלטות עוצרים אותו
+        refresh_prices_incremental(
+            progress=lambda event: job_store.add_event(job_id, event),
+            cancelled=lambda: not job_store.is_active(job_id)
+        )
+        job_store.update(job_id, COMPLETED, 'רענון לילי הסתיים')
+    except Exception as e:
+        job_store.update(job_id, FAILED, f'שגיאה ברענון הלילי: {str(e)}')
+        raise
     print("✅ עדכון מחירים לילי הסתיים")
 
 
@@ -493,14 +907,60 @@ def nightly_price_update():
 
 @app.route("/api/prices/update", methods=["POST"])
 def update_prices():
+    """
+    מתחיל עדכון מחירים לכל הקטלוג ברקע ומחזיר job_id מיד.
+    רק עדכון אחד רץ בכל פעם (בכל ה-workers) - אם כבר יש אחד, מוחזר ה-job_id שלו עם 409.
+    המעקב - GET /api/prices/update/<job_id>, ביטול - POST /api/prices/update/<job_id>/cancel.
+    """
     if not is_logged_in():
         return jsonify({"success": False}), 401
 
-    try:
-        update_all_prices()
-        return jsonify({"success": True})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+    # force - סורק מחדש גם מחירים שעדיין בתוקף במטמון
+    data = request.get_json(silent=True) or {}
+    force = bool(data.get("force"))
+
+    job_id, created = job_store.create_exclusive(
+        BULK_PRICE_JOB, 'ממתין לעדכון מחירים', payload={"force": force}, stale_after=PRICE_BULK_STALE
+    )
+    if not created:
+        return jsonify({"success": False, "job_id": job_id, "message": "עדכון מחירים כבר רץ"}), 409
+
+    threading.Thread(target=run_bulk_price_update, args=(job_id, force), daemon=True).start()
+    return jsonify({"success": True, "job_id": job_id}), 202
+
+
+@app.route("/api/prices/update/<job_id>", methods=["GET"])
+def get_bulk_price_update(job_id):
+    """
+    סטטוס העדכון ואירועי ההתקדמות שאחרי ?after=<seq> (long-poll עם ?wait=<שניות>, כמו /api/calculate/jobs).
+    בסיום - job.result: סיכום לכל חנות ומצב המפסקים.
+    """
+    if not is_logged_in():
+        return jsonify({"success": False}), 401
+
+    after = request.args.get('after', 0, type=int)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), CALCULATE_JOB_POLL_WAIT)
+
+    job = job_store.wait(job_id, after, wait)
+    if job is None or job['kind'] != BULK_PRICE_JOB:
+        return jsonify({'success': False, 'message': 'המשימה לא נמצאה'}), 404
+
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route("/api/prices/update/<job_id>/cancel", methods=["POST"])
+def cancel_bulk_price_update(job_id):
+    """עוצר את העדכון אחרי השלב הנוכחי; המחירים שכבר עודכנו נשארים"""
+    if not is_logged_in():
+        return jsonify({"success": False}), 401
+
+    job = job_store.get(job_id)
+    if job is None or job['kind'] != BULK_PRICE_JOB:
+        return jsonify({'success': False, 'message': 'המשימה לא נמצאה'}), 404
+    if not job_store.cancel(job_id):
+        return jsonify({'success': False, 'message': 'העדכון כבר הסתיים'}), 409
+
+    return jsonify({'success': True})
 
 # =========================
 # עזר
@@ -671,6 +1131,7 @@ def check_auth():
 def get_foods():
     if not is_logged_in():
         return jsonify({'success': False}), 401
+    sync_prices_from_cache()
     return jsonify({'success': True, 'data': foods_db})
 
 
@@ -709,6 +1170,7 @@ def add_food():
     }
 
     foods_db.append(new_food)
+    invalidate_menu_cache()
 
     # 🔍 התחלת חיפוש מחירים אסינכרוני למזון החדש
     task_id = start_price_update_task(new_id, new_food['name'])
@@ -717,7 +1179,9 @@ def add_food():
         'success': True,
         'message': 'המזון נשמר בהצלחה',
         'data': new_food,
-        'task_id': task_id
+        'task_id': task_id,
+        # התור מלא - המחיר יתעדכן בעדכון הבא
+        'price_update_rejected': task_id is None
     })
 
 
@@ -818,16 +1282,19 @@ def update_food(food_id):
 
     # 5️⃣ החזרה בדיוק לאותו מקום ברשימה
     foods_db.insert(old_index, new_food)
+    invalidate_menu_cache()
 
     # 6️⃣ התחלת עדכון מחירים אסינכרוני (כמו בהוספה)
-    task_id = start_price_update_task(new_id, new_food['name'])
+    task_id = start_price_update_task(new_id, new_food['name'], replaces=food_id)
 
     # 7️⃣ החזרת תשובה ל־Frontend
     return jsonify({
         'success': True,
         'message': 'המזון נשמר בהצלחה',
         'data': new_food,
-        'task_id': task_id
+        'task_id': task_id,
+        # התור מלא - המחיר יתעדכן בעדכון הבא
+        'price_update_rejected': task_id is None
     })
 
 @app.route('/export-shopping-list/excel', methods=['POST'])
@@ -873,6 +1340,7 @@ def delete_food(food_id):
 
     global foods_db
     foods_db = [food for food in foods_db if food['id'] != food_id]
+    invalidate_menu_cache()
     return jsonify({'success': True})
 
 
@@ -918,7 +1386,12 @@ def get_last_price_update():
 
     return jsonify({
         'success': True,
-        'last_update': last_prices_update.isoformat() if last_prices_update else None
+        'last_update': last_prices_update.isoformat() if last_prices_update else None,
+        'price_cache': price_cache.stats() if price_cache is not None else None,
+        'product_index': product_index.stats() if product_index is not None else None,
+        'stores': breakers.states(),
+        'refresh': price_refresh.last_run(),
+        'update_queue': price_update_executor.stats()
     })
 
 
@@ -940,6 +1413,108 @@ def get_price_update_task_status(task_id):
         'task': task
     })
 
+
+@app.route('/api/prices/tasks', methods=['GET'])
+def get_price_update_tasks_status():
+    """
+    סטטוס של כמה משימות בבקשה אחת: ?ids=<task_id>,<task_id> ו/או ?food_ids=<id>,<id>
+    (המשימה האחרונה של כל מזון)
+    """
+    if not is_logged_in():
+        return jsonify({'success': False}), 401
+
+    task_ids = [value for value in request.args.get('ids', '').split(',') if value]
+    food_ids = [value for value in request.args.get('food_ids', '').split(',') if value]
+    tasks, by_food = get_tasks_status(task_ids, food_ids)
+
+    return jsonify({
+        'success': True,
+        'tasks': tasks,
+        'by_food': by_food
+    })
+
+# חיבורי SSE פתוחים ב-worker הזה (ראו PRICE_TASK_STREAMS)
+price_task_streams = threading.BoundedSemaphore(PRICE_TASK_STREAMS)
+
+
+def sse(event, data):
+    """הודעת Server-Sent Events אחת"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_price_tasks(task_ids):
+    """
+    שולח event "task" בכל שינוי בסטטוס/הודעה של אחת המשימות (כולל המצב הנוכחי בהתחלה),
+    "missing" למשימה שלא קיימת, ו-"done" כשכולן הסתיימו. המשימות נקראות מ-job_store,
+    כך שהעדכון מגיע גם אם משימה רצה ב-worker אחר.
+    """
+    deadline = time.monotonic() + PRICE_TASK_STREAM_TIMEOUT
+    last_sent = {}
+    # אחרי כמה זמן הדפדפן מתחבר מחדש כשהחיבור נסגר (PRICE_TASK_STREAM_TIMEOUT)
+    yield f"retry: {PRICE_TASK_STREAM_RETRY}\n\n"
+    keepalive = time.monotonic()
+    remaining = set(task_ids)
+
+    while remaining and time.monotonic() < deadline:
+        jobs = job_store.get_many(remaining)
+        for task_id in sorted(remaining):
+            job = jobs.get(task_id)
+            if job is None or job['kind'] != PRICE_TASK:
+                remaining.discard(task_id)
+                yield sse('missing', {'id': task_id})
+                continue
+            state = (job['status'], job['message'])
+            if last_sent.get(task_id) != state:
+                last_sent[task_id] = state
+                keepalive = time.monotonic()
+                yield sse('task', price_task_view(job))
+            if job['status'] in FINISHED:
+                remaining.discard(task_id)
+
+        if time.monotonic() - keepalive > 15:
+            # הערה - שומרת את החיבור פתוח דרך proxies
+            keepalive = time.monotonic()
+            yield ": keepalive\n\n"
+        if remaining:
+            time.sleep(PRICE_TASK_STREAM_INTERVAL)
+
+    if not remaining:
+        yield sse('done', {})
+
+
+@app.route('/api/prices/tasks/events', methods=['GET'])
+def price_update_task_events():
+    """
+    SSE: עדכוני סטטוס של משימות עדכון מחירים (?ids=<task_id>,<task_id>) ברגע שהם קורים,
+    עם המחירים החדשים של המזון בסיום - במקום פולינג
+    """
+    if not is_logged_in():
+        return jsonify({'success': False}), 401
+
+    task_ids = [value for value in request.args.get('ids', '').split(',') if value]
+    if not task_ids:
+        return jsonify({'success': False, 'message': 'חסר ids'}), 400
+
+    # כל חיבור תופס thread של gunicorn - מעל PRICE_TASK_STREAMS הלקוח עובר לפולינג
+    if not price_task_streams.acquire(blocking=False):
+        return Response(
+            f"retry: {PRICE_TASK_STREAM_RETRY}\n\n", status=503, mimetype='text/event-stream',
+            headers={'Retry-After': str(max(1, PRICE_TASK_STREAM_RETRY // 1000))}
+        )
+
+    try:
+        response = Response(
+            stream_with_context(stream_price_tasks(task_ids)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    except Exception:
+        price_task_streams.release()
+        raise
+    # call_on_close נקרא גם אם הלקוח התנתק לפני שהזרם התחיל
+    response.call_on_close(price_task_streams.release)
+    return response
+
 @app.route('/export-menu', methods=['POST'])
 def export_menu():
     if not is_logged_in():
@@ -1258,105 +1833,138 @@ def export_shopping_list_pdf():
 
 
 
-@app.route('/calculate', methods=['POST'])
-def calculate_menu():
-    if not is_logged_in():
-        return jsonify({'success': False}), 401
-
-    try:
-        data = request.get_json()
-        selected_sources = data.get("price_sources", [])
-        if not selected_sources:
-            return jsonify({"success": False, "message": "לא נבחר מקור מחיר"}), 400
+def parse_user_params(data):
+    """user_params מגוף הבקשה של /calculate, עם ברירות המחדל של הדשבורד"""
+    return {
+        'num_days': int(data.get('num_days', 7)),
+        'min_protein': float(data.get('min_protein', 56)),
+        'max_protein': float(data.get('max_protein', 100)),
+        'min_calories': float(data.get('min_calories', 1500)),
+        'max_calories': float(data.get('max_calories', 2700)),
+        'min_carbs': float(data.get('min_carbs', 150)),
+        'max_carbs': float(data.get('max_carbs', 300)),
+        'min_fat': float(data.get('min_fat', 50)),
+        'max_fat': float(data.get('max_fat', 90))
+    }
 
 
+def compute_menu(user_params, selected_sources, progress=None):
+    """
+    מחשב תפריט (או מחזיר אותו מהמטמון) ומחזיר את גוף התשובה של /calculate.
+    progress מועבר ל-run_optimizer_for_all_price_sources.
+    """
+    sync_prices_from_cache()
 
-        
-        user_params = {
-            'num_days': int(data.get('num_days', 7)),
-            'min_protein': float(data.get('min_protein', 56)),
-            'max_protein': float(data.get('max_protein', 100)),
-            'min_calories': float(data.get('min_calories', 1500)),
-            'max_calories': float(data.get('max_calories', 2700)),
-            'min_carbs': float(data.get('min_carbs', 150)),
-            'max_carbs': float(data.get('max_carbs', 300)),
-            'min_fat': float(data.get('min_fat', 50)),
-            'max_fat': float(data.get('max_fat', 90))
-        }
+    # התוצאה דטרמיניסטית - אותו קטלוג, פרמטרים ומקורות מחיר מחזירים אותו תפריט
+    cached = None
+    if menu_cache is not None:
+        cache_key = menu_cache_key(foods_db, user_params, selected_sources, OPTIMIZER_MODE, solver_config())
+        cached = menu_cache.get(cache_key)
 
+    if cached:
+        result, chosen_source = cached["result"], cached["chosen_source"]
+    else:
         result, chosen_source = run_optimizer_for_all_price_sources(
             foods_db,
             user_params,
-            selected_sources
+            selected_sources,
+            progress=progress
         )
+        # תפריט שנעצר על מגבלת זמן לא נשמר - בפעם הבאה אולי יימצא טוב יותר
+        if menu_cache is not None and result and result.get("success") and result.get("optimal", True):
+            menu_cache.put(cache_key, {"result": result, "chosen_source": chosen_source})
+
+    if not result:
+        return {
+            "success": False,
+            "message": "לא נמצא פתרון לפי מקור מחיר זה"
+        }
 
-        if not result:
-            return jsonify({
-                "success": False,
-                "message": "לא נמצא פתרון לפי מקור מחיר זה"
-            })
+    if not result['success']:
+        return {
+            'success': False,
+            'message': result.get('message', 'שגיאה בחישוב התפריט')
+        }
 
+    # כמה תפריטים כוללים כל מזון - לסדר העדיפויות של הרענון הלילי
+    price_refresh.record_menu(
+        food_name
+        for day in result['days']
+        for meal_name in ['breakfast', 'lunch', 'dinner', 'snacks']
+        for food_name, qty in day[meal_name]
+    )
 
-        if result['success']:
-            # עיבוד התוצאות לפורמט שה-JavaScript מצפה לו
-            processed_days = []
-            total_protein = 0
-            total_calories = 0
-            total_carbs = 0
-            total_fat = 0
-
-            for day in result['days']:
-                day_data = {
-                    'breakfast': [],
-                    'lunch': [],
-                    'dinner': [],
-                    'snacks': [],
-                    'protein': day['nutrition']['protein'],
-                    'calories': day['nutrition']['calories'],
-                    'carbs': day['nutrition']['carbs'],
-                    'fat': day['nutrition']['fat']
-                }
-
-                for meal_name in ['breakfast', 'lunch', 'dinner', 'snacks']:
-                    for food_name, qty in day[meal_name]:
-                        day_data[meal_name].append({
-                            'name': food_name,
-                            'amount': round(qty, 1)
-                        })
-
-                processed_days.append(day_data)
-                total_protein += day['nutrition']['protein']
-                total_calories += day['nutrition']['calories']
-                total_carbs += day['nutrition']['carbs']
-                total_fat += day['nutrition']['fat']
-
-            avg_protein = total_protein / len(result['days'])
-            avg_calories = total_calories / len(result['days'])
-            avg_carbs = total_carbs / len(result['days'])
-            avg_fat = total_fat / len(result['days'])
-            
-            print("📦 RESULT DATA (raw optimizer result):")
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-
-            return jsonify({
-                'success': True,
-                'data': {
-                    'days': processed_days,
-                    'total_cost': result['total_cost'],
-                    'avg_cost_per_day': result['avg_cost_per_day'],
-                    'chosen_price_source': chosen_source,
-                    'avg_protein': avg_protein,
-                    'avg_calories': avg_calories,
-                    'avg_carbs': avg_carbs,
-                    'avg_fat': avg_fat
-                    
-                }
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': result.get('message', 'שגיאה בחישוב התפריט')
-            })
+    # עיבוד התוצאות לפורמט שה-JavaScript מצפה לו
+    processed_days = []
+    total_protein = 0
+    total_calories = 0
+    total_carbs = 0
+    total_fat = 0
+
+    for day in result['days']:
+        day_data = {
+            'breakfast': [],
+            'lunch': [],
+            'dinner': [],
+            'snacks': [],
+            'protein': day['nutrition']['protein'],
+            'calories': day['nutrition']['calories'],
+            'carbs': day['nutrition']['carbs'],
+            'fat': day['nutrition']['fat']
+        }
+
+        for meal_name in ['breakfast', 'lunch', 'dinner', 'snacks']:
+            for food_name, qty in day[meal_name]:
+                day_data[meal_name].append({
+                    'name': food_name,
+                    'amount': round(qty, 1)
+                })
+
+        processed_days.append(day_data)
+        total_protein += day['nutrition']['protein']
+        total_calories += day['nutrition']['calories']
+        total_carbs += day['nutrition']['carbs']
+        total_fat += day['nutrition']['fat']
+
+    avg_protein = total_protein / len(result['days'])
+    avg_calories = total_calories / len(result['days'])
+    avg_carbs = total_carbs / len(result['days'])
+    avg_fat = total_fat / len(result['days'])
+
+    print("📦 RESULT DATA (raw optimizer result):")
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    return {
+        'success': True,
+        'data': {
+            'days': processed_days,
+            'total_cost': result['total_cost'],
+            'avg_cost_per_day': result['avg_cost_per_day'],
+            'chosen_price_source': chosen_source,
+            'stores': result.get('stores', {}),
+            'optimal': result.get('optimal', True),
+            'cached': bool(cached),
+            'avg_protein': avg_protein,
+            'avg_calories': avg_calories,
+            'avg_carbs': avg_carbs,
+            'avg_fat': avg_fat
+
+        }
+    }
+
+
+@app.route('/calculate', methods=['POST'])
+def calculate_menu():
+    if not is_logged_in():
+        return jsonify({'success': False}), 401
+
+    try:
+        data = request.get_json()
+        selected_sources = data.get("price_sources", [])
+        if not selected_sources:
+            return jsonify({"success": False, "message": "לא נבחר מקור מחיר"}), 400
+
+        return jsonify(compute_menu(parse_user_params(data), selected_sources))
 
     except Exception as e:
         print(f"Error in calculate_menu: {str(e)}")
@@ -1368,6 +1976,84 @@ def calculate_menu():
         }), 500
 
 
+# ============================
+# ⏳ חישוב תפריט כמשימת רקע
+# ============================
+
+def run_calculate_job(job_id, user_params, selected_sources):
+    """מריץ את החישוב ב-calculate_executor ושומר התקדמות ותוצאה ב-job_store"""
+    try:
+        job_store.update(job_id, RUNNING, 'מחשב תפריט...')
+        body = compute_menu(
+            user_params,
+            selected_sources,
+            progress=lambda event: job_store.add_event(job_id, event)
+        )
+        job_store.update(job_id, COMPLETED if body['success'] else FAILED, body.get('message'), result=body)
+
+    except Exception as e:
+        print(f"Error in calculate job {job_id}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        job_store.update(job_id, FAILED, f'שגיאה בחישוב התפריט: {str(e)}')
+
+    finally:
+        calculate_slots.release()
+
+
+@app.route('/api/calculate/jobs', methods=['POST'])
+def submit_calculate_job():
+    """
+    מתחיל חישוב תפריט ברקע ומחזיר job_id מיד.
+    המעקב - GET /api/calculate/jobs/<job_id>.
+    """
+    if not is_logged_in():
+        return jsonify({'success': False}), 401
+
+    data = request.get_json()
+    selected_sources = data.get("price_sources", [])
+    if not selected_sources:
+        return jsonify({"success": False, "message": "לא נבחר מקור מחיר"}), 400
+
+    user_params = parse_user_params(data)
+
+    # תור חסום - כשהוא מלא, הלקוח מתבקש לנסות שוב במקום לחכות עוד
+    if not calculate_slots.acquire(blocking=False):
+        return jsonify({'success': False, 'message': 'השרת עמוס כרגע, נסי שוב בעוד רגע'}), 429
+
+    try:
+        # המשימה שייכת למשתמש שיצר אותה - רק הוא יכול לקרוא אותה
+        job_id = job_store.create('calculate', 'ממתין לחישוב', ref=session['user_id'])
+        calculate_executor.submit(run_calculate_job, job_id, user_params, selected_sources)
+    except Exception:
+        calculate_slots.release()
+        raise
+
+    return jsonify({'success': True, 'job_id': job_id}), 202
+
+
+@app.route('/api/calculate/jobs/<job_id>', methods=['GET'])
+def get_calculate_job(job_id):
+    """
+    סטטוס המשימה ואירועי ההתקדמות שאחרי ?after=<seq>.
+    עם ?wait=<שניות> (long-poll) התשובה מתעכבת עד לאירוע חדש, לסיום המשימה או לתום הזמן.
+    התוצאה (גוף התשובה של /calculate) נמצאת ב-job.result בסיום.
+    """
+    if not is_logged_in():
+        return jsonify({'success': False}), 401
+
+    after = request.args.get('after', 0, type=int)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), CALCULATE_JOB_POLL_WAIT)
+
+    # משימה של משתמש אחר נראית כמו משימה שלא קיימת
+    job = job_store.get(job_id, after)
+    if job is None or job['kind'] != 'calculate' or job['ref'] != str(session['user_id']):
+        return jsonify({'success': False, 'message': 'המשימה לא נמצאה'}), 404
+
+    job = job_store.wait(job_id, after, wait)
+    return jsonify({'success': True, 'job': job})
+
+
 if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
     scheduler = BackgroundScheduler()
 
@@ -0,0 +1,56 @@
+"""
+השוואת ה-backends של מצב sequential ב-MenuOptimizer.generate_menu
+Benchmark: PuLP + CBC subprocess vs NumPy matrices + in-process HiGHS
+
+הרצה מתיקיית הפרויקט:
+    python -m benchmarks.bench_backends
+
+כל backend מורץ פעם אחת לחימום (בניית התבנית ו-import), והזמן נמדד בהרצה השנייה.
+"""
+
+import contextlib
+import io
+import time
+
+from algorithm import MenuOptimizer
+from app import get_default_foods
+
+DAYS = [7, 14, 30]
+BACKENDS = ["cbc", "highs"]
+
+USER_PARAMS = {
+    'min_protein': 56,
+    'max_protein': 100,
+    'min_calories': 1500,
+    'max_calories': 2700,
+    'min_carbs': 150,
+    'max_carbs': 300,
+    'min_fat': 50,
+    'max_fat': 90
+}
+
+
+def run_once(num_days, backend):
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = MenuOptimizer(get_default_foods(), USER_PARAMS)
+        start = time.perf_counter()
+        result = optimizer.generate_menu(num_days, backend=backend)
+        elapsed = time.perf_counter() - start
+    return elapsed, result
+
+
+def main():
+    for backend in BACKENDS:
+        run_once(1, backend)
+
+    print(f"{'days':>5} | {'backend':<8} | {'time (s)':>9} | {'per day (ms)':>12} | {'total cost':>10}")
+    print("-" * 58)
+    for num_days in DAYS:
+        for backend in BACKENDS:
+            elapsed, result = run_once(num_days, backend)
+            cost = f"{result['total_cost']:.2f}" if result.get("success") else "failed"
+            print(f"{num_days:>5} | {backend:<8} | {elapsed:>9.2f} | {1000 * elapsed / num_days:>12.1f} | {cost:>10}")
+
+
+if __name__ == "__main__":
+    main()
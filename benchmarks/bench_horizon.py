@@ -0,0 +1,75 @@
+"""
+השוואת מצב sequential מול מצב horizon ב-MenuOptimizer.generate_menu
+Benchmark: sequential (one solve per day) vs horizon (one multi-day solve)
+
+הרצה מתיקיית הפרויקט:
+    python -m benchmarks.bench_horizon
+
+total_cost סופר בשני המצבים את כל הימים בתפריט, כולל ימים שהמצב הרציף העתיק ב-fallback.
+העלות מחושבת כאן מחדש מתוך הכמויות בתפריט שהוחזר כבדיקה - שורה שבה היא שונה מ-total_cost מסומנת.
+"""
+
+import time
+import contextlib
+import io
+
+from algorithm import MenuOptimizer
+from app import get_default_foods
+
+DAYS = [7, 14, 30]
+
+# ברירות המחדל של /calculate
+USER_PARAMS = {
+    'min_protein': 56,
+    'max_protein': 100,
+    'min_calories': 1500,
+    'max_calories': 2700,
+    'min_carbs': 150,
+    'max_carbs': 300,
+    'min_fat': 50,
+    'max_fat': 90
+}
+
+
+def plan_cost(optimizer, result):
+    """עלות התפריט בפועל - סכום כמות × מחיר לגרם לכל הימים"""
+    cost = 0
+    for day in result["days"]:
+        for meal in ["breakfast", "lunch", "dinner", "snacks"]:
+            for food, qty in day[meal]:
+                cost += optimizer.price[optimizer.food_index[food]] * qty
+    return cost
+
+
+def run_once(num_days, mode):
+    # ה-optimizer מדפיס הרבה - משתיקים כדי שהטבלה תהיה קריאה
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = MenuOptimizer(get_default_foods(), USER_PARAMS)
+        start = time.perf_counter()
+        result = optimizer.generate_menu(num_days, mode=mode)
+        elapsed = time.perf_counter() - start
+
+    if not result.get("success"):
+        return elapsed, None, None, None
+
+    distinct_days = len({repr(day) for day in result["days"]})
+    return elapsed, result["total_cost"], plan_cost(optimizer, result), distinct_days
+
+
+def main():
+    print(f"{'days':>5} | {'mode':<10} | {'time (s)':>9} | {'reported':>9} | {'plan cost':>9} | {'distinct days':>13}")
+    print("-" * 72)
+
+    for num_days in DAYS:
+        for mode in ["sequential", "horizon"]:
+            elapsed, reported, actual, distinct = run_once(num_days, mode)
+            if reported is None:
+                print(f"{num_days:>5} | {mode:<10} | {elapsed:>9.2f} | {'failed':>9} |")
+                continue
+            # total_cost מעוגל לאגורות
+            mismatch = "  ⚠️ total_cost != plan cost" if abs(reported - actual) > 0.01 else ""
+            print(f"{num_days:>5} | {mode:<10} | {elapsed:>9.2f} | {reported:>9.2f} | {actual:>9.2f} | {distinct:>13}{mismatch}")
+
+
+if __name__ == "__main__":
+    main()
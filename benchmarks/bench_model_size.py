@@ -0,0 +1,87 @@
+"""
+גודל מודל היום הבודד - לפני ואחרי המהדר הדליל
+Model size of a single day: dense build vs sparse compiler
+
+הרצה מתיקיית הפרויקט:
+    python -m benchmarks.bench_model_size
+
+"לפני" נבנה עם optimizer/model.py (הבנייה הצפופה המקורית) ועוד משתני y
+וקישורים לכל זוג (מזון, ארוחה) - בדיוק כמו ש-generate_menu עשה לכל יום.
+"אחרי" הוא ModelTemplate, שמשמש היום את generate_menu.
+"""
+
+import builtins
+import contextlib
+import io
+import time
+
+import pulp
+
+from algorithm import MenuOptimizer
+from app import get_default_foods
+from optimizer import model as dense_model
+from optimizer.template import ModelTemplate
+
+USER_PARAMS = {
+    'min_protein': 56,
+    'max_protein': 100,
+    'min_calories': 1500,
+    'max_calories': 2700,
+    'min_carbs': 150,
+    'max_carbs': 300,
+    'min_fat': 50,
+    'max_fat': 90
+}
+
+
+def model_size(model):
+    variables = model.variables()
+    binaries = sum(1 for var in variables if var.cat == pulp.LpInteger)
+    nonzeros = sum(len(constraint) for constraint in model.constraints.values())
+    return len(variables), binaries, len(model.constraints), nonzeros
+
+
+def build_dense(optimizer):
+    # optimizer/model.py קורא את הנתונים מ-builtins
+    for name in [
+        "foods", "meals", "protein", "calories", "carbs", "fat", "price",
+        "carb_foods", "protein_foods", "vegetables", "fruits", "allowed_foods",
+        "min_protein", "max_protein", "min_calories", "max_calories", "min_fat", "max_fat",
+        "max_carbs", "max_qty", "min_carb_qty", "min_protein_qty", "min_fruit_qty", "min_veg_qty",
+        "min_calories_meal_pct", "max_calories_meal_pct",
+    ]:
+        setattr(builtins, name, getattr(optimizer, name))
+
+    model, x = dense_model.build_model()
+
+    y = {}
+    for i in range(len(optimizer.foods)):
+        for j in range(len(optimizer.meals)):
+            y[(i, j)] = pulp.LpVariable(f"y_{i}_{j}", cat="Binary")
+            model += x[(i, j)] <= optimizer.max_qty * y[(i, j)]
+            model += x[(i, j)] >= 0.001 * y[(i, j)]
+    return model
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = MenuOptimizer(get_default_foods(), USER_PARAMS)
+
+    start = time.perf_counter()
+    dense = build_dense(optimizer)
+    dense_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sparse = ModelTemplate(optimizer).model
+    sparse_time = time.perf_counter() - start
+
+    print(f"catalog: {len(optimizer.foods)} foods × {len(optimizer.meals)} meals")
+    print(f"{'model':<8} | {'variables':>9} | {'binaries':>8} | {'constraints':>11} | {'nonzeros':>8} | {'build (s)':>9}")
+    print("-" * 70)
+    for name, model, elapsed in [("before", dense, dense_time), ("after", sparse, sparse_time)]:
+        variables, binaries, constraints, nonzeros = model_size(model)
+        print(f"{name:<8} | {variables:>9} | {binaries:>8} | {constraints:>11} | {nonzeros:>8} | {elapsed:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
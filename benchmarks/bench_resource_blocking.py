@@ -0,0 +1,87 @@
+"""
+זמן טעינת דף וזיכרון שיא של Chrome - עם חסימת משאבים ובלי
+Benchmark: page-load time and peak RSS with resource blocking on and off
+
+הרצה מתיקיית הפרויקט (דורש Chrome ורשת):
+    python -m benchmarks.bench_resource_blocking
+
+לכל חנות ולכל מצב נפתח דפדפן חדש (בלי המאגר) שטוען את אותם חיפושים.
+זמן הטעינה - מ-driver.get ועד שמופיעה רשימת התוצאות (או "אין תוצאות").
+זיכרון השיא - RSS של chromedriver וכל תהליכי Chrome, נדגם כל 50ms ברקע.
+"""
+
+import statistics
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from pricing.driver_pool import process_tree_rss_mb
+from pricing.scrapers import BLOCKED_URLS, STORE_PAGES, _results_or_empty
+from scrapers_config import get_chrome_driver, set_resource_blocking
+
+PRODUCTS = ["ביצים", "חלב", "אורז", "חזה עוף", "עגבניה"]
+TIMEOUT = 30
+
+
+class PeakRss:
+    """דוגם ברקע את ה-RSS של עץ התהליכים של הדפדפן ושומר את המקסימום"""
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, process_tree_rss_mb(self.pid))
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_store(store, blocking):
+    page = STORE_PAGES[store]
+    driver = get_chrome_driver()
+    try:
+        set_resource_blocking(driver, BLOCKED_URLS if blocking else [])
+        times = []
+        timeouts = 0
+        with PeakRss(driver.service.process.pid) as rss:
+            for product in PRODUCTS:
+                started = time.perf_counter()
+                driver.get(page["url"](product))
+                try:
+                    WebDriverWait(driver, TIMEOUT, poll_frequency=0.1).until(
+                        _results_or_empty(page["results"], page["empty"])
+                    )
+                except TimeoutException:
+                    timeouts += 1
+                times.append(time.perf_counter() - started)
+        return times, rss.peak, timeouts
+    finally:
+        driver.quit()
+
+
+def main():
+    print(f"{'store':<10} | {'blocking':<8} | {'mean (s)':>8} | {'median (s)':>10} | {'max (s)':>7} | "
+          f"{'peak RSS (MB)':>13} | {'timeouts':>8}")
+    print("-" * 82)
+    for store in STORE_PAGES:
+        for blocking in [False, True]:
+            times, peak, timeouts = run_store(store, blocking)
+            print(f"{store:<10} | {str(blocking):<8} | {statistics.mean(times):>8.2f} | "
+                  f"{statistics.median(times):>10.2f} | {max(times):>7.2f} | {peak:>13.0f} | {timeouts:>8}")
+
+
+if __name__ == "__main__":
+    main()
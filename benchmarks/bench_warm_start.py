@@ -0,0 +1,60 @@
+"""
+זמני פתרון לכל יום במצב sequential - עם warm start ובלי
+Benchmark: per-day solve time with and without the repaired MIP start
+
+הרצה מתיקיית הפרויקט:
+    python -m benchmarks.bench_warm_start
+
+הזמנים נלקחים מ-result["solver"]["solve_times"] (זמן הקריאה לפותר בלבד, כל יום).
+"""
+
+import contextlib
+import io
+import statistics
+
+from algorithm import MenuOptimizer
+from app import get_default_foods
+
+DAYS = [7, 14, 30]
+REPEATS = 3
+
+USER_PARAMS = {
+    'min_protein': 56,
+    'max_protein': 100,
+    'min_calories': 1500,
+    'max_calories': 2700,
+    'min_carbs': 150,
+    'max_carbs': 300,
+    'min_fat': 50,
+    'max_fat': 90
+}
+
+
+def run_once(num_days, warm_start):
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer = MenuOptimizer(get_default_foods(), USER_PARAMS, {"warm_start": warm_start})
+        return optimizer.generate_menu(num_days)
+
+
+def main():
+    # חימום - בניית התבנית המשותפת
+    run_once(1, False)
+
+    print(f"{'days':>5} | {'warm start':<10} | {'solves':>6} | {'mean (ms)':>9} | {'median (ms)':>11} | "
+          f"{'max (ms)':>8} | {'total (s)':>9} | {'total cost':>10}")
+    print("-" * 90)
+    for num_days in DAYS:
+        for warm_start in [False, True]:
+            times = []
+            for _ in range(REPEATS):
+                result = run_once(num_days, warm_start)
+                times.extend(result["solver"]["solve_times"])
+
+            ms = [1000 * t for t in times]
+            print(f"{num_days:>5} | {str(warm_start):<10} | {len(times) // REPEATS:>6} | "
+                  f"{statistics.mean(ms):>9.1f} | {statistics.median(ms):>11.1f} | {max(ms):>8.1f} | "
+                  f"{sum(times) / REPEATS:>9.3f} | {result['total_cost']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
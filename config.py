@@ -48,6 +48,156 @@ CHROME_OPTIONS = [
     '--disable-extensions',
 ]
 
+# כמה חנויות נסרקות במקביל בעדכון מחירים (כל חנות בדפדפן משלה, 1 = ברצף)
+SCRAPER_STORE_WORKERS = int(os.getenv('SCRAPER_STORE_WORKERS', 3))
+# לכמה דפדפנים מתחלקת רשימת המוצרים של כל חנות
+SCRAPER_SHARDS = int(os.getenv('SCRAPER_SHARDS', 2))
+# מקסימום דפדפנים פתוחים בו-זמנית מול אותו אתר
+SCRAPER_DOMAIN_CONCURRENCY = int(os.getenv('SCRAPER_DOMAIN_CONCURRENCY', 2))
+# מאגר הדפדפנים: מקסימום פתוחים, מחזור אחרי N דפים או מעל X MB, סגירה אחרי N שניות בלי שימוש
+SCRAPER_POOL_SIZE = int(os.getenv('SCRAPER_POOL_SIZE', 6))
+SCRAPER_POOL_MAX_PAGES = int(os.getenv('SCRAPER_POOL_MAX_PAGES', 50))
+SCRAPER_POOL_MAX_RSS_MB = int(os.getenv('SCRAPER_POOL_MAX_RSS_MB', 800))
+SCRAPER_POOL_IDLE = int(os.getenv('SCRAPER_POOL_IDLE', 300))
+# timeout לטעינת דף: percentile של זמני הטעינה האחרונים של החנות × factor, בין min ל-max שניות
+SCRAPER_WAIT_MIN = float(os.getenv('SCRAPER_WAIT_MIN', 3))
+SCRAPER_WAIT_MAX = float(os.getenv('SCRAPER_WAIT_MAX', 30))
+SCRAPER_WAIT_PERCENTILE = float(os.getenv('SCRAPER_WAIT_PERCENTILE', 95))
+SCRAPER_WAIT_FACTOR = float(os.getenv('SCRAPER_WAIT_FACTOR', 2.0))
+# מסלול מהיר: קודם HTTP רגיל (בלי דפדפן) - HTML סטטי או API חיפוש, דפדפן רק אם לא נמצא מחיר
+SCRAPER_HTTP_FIRST = os.getenv('SCRAPER_HTTP_FIRST', 'true').lower() == 'true'
+SCRAPER_HTTP_POOL_SIZE = int(os.getenv('SCRAPER_HTTP_POOL_SIZE', 10))
+SCRAPER_HTTP_TIMEOUT = float(os.getenv('SCRAPER_HTTP_TIMEOUT', 10))
+# הסניף שלפיו API החיפוש של רמי לוי מחזיר מחירים (331 - אתר האונליין)
+SCRAPER_RAMI_LEVY_STORE_ID = os.getenv('SCRAPER_RAMI_LEVY_STORE_ID', '331')
+# חסימת תמונות, מדיה, פונטים ודומיינים של אנליטיקס/פרסומות בדפדפני הסריקה
+SCRAPER_BLOCK_RESOURCES = os.getenv('SCRAPER_BLOCK_RESOURCES', 'true').lower() == 'true'
+# לכל חנות בנפרד: SCRAPER_BLOCK_RESOURCES_<STORE>=false מכבה את החסימה בחנות אחת
+# (למשל אם האתר שלה מפסיק להציג מחירים בלי תמונות/פונטים)
+SCRAPER_STORE_BLOCK_RESOURCES = {
+    store: os.getenv(f'SCRAPER_BLOCK_RESOURCES_{store.upper()}', 'true').lower() == 'true'
+    for store in ['shufersal', 'victory', 'rami_levy']
+}
+SCRAPER_BLOCKED_DOMAINS = [
+    domain.strip() for domain in os.getenv(
+        'SCRAPER_BLOCKED_DOMAINS',
+        'google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,'
+        'hotjar.com,clarity.ms,googlesyndication.com,tiktok.com'
+    ).split(',') if domain.strip()
+]
+
+# מטמון מחירים לפי (חנות, מוצר) - קובץ SQLite משותף לכל ה-workers
+PRICE_CACHE_ENABLED = os.getenv('PRICE_CACHE_ENABLED', 'true').lower() == 'true'
+PRICE_CACHE_PATH = os.getenv('PRICE_CACHE_PATH', 'price_cache.db')
+# תוקף מחיר בשניות, ולכל חנות אפשר לדרוס: PRICE_CACHE_TTL_SHUFERSAL / _VICTORY / _RAMI_LEVY
+PRICE_CACHE_TTL = int(os.getenv('PRICE_CACHE_TTL', 12 * 3600))
+PRICE_CACHE_STORE_TTL = {
+    store: int(os.getenv(f'PRICE_CACHE_TTL_{store.upper()}'))
+    for store in ['shufersal', 'victory', 'rami_levy']
+    if os.getenv(f'PRICE_CACHE_TTL_{store.upper()}')
+}
+
+# קוד/כתובת המוצר שנבחר בחיפוש לכל (חנות, מזון) - הסריקה הבאה טוענת את דף המוצר ישירות
+PRODUCT_INDEX_ENABLED = os.getenv('PRODUCT_INDEX_ENABLED', 'true').lower() == 'true'
+PRODUCT_INDEX_PATH = os.getenv('PRODUCT_INDEX_PATH', PRICE_CACHE_PATH)
+
+# מפסק לכל חנות: נפתח אחרי THRESHOLD כשלונות רצופים, בדיקה חוזרת אחרי BACKOFF שניות (כפול בכל כשלון, עד MAX)
+SCRAPER_BREAKER_PATH = os.getenv('SCRAPER_BREAKER_PATH', PRICE_CACHE_PATH)
+SCRAPER_BREAKER_THRESHOLD = int(os.getenv('SCRAPER_BREAKER_THRESHOLD', 5))
+SCRAPER_BREAKER_BACKOFF = float(os.getenv('SCRAPER_BREAKER_BACKOFF', 60))
+SCRAPER_BREAKER_MAX_BACKOFF = float(os.getenv('SCRAPER_BREAKER_MAX_BACKOFF', 3600))
+# תהליך סריקה נפרד (python -m pricing.worker): ה-web רק מכניס משימות לתור ומחכה לתוצאה.
+# false - הסריקה רצה בתוך ה-worker של gunicorn (כמו קודם; זה מה שהפריסות מריצות - ראו README)
+SCRAPER_WORKER_ENABLED = os.getenv('SCRAPER_WORKER_ENABLED', 'false').lower() == 'true'
+# התור - קובץ SQLite משותף ל-web ולתהליך הסריקה (ברירת מחדל: קובץ המשימות)
+SCRAPER_QUEUE_PATH = os.getenv('SCRAPER_QUEUE_PATH', os.getenv('JOB_STORE_PATH', 'jobs.db'))
+# כל כמה שניות תהליך הסריקה בודק אם יש משימה חדשה
+SCRAPER_WORKER_POLL = float(os.getenv('SCRAPER_WORKER_POLL', 1))
+# כמה זמן ה-web מחכה לתוצאה של משימת סריקה
+SCRAPER_WORKER_TIMEOUT = float(os.getenv('SCRAPER_WORKER_TIMEOUT', 3600))
+# תהליך הסריקה מעדכן את המשימה שרצה כל כך הרבה שניות (heartbeat)
+SCRAPER_WORKER_HEARTBEAT = float(os.getenv('SCRAPER_WORKER_HEARTBEAT', 30))
+# משימה ב-running שלא התעדכנה כל כך הרבה שניות (תהליך הסריקה נפל) חוזרת לתור
+SCRAPER_WORKER_STALE = float(os.getenv('SCRAPER_WORKER_STALE', 300))
+# עדכון מחירים אחרי הוספה/עריכה של מזון: threads קבועים, מזונות שממתינים בתור לפני שנדחים,
+# כמה מזונות נסרקים יחד וכמה שניות מחכים שיצטברו
+PRICE_UPDATE_WORKERS = int(os.getenv('PRICE_UPDATE_WORKERS', 1))
+PRICE_UPDATE_QUEUE = int(os.getenv('PRICE_UPDATE_QUEUE', 20))
+PRICE_UPDATE_BATCH = int(os.getenv('PRICE_UPDATE_BATCH', 10))
+PRICE_UPDATE_BATCH_WAIT = float(os.getenv('PRICE_UPDATE_BATCH_WAIT', 2))
+# עדכון כל המחירים (/api/prices/update) כמשימת רקע: כמה מזונות בכל שלב (התקדמות וביטול בין שלבים),
+# ואחרי כמה שניות בלי התקדמות משימה פעילה נחשבת תקועה ולא חוסמת משימה חדשה
+PRICE_BULK_BATCH = int(os.getenv('PRICE_BULK_BATCH', 12))
+PRICE_BULK_STALE = float(os.getenv('PRICE_BULK_STALE', 900))
+
+# רענון לילי הדרגתי: זמן מקסימלי ללילה (שניות), גודל קבוצה בין שמירות התקדמות,
+# משקלי השימוש בתפריטים (PRICE_REFRESH_MENU_DAYS ימים אחרונים) והתנודתיות בציון העדיפות
+PRICE_REFRESH_PATH = os.getenv('PRICE_REFRESH_PATH', PRICE_CACHE_PATH)
+PRICE_REFRESH_BUDGET = float(os.getenv('PRICE_REFRESH_BUDGET', 2 * 3600))
+PRICE_REFRESH_BATCH = int(os.getenv('PRICE_REFRESH_BATCH', 10))
+PRICE_REFRESH_MENU_WEIGHT = float(os.getenv('PRICE_REFRESH_MENU_WEIGHT', 1.0))
+PRICE_REFRESH_VOLATILITY_WEIGHT = float(os.getenv('PRICE_REFRESH_VOLATILITY_WEIGHT', 1.0))
+PRICE_REFRESH_MENU_DAYS = int(os.getenv('PRICE_REFRESH_MENU_DAYS', 30))
+
+# ===========================
+# הגדרות אופטימיזציה
+# ===========================
+
+# sequential - פתרון נפרד לכל יום, horizon - מודל אחד לכל הימים
+OPTIMIZER_MODE = os.getenv('OPTIMIZER_MODE', 'sequential')
+
+# פתרון החנויות במקביל ב-/calculate: thread / process, ומספר ה-workers (1 = ברצף)
+OPTIMIZER_POOL = os.getenv('OPTIMIZER_POOL', 'thread')
+OPTIMIZER_WORKERS = int(os.getenv('OPTIMIZER_WORKERS', 3))
+
+# דילוג על חנויות שחסם ה-LP שלהן יקר מהתפריט הזול ביותר שכבר נמצא
+OPTIMIZER_LP_PRUNING = os.getenv('OPTIMIZER_LP_PRUNING', 'true').lower() == 'true'
+
+# הפותר: cbc (PuLP + CBC) / highs (SciPy, בתוך התהליך)
+OPTIMIZER_BACKEND = os.getenv('OPTIMIZER_BACKEND', 'cbc')
+
+# מגבלות הפותר - כשמגבלה נגמרת מוחזר הפתרון הטוב ביותר שנמצא ("optimal": false)
+# זמן מקסימלי (שניות) לכל פתרון MILP
+SOLVER_TIME_LIMIT = float(os.getenv('SOLVER_TIME_LIMIT', 20))
+# פער יחסי מותר מהאופטימום (0 = אופטימום מדויק)
+SOLVER_MIP_GAP = float(os.getenv('SOLVER_MIP_GAP', 0))
+# הפער במצב horizon: המודל הרב-יומי חלש ברלקסציה, ואופטימום מדויק כמעט אף פעם לא מוכח
+# בתוך SOLVER_TIME_LIMIT - והתוצאה מסומנת "optimal": false ולא נשמרת במטמון
+# (בקטלוג ברירת המחדל HiGHS מוכיח 2% בכ-10 שניות; CBC נעצר לרוב על מגבלת הזמן סביב 5%)
+HORIZON_MIP_GAP = float(os.getenv('HORIZON_MIP_GAP', 0.02))
+# threads לכל פתרון CBC (חנויות כבר נפתרות במקביל)
+SOLVER_THREADS = int(os.getenv('SOLVER_THREADS', 1))
+# זמן מקסימלי (שניות) לכל /calculate - מתחת ל-timeout של gunicorn (120)
+OPTIMIZER_DEADLINE = float(os.getenv('OPTIMIZER_DEADLINE', 90))
+# כל יום מתחיל מהפתרון המתוקן של היום הקודם (MIP start)
+OPTIMIZER_WARM_START = os.getenv('OPTIMIZER_WARM_START', 'true').lower() == 'true'
+
+# מטמון תוצאות /calculate - קובץ SQLite משותף לכל ה-workers
+MENU_CACHE_ENABLED = os.getenv('MENU_CACHE_ENABLED', 'true').lower() == 'true'
+MENU_CACHE_PATH = os.getenv('MENU_CACHE_PATH', 'menu_cache.db')
+MENU_CACHE_MAX_ENTRIES = int(os.getenv('MENU_CACHE_MAX_ENTRIES', 256))
+# תוקף תוצאה בשניות (ברירת מחדל: יממה - המחירים מתעדכנים כל לילה)
+MENU_CACHE_TTL = int(os.getenv('MENU_CACHE_TTL', 24 * 3600))
+
+# משימות רקע (/api/calculate/jobs) - קובץ SQLite משותף לכל ה-workers
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', 'jobs.db')
+# משימה שהסתיימה נמחקת אחרי JOB_TTL שניות
+JOB_TTL = int(os.getenv('JOB_TTL', 3600))
+# חישובים במקביל בכל worker, וכמה עוד יכולים לחכות בתור לפני שנדחים
+CALCULATE_JOB_WORKERS = int(os.getenv('CALCULATE_JOB_WORKERS', 2))
+CALCULATE_JOB_QUEUE = int(os.getenv('CALCULATE_JOB_QUEUE', 8))
+# זמן מקסימלי (שניות) ש-long-poll מחכה לאירוע חדש
+CALCULATE_JOB_POLL_WAIT = float(os.getenv('CALCULATE_JOB_POLL_WAIT', 10))
+# SSE של משימות עדכון מחירים: כל כמה שניות נבדק שינוי, ואחרי כמה שניות החיבור נסגר
+# (הדפדפן מתחבר מחדש אוטומטית אחרי PRICE_TASK_STREAM_RETRY מילישניות).
+# כל חיבור פתוח תופס thread אחד מתוך --threads של ה-worker (ב-Procfile: 2 workers × 4 threads),
+# לכן מעל PRICE_TASK_STREAMS חיבורים בכל worker התשובה היא 503 והדפדפן עובר לפולינג -
+# כך נשארים threads ל-/calculate ולשאר הבקשות
+PRICE_TASK_STREAM_INTERVAL = float(os.getenv('PRICE_TASK_STREAM_INTERVAL', 0.5))
+PRICE_TASK_STREAM_TIMEOUT = float(os.getenv('PRICE_TASK_STREAM_TIMEOUT', 60))
+PRICE_TASK_STREAM_RETRY = int(os.getenv('PRICE_TASK_STREAM_RETRY', 3000))
+PRICE_TASK_STREAMS = int(os.getenv('PRICE_TASK_STREAMS', 2))
+
 # ===========================
 # הגדרות App
 # ===========================
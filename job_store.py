@@ -0,0 +1,326 @@
+import json
+import sqlite3
+import time
+import uuid
+
+# סטטוסים של משימה
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+ACTIVE = (PENDING, RUNNING)
+
+
+class JobStore:
+    """
+    משימות רקע והתקדמות שלהן בקובץ SQLite (WAL) - משותף לכל ה-workers של gunicorn,
+    כך שבקשת מעקב יכולה להגיע ל-worker אחר מזה שמריץ את המשימה.
+
+    לכל משימה יש סטטוס, תוצאה (JSON) ורשימת אירועי התקדמות ממוספרים (seq),
+    כדי שלקוח יקבל רק את האירועים שעוד לא ראה.
+    """
+
+    def __init__(self, path, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    message TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    payload TEXT,
+                    ref TEXT
+                )
+            """)
+            # קבצים שנוצרו לפני עמודות payload/ref
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+            for column in ("payload", "ref"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_ref ON jobs (kind, ref, created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def create(self, kind, message=None, payload=None, ref=None):
+        """
+        יוצר משימה חדשה בסטטוס pending ומחזיר את ה-id שלה.
+        payload (JSON) - הקלט של משימה שתרוץ בתהליך אחר (ראו claim)
+        ref - מזהה של מה שהמשימה עוסקת בו (למשל - id של מזון), לחיפוש ב-find_by_ref
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, message, created_at, updated_at, payload, ref) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, PENDING, message, now, now,
+                 None if payload is None else json.dumps(payload, ensure_ascii=False),
+                 None if ref is None else str(ref))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self.evict()
+        return job_id
+
+    def create_exclusive(self, kind, message=None, payload=None, stale_after=None):
+        """
+        כמו create, אבל רק אם אין משימה פעילה (pending/running) מסוג kind - בכל ה-workers.
+        משימה פעילה שלא התעדכנה stale_after שניות (ה-worker שלה נפל) לא נחשבת.
+
+        Returns:
+            (job_id, True) למשימה חדשה, או (id המשימה הפעילה, False)
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE - הבדיקה וההוספה בתוך נעילת כתיבה אחת
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND status IN (?, ?) AND updated_at >= ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (kind, *ACTIVE, now - stale_after if stale_after else 0)
+            ).fetchone()
+            if row is not None:
+                conn.rollback()
+                return row["id"], False
+            if stale_after:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE kind = ? AND status IN (?, ?)",
+                    (FAILED, "המשימה נקטעה", now, kind, *ACTIVE)
+                )
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, message, created_at, updated_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, PENDING, message, now, now,
+                 None if payload is None else json.dumps(payload, ensure_ascii=False))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return job_id, True
+
+    def retarget(self, job_id, payload, ref=None):
+        """
+        מחליף את ה-payload וה-ref של משימה שעוד ממתינה (למשל - המזון קיבל id חדש בעריכה).
+        מחזיר False אם המשימה כבר התחילה או הסתיימה.
+        """
+        conn = self._connect()
+        try:
+            count = conn.execute(
+                "UPDATE jobs SET payload = ?, ref = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (json.dumps(payload, ensure_ascii=False), None if ref is None else str(ref),
+                 time.time(), job_id, PENDING)
+            ).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return count > 0
+
+    def cancel(self, job_id):
+        """
+        מסמן משימה פעילה כמבוטלת. המשימה עצמה בודקת את הסטטוס בין שלבים ועוצרת.
+        מחזיר False אם המשימה לא קיימת או כבר הסתיימה.
+        """
+        conn = self._connect()
+        try:
+            count = conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, "בוטל", time.time(), job_id, *ACTIVE)
+            ).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return count > 0
+
+    def update(self, job_id, status, message=None, result=None):
+        """
+        מעדכן משימה פעילה (pending/running). משימה שכבר הסתיימה - בוטלה, או סומנה כתקועה
+        ב-create_exclusive - לא נדרסת. מחזיר האם המשימה עודכנה.
+        """
+        conn = self._connect()
+        try:
+            count = conn.execute(
+                "UPDATE jobs SET status = ?, message = COALESCE(?, message), result = COALESCE(?, result), "
+                "updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (status, message, None if result is None else json.dumps(result, ensure_ascii=False),
+                 time.time(), job_id, *ACTIVE)
+            ).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return count > 0
+
+    def is_active(self, job_id):
+        """האם המשימה עדיין pending/running - משימה ארוכה בודקת בין שלבים אם בוטלה או נלקחה ממנה"""
+        job = self.get(job_id)
+        return job is not None and job["status"] in ACTIVE
+
+    def claim(self, kind):
+        """
+        תור משימות בין תהליכים: לוקח את המשימה הוותיקה ביותר מסוג kind שממתינה,
+        מעביר אותה ל-running ומחזיר {"id", "payload"}, או None אם אין.
+        BEGIN IMMEDIATE - שני תהליכים לא יקחו את אותה משימה.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE kind = ? AND status = ? ORDER BY created_at LIMIT 1",
+                (kind, PENDING)
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (RUNNING, time.time(), row["id"])
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return {"id": row["id"], "payload": json.loads(row["payload"]) if row["payload"] else None}
+
+    def requeue_stale(self, kind, older_than):
+        """
+        משימות running מסוג kind שלא התעדכנו older_than שניות (התהליך שלקח אותן נפל)
+        חוזרות ל-pending. מחזיר כמה הוחזרו.
+        """
+        conn = self._connect()
+        try:
+            count = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE kind = ? AND status = ? AND updated_at < ?",
+                (PENDING, time.time(), kind, RUNNING, time.time() - older_than)
+            ).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return count
+
+    def add_event(self, job_id, event):
+        """מוסיף אירוע התקדמות (dict) ומחזיר את מספרו"""
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE - ה-seq נקבע בתוך נעילת כתיבה
+            conn.execute("BEGIN IMMEDIATE")
+            seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO job_events (job_id, seq, event) VALUES (?, ?, ?)",
+                (job_id, seq, json.dumps(event, ensure_ascii=False))
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+        return seq
+
+    @staticmethod
+    def _job(row, events=()):
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "message": row["message"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "payload": json.loads(row["payload"]) if row["payload"] else None,
+            "ref": row["ref"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "events": [dict(json.loads(e["event"]), seq=e["seq"]) for e in events],
+        }
+
+    def get(self, job_id, after=0):
+        """
+        המשימה ואירועי ההתקדמות שמספרם גדול מ-after, או None אם לא קיימת
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            events = conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after)
+            ).fetchall()
+        finally:
+            conn.close()
+        return self._job(row, events)
+
+    def _select(self, query, values, params=()):
+        """מריץ query עם {values} ברשימת ערכים (בקבוצות של 500 - מגבלת הפרמטרים של SQLite)"""
+        values = list(values)
+        rows = []
+        conn = self._connect()
+        try:
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                rows.extend(conn.execute(query.format(values=",".join("?" * len(chunk))), (*params, *chunk)))
+        finally:
+            conn.close()
+        return rows
+
+    def get_many(self, job_ids):
+        """{job_id: משימה} בלי אירועי התקדמות; משימות שלא קיימות (או נמחקו) לא מופיעות"""
+        rows = self._select("SELECT * FROM jobs WHERE id IN ({values})", set(job_ids))
+        return {row["id"]: self._job(row) for row in rows}
+
+    def find_by_ref(self, kind, refs):
+        """{ref: המשימה האחרונה מסוג kind עבורו} - למשל המשימה האחרונה של כל מזון"""
+        rows = self._select(
+            "SELECT * FROM jobs WHERE kind = ? AND ref IN ({values}) ORDER BY created_at",
+            {str(ref) for ref in refs}, (kind,)
+        )
+        # לפי סדר היצירה - האחרונה דורסת
+        return {row["ref"]: self._job(row) for row in rows}
+
+    def wait(self, job_id, after=0, timeout=0, interval=0.25):
+        """
+        long-poll: מחכה עד timeout שניות לאירוע חדש או לסיום המשימה
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id, after)
+            if job is None or job["events"] or job["status"] in FINISHED or time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def evict(self):
+        """מוחק משימות שהסתיימו לפני יותר מ-ttl שניות"""
+        cutoff = time.time() - self.ttl
+        conn = self._connect()
+        try:
+            old = [row[0] for row in conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND updated_at < ?",
+                (*FINISHED, cutoff)
+            )]
+            conn.executemany("DELETE FROM job_events WHERE job_id = ?", [(job_id,) for job_id in old])
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in old])
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# שדות המזון שמשפיעים על התפריט (id לא משפיע)
+CATALOG_FIELDS = ["name", "protein", "calories", "carbs", "fat", "category", "allowed_meals", "prices"]
+
+# הגדרות פותר שלא משנות את התפריט האופטימלי - לא נכנסות למפתח
+SOLVER_FIELDS_IGNORED = {"time_limit", "deadline", "threads"}
+
+
+def menu_cache_key(foods_db, user_params, price_sources, mode, solver):
+    """
+    מפתח קנוני לתוצאת /calculate: hash של הקטלוג (ערכים תזונתיים, מחירים, ארוחות מותרות),
+    user_params המנורמלים, רשימת מקורות המחיר הממוינת והגדרות הפותר.
+    סדר המזונות נשמר - הוא קובע את סדר המשתנים במודל.
+    """
+    catalog = [{field: food.get(field) for field in CATALOG_FIELDS} for food in foods_db]
+    params = {name: float(value) for name, value in user_params.items()}
+    solver = {name: value for name, value in solver.items() if name not in SOLVER_FIELDS_IGNORED}
+
+    payload = json.dumps(
+        [catalog, params, sorted(price_sources), mode, solver],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MenuCache:
+    """
+    מטמון תוצאות /calculate בקובץ SQLite - משותף לכל ה-workers של gunicorn.
+
+    חסום בגודל (max_entries, פינוי LRU לפי last_used) ובזמן (ttl שניות מרגע השמירה).
+    מונים של hits/misses נשמרים לכל worker בנפרד.
+    """
+
+    def __init__(self, path, max_entries=256, ttl=24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            # WAL - קוראים לא נחסמים ע"י כותב מ-worker אחר
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS menu_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, key):
+        """התוצאה השמורה למפתח, או None"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT result, created_at FROM menu_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM menu_cache WHERE key = ?", (key,))
+                    conn.commit()
+                with self._lock:
+                    self.misses += 1
+                return None
+
+            conn.execute("UPDATE menu_cache SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """שומר תוצאה (JSON) ומפנה רשומות שפג תוקפן ואת הישנות ביותר מעבר ל-max_entries"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO menu_cache (key, result, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            conn.execute("DELETE FROM menu_cache WHERE created_at < ?", (now - self.ttl,))
+            conn.execute("""
+                DELETE FROM menu_cache WHERE key NOT IN (
+                    SELECT key FROM menu_cache ORDER BY last_used DESC LIMIT ?
+                )
+            """, (self.max_entries,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        """מוחק את כל התוצאות (למשל - אחרי שינוי בקטלוג או במחירים)"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM menu_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM menu_cache").fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            return {"entries": entries, "hits": self.hits, "misses": self.misses}
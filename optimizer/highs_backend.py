@@ -0,0 +1,271 @@
+import numpy as np
+import pulp
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from optimizer.solver import FAILED, FEASIBLE, OPTIMAL
+
+# קודי התפקידים של זוג (מזון, ארוחה) במערך roles
+ROLE_CODES = {None: 0, "carb": 1, "protein": 2, "fruit": 3, "veg": 4}
+
+
+class MatrixTemplate:
+    """
+    אותו מודל יומי כמו ModelTemplate, בלי PuLP: המטרה והאילוצים נבנים ישירות
+    ממערכי NumPy (חלבון/קלוריות/פחמימות/שומן/מחיר לגרם) כמטריצה דלילה,
+    ונפתרים בתוך התהליך עם scipy.optimize.milp (HiGHS) - בלי קבצים זמניים ובלי subprocess.
+
+    עמודות: x לכל זוג מותר (כמות בגרמים), ואחריהן usage לכל זוג (בינארי).
+    מזונות שהוצאו ביום מסוים מקבלים חסם עליון 0, ואילוצי מניעת השכפול
+    מתווספים כשורות נוספות - בדיוק כמו ב-ModelTemplate.
+    """
+
+    backend = "highs"
+
+    def __init__(self, optimizer, key=None):
+        self.key = key
+        self.meals = optimizer.meals
+        self.food_index = optimizer.food_index
+        self.max_qty = optimizer.max_qty
+        self.allowed_foods = {meal: set(foods) for meal, foods in optimizer.original_allowed_foods.items()}
+
+        pairs = optimizer._compile_pairs(optimizer.original_allowed_foods, set())
+        self.pairs = [(i, j) for i, j, role in pairs]
+        self.column = {pair: k for k, pair in enumerate(self.pairs)}
+
+        n = len(pairs)
+        self.n = n
+        food = np.array([i for i, j, role in pairs], dtype=int)
+        meal = np.array([j for i, j, role in pairs], dtype=int)
+        role = np.array([ROLE_CODES[role] for i, j, role in pairs], dtype=int)
+        self.food = food
+
+        protein = np.asarray(optimizer.protein, dtype=float)[food]
+        calories = np.asarray(optimizer.calories, dtype=float)[food]
+        carbs = np.asarray(optimizer.carbs, dtype=float)[food]
+        fat = np.asarray(optimizer.fat, dtype=float)[food]
+
+        x_cols = np.arange(n)
+        u_cols = n + x_cols
+
+        rows, cols, data, lower, upper = [], [], [], [], []
+
+        def add_rows(row_ids, col_ids, values, row_lower, row_upper):
+            base = len(lower)
+            rows.append(base + np.asarray(row_ids, dtype=int))
+            cols.append(np.asarray(col_ids, dtype=int))
+            data.append(np.asarray(values, dtype=float))
+            lower.extend(row_lower)
+            upper.extend(row_upper)
+
+        zeros = np.zeros(n, dtype=int)
+
+        # אילוצי תזונה כלליים על סך כל הארוחות
+        add_rows(zeros, x_cols, protein, [optimizer.min_protein], [optimizer.max_protein])
+        add_rows(zeros, x_cols, calories, [optimizer.min_calories], [optimizer.max_calories])
+        add_rows(zeros, x_cols, carbs, [-np.inf], [optimizer.max_carbs])
+        add_rows(zeros, x_cols, fat, [optimizer.min_fat], [optimizer.max_fat])
+
+        # אילוצי קלוריות לפי ארוחה - שורה לכל ארוחה
+        add_rows(
+            meal, x_cols, calories,
+            [optimizer.min_calories_meal_pct[m] * optimizer.min_calories for m in self.meals],
+            [optimizer.max_calories_meal_pct[m] * optimizer.max_calories for m in self.meals],
+        )
+
+        # --- אילוצים לפי ארוחה ---
+        for meal_name in ["בוקר", "צהריים", "ערב"]:
+            j = self.meals.index(meal_name)
+            for role_name, row_lower, row_upper in [("carb", 1, 1), ("protein", 1, 1), ("veg", 1, np.inf)]:
+                mask = (meal == j) & (role == ROLE_CODES[role_name])
+                add_rows(np.zeros(mask.sum(), dtype=int), u_cols[mask], np.ones(mask.sum()), [row_lower], [row_upper])
+
+        # תוספות: לפחות פרי אחד
+        mask = (meal == self.meals.index("תוספות")) & (role == ROLE_CODES["fruit"])
+        add_rows(np.zeros(mask.sum(), dtype=int), u_cols[mask], np.ones(mask.sum()), [1], [np.inf])
+
+        # --- חיבור בין משתני בינארי לכמויות ---
+        role_min_qty = optimizer._role_min_qty()
+        min_qty = np.array([0.0] + [role_min_qty[name] for name in ["carb", "protein", "fruit", "veg"]])
+        has_role = np.flatnonzero(role)
+        count = len(has_role)
+        # x - min_qty·usage >= 0
+        add_rows(
+            np.concatenate([np.arange(count), np.arange(count)]),
+            np.concatenate([x_cols[has_role], u_cols[has_role]]),
+            np.concatenate([np.ones(count), -min_qty[role[has_role]]]),
+            [0] * count, [np.inf] * count,
+        )
+        # x - max_qty·usage <= 0
+        add_rows(
+            np.concatenate([np.arange(n), np.arange(n)]),
+            np.concatenate([x_cols, u_cols]),
+            np.concatenate([np.ones(n), np.full(n, -float(self.max_qty))]),
+            [-np.inf] * n, [0] * n,
+        )
+
+        # מניעת אותו מזון בבוקר וגם בערב (אם מותר בשניהם)
+        j_boker = self.meals.index("בוקר")
+        j_erev = self.meals.index("ערב")
+        both = [
+            (self.column[(i, j_boker)], self.column[(i, j_erev)])
+            for i in range(len(optimizer.foods))
+            if (i, j_boker) in self.column and (i, j_erev) in self.column
+        ]
+        if both:
+            both = np.array(both)
+            count = len(both)
+            add_rows(
+                np.concatenate([np.arange(count), np.arange(count)]),
+                n + both.T.ravel(),
+                np.ones(2 * count),
+                [-np.inf] * count, [1] * count,
+            )
+
+        self.A = sparse.csr_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(len(lower), 2 * n),
+        )
+        self.lower = np.array(lower, dtype=float)
+        self.upper = np.array(upper, dtype=float)
+
+        self.c = np.zeros(2 * n)
+        self.integrality = np.concatenate([np.zeros(n), np.ones(n)])
+        self.default_ub = np.concatenate([np.full(n, float(self.max_qty)), np.ones(n)])
+        self.ub = self.default_ub.copy()
+
+        self._cuts = []
+        # milp לא מקבל פתרון התחלה - start אף פעם לא בשימוש
+        self.start_used = False
+
+    def set_prices(self, price):
+        """פונקציית מטרה - מינימום עלות כוללת לפי מחירי החנות (לגרם)"""
+        self.c[:self.n] = np.asarray(price, dtype=float)[self.food]
+
+    def start_day(self, allowed_foods):
+        """
+        מסיר את אילוצי היום הקודם ומאפס (בחסם העליון) את המזונות שכבר לא מותרים בארוחה
+        """
+        self.clear_day()
+        for j, meal in enumerate(self.meals):
+            for food in self.allowed_foods[meal] - allowed_foods[meal]:
+                self.ub[self.column[(self.food_index[food], j)]] = 0
+
+    def add_cut(self, pairs):
+        """
+        אילוץ ליום הנוכחי: לא כל הזוגות (מזון, ארוחה) ב-pairs נבחרים יחד
+        (מניעת שכפול ארוחה מיום קודם)
+        """
+        self._cuts.append([self.n + self.column[pair] for pair in pairs])
+
+    def clear_day(self):
+        self.ub[:] = self.default_ub
+        self._cuts = []
+
+    def solve(self, relax=False, time_limit=None, mip_gap=None, threads=None, start=None):
+        """
+        פותר את היום הנוכחי. relax=True פותר את הרלקסציה הרציפה (LP).
+        threads ו-start (MIP start) לא נתמכים ע"י scipy.optimize.milp ומתעלמים מהם.
+
+        Returns:
+            (status, cost, values) - status: OPTIMAL / FEASIBLE / FAILED,
+            values: {(i, j): כמות} רק לזוגות עם כמות חיובית
+        """
+        A, lower, upper = self.A, self.lower, self.upper
+        if self._cuts:
+            cut_rows = np.concatenate([np.full(len(cut), r) for r, cut in enumerate(self._cuts)])
+            cut_cols = np.concatenate(self._cuts)
+            cuts = sparse.csr_matrix(
+                (np.ones(len(cut_cols)), (cut_rows, cut_cols)),
+                shape=(len(self._cuts), 2 * self.n),
+            )
+            A = sparse.vstack([A, cuts], format="csr")
+            lower = np.concatenate([lower, np.full(len(self._cuts), -np.inf)])
+            upper = np.concatenate([upper, [len(cut) - 1 for cut in self._cuts]])
+
+        options = {}
+        if time_limit is not None:
+            options["time_limit"] = time_limit
+        if mip_gap is not None:
+            options["mip_rel_gap"] = mip_gap
+
+        result = milp(
+            self.c,
+            constraints=LinearConstraint(A, lower, upper),
+            integrality=np.zeros(2 * self.n) if relax else self.integrality,
+            bounds=Bounds(np.zeros(2 * self.n), self.ub),
+            options=options,
+        )
+        # status 0 - אופטימום, status 1 - נעצר על מגבלה (אולי עם פתרון)
+        if result.status == 0:
+            status = OPTIMAL
+        elif result.status == 1 and result.x is not None:
+            status = FEASIBLE
+        else:
+            return FAILED, None, {}
+
+        # HiGHS מחזיר לפעמים רעש נומרי זעיר במקום 0
+        qty = result.x[:self.n]
+        values = {self.pairs[k]: float(qty[k]) for k in np.flatnonzero(qty > 1e-6)}
+        return status, float(result.fun), values
+
+
+def solve_problem(model, time_limit=None, mip_gap=None):
+    """
+    פותר מודל PuLP (למשל - המודל הרב-יומי של מצב horizon) עם scipy.optimize.milp (HiGHS):
+    המשתנים והאילוצים של המודל מועתקים למטריצה דלילה, והפתרון נכתב בחזרה
+    ל-varValue של המשתנים ול-sol_status של המודל - כמו אחרי model.solve.
+
+    Returns:
+        status - OPTIMAL / FEASIBLE / FAILED
+    """
+    variables = model.variables()
+    column = {var.name: k for k, var in enumerate(variables)}
+
+    c = np.zeros(len(variables))
+    for var, coef in model.objective.items():
+        c[column[var.name]] = coef
+
+    rows, cols, data, lower, upper = [], [], [], [], []
+    for r, constraint in enumerate(model.constraints.values()):
+        for var, coef in constraint.items():
+            rows.append(r)
+            cols.append(column[var.name])
+            data.append(coef)
+        rhs = -constraint.constant
+        lower.append(-np.inf if constraint.sense == pulp.LpConstraintLE else rhs)
+        upper.append(np.inf if constraint.sense == pulp.LpConstraintGE else rhs)
+
+    A = sparse.csr_matrix((data, (rows, cols)), shape=(len(lower), len(variables)))
+    bounds = Bounds(
+        [-np.inf if var.lowBound is None else var.lowBound for var in variables],
+        [np.inf if var.upBound is None else var.upBound for var in variables],
+    )
+    integrality = np.array([1 if var.cat == pulp.LpInteger else 0 for var in variables])
+
+    options = {}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+    if mip_gap is not None:
+        options["mip_rel_gap"] = mip_gap
+
+    result = milp(
+        c,
+        constraints=LinearConstraint(A, lower, upper) if lower else (),
+        integrality=integrality,
+        bounds=bounds,
+        options=options,
+    )
+    if result.status == 0:
+        status, model.sol_status = OPTIMAL, pulp.LpSolutionOptimal
+    elif result.status == 1 and result.x is not None:
+        status, model.sol_status = FEASIBLE, pulp.LpSolutionIntegerFeasible
+    else:
+        model.sol_status = pulp.LpSolutionNoSolutionFound
+        return FAILED
+
+    model.status = pulp.LpStatusOptimal
+    # HiGHS מחזיר לפעמים רעש נומרי זעיר במקום 0
+    for var, value in zip(variables, result.x):
+        var.varValue = 0.0 if abs(value) < 1e-6 else float(value)
+    return status
@@ -0,0 +1,114 @@
+import time
+
+import pulp
+
+# backends נתמכים - ראו optimizer.template.template_class
+BACKENDS = ("cbc", "highs")
+
+# None = בלי מגבלה / ברירת המחדל של הפותר
+DEFAULT_SOLVER = {
+    "backend": "cbc",
+    "time_limit": None,   # שניות לכל פתרון MILP
+    "mip_gap": None,      # פער יחסי מותר מהאופטימום (0.01 = 1%)
+    "horizon_mip_gap": None,  # הפער במצב horizon (None - 2%), ראו generate_menu_horizon
+    "threads": None,      # מספר threads של הפותר (CBC בלבד)
+    "deadline": None,     # שניות לכל חישוב התפריט (כל הימים)
+    "warm_start": True,   # כל יום מתחיל מהפתרון המתוקן של היום הקודם (CBC בלבד)
+}
+
+# תוצאת פתרון
+OPTIMAL = "optimal"      # נמצא אופטימום (בתוך mip_gap)
+FEASIBLE = "feasible"    # נעצר על מגבלת זמן - הפתרון הטוב ביותר שנמצא
+FAILED = "failed"        # לא נמצא אף פתרון
+
+
+def solver_settings(solver=None):
+    """
+    הגדרות הפותר: DEFAULT_SOLVER עם הערכים שהועברו (ערך None לא דורס)
+    """
+    settings = dict(DEFAULT_SOLVER)
+    for name, value in (solver or {}).items():
+        if name not in DEFAULT_SOLVER:
+            raise ValueError(f"הגדרת פותר לא מוכרת: {name}")
+        if value is not None:
+            settings[name] = value
+
+    if settings["backend"] not in BACKENDS:
+        raise ValueError(f"backend לא מוכר: {settings['backend']}")
+    return settings
+
+
+class Deadline:
+    """
+    מועד סיום לכל החישוב. מגביל את זמן כל פתרון לזמן שנותר.
+    """
+
+    def __init__(self, seconds=None):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def time_limit(self, per_solve):
+        """מגבלת הזמן לפתרון הבא: הקטנה מבין per_solve והזמן שנותר"""
+        remaining = self.remaining()
+        if remaining is None:
+            return per_solve
+        if per_solve is None:
+            return remaining
+        return min(per_solve, remaining)
+
+
+def cbc_command(time_limit=None, mip_gap=None, threads=None, relax=False, options=None, warm_start=False):
+    """
+    PULP_CBC_CMD עם מגבלות הפותר.
+    warm_start - הערכים הנוכחיים של המשתנים (setInitialValue) נשלחים ל-CBC כ-MIP start.
+    """
+    return pulp.PULP_CBC_CMD(
+        msg=False,
+        mip=not relax,
+        warmStart=warm_start,
+        timeLimit=time_limit,
+        gapRel=mip_gap,
+        threads=threads,
+        options=options or [],
+    )
+
+
+def pulp_status(model):
+    """
+    OPTIMAL / FEASIBLE / FAILED לפי sol_status של PuLP.
+    CBC שנעצר על מגבלת זמן עם פתרון מחזיר status "Optimal" - ההבחנה היא ב-sol_status.
+    """
+    if model.sol_status == pulp.LpSolutionOptimal:
+        return OPTIMAL
+    if model.sol_status == pulp.LpSolutionIntegerFeasible:
+        return FEASIBLE
+    return FAILED
+
+
+def solve_model(model, backend="cbc", time_limit=None, mip_gap=None, threads=None, options=None):
+    """
+    פותר מודל PuLP שלם (לא תבנית) עם ה-backend:
+        "cbc"   - model.solve עם cbc_command (options - אופציות נוספות ל-CBC)
+        "highs" - optimizer.highs_backend.solve_problem; threads ו-options לא נתמכים ומתעלמים מהם
+    הפתרון נכתב ל-varValue של המשתנים בשני המקרים.
+
+    Returns:
+        status - OPTIMAL / FEASIBLE / FAILED
+    """
+    if backend == "cbc":
+        model.solve(cbc_command(time_limit, mip_gap, threads, options=options))
+        return pulp_status(model)
+    if backend == "highs":
+        try:
+            from optimizer.highs_backend import solve_problem
+        except ImportError as e:
+            raise RuntimeError(f"backend 'highs' דורש numpy ו-scipy: {e}") from e
+        return solve_problem(model, time_limit, mip_gap)
+    raise ValueError(f"backend לא מוכר: {backend}")
@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+
+import pulp
+
+from optimizer.solver import FAILED, cbc_command, pulp_status
+
+# כמה צירופים שונים של (קטלוג, user_params) נשמרים, וכמה תבניות פנויות לכל צירוף
+MAX_TEMPLATE_KEYS = 16
+MAX_IDLE_PER_KEY = 4
+
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+class ModelTemplate:
+    """
+    מודל MILP של יום אחד בלי מחירים, עבור קטלוג ו-user_params נתונים (backend: PuLP + CBC).
+
+    המבנה (משתנים, אילוצי תזונה, קלוריות לפי ארוחה, משתני בינארי) נבנה פעם אחת.
+    בכל חנות מוחלפת רק פונקציית המטרה, ובכל יום מאפסים את המזונות שהוצאו
+    ומוסיפים את אילוצי מניעת שכפול הארוחה - ומחזירים הכל לפני היום הבא.
+
+    תבנית משמשת חישוב אחד בכל רגע נתון - הפתרון נכתב לתוך המשתנים שלה.
+    """
+
+    backend = "cbc"
+
+    def __init__(self, optimizer, key=None):
+        self.key = key
+        self.model = pulp.LpProblem("תפריט_תזונתי_אופטימלי", pulp.LpMinimize)
+
+        # y: האם מזון i נבחר בארוחה j (משתני הבינארי של המודל עצמו, בלי שכפול)
+        self.x, self.y = optimizer._add_day_block(
+            self.model, optimizer.original_allowed_foods, set(), "t"
+        )
+        self.allowed_foods = {meal: set(foods) for meal, foods in optimizer.original_allowed_foods.items()}
+        self.food_index = optimizer.food_index
+        self.meals = optimizer.meals
+        self.max_qty = optimizer.max_qty
+
+        self._day_constraints = []
+        self._day_excluded = []
+        # האם הפתרון האחרון התחיל מ-start (MIP start)
+        self.start_used = False
+
+    def set_prices(self, price):
+        """פונקציית מטרה - מינימום עלות כוללת לפי מחירי החנות (לגרם)"""
+        self.model.setObjective(pulp.lpSum(price[i] * var for (i, j), var in self.x.items()))
+
+    def start_day(self, allowed_foods):
+        """
+        מסיר את אילוצי היום הקודם ומאפס (בחסם העליון) את המזונות שכבר לא מותרים בארוחה
+        """
+        self.clear_day()
+        for j, meal in enumerate(self.meals):
+            for food in self.allowed_foods[meal] - allowed_foods[meal]:
+                var = self.x[(self.food_index[food], j)]
+                var.upBound = 0
+                self._day_excluded.append(var)
+
+    def add_cut(self, pairs):
+        """
+        אילוץ ליום הנוכחי: לא כל הזוגות (מזון, ארוחה) ב-pairs נבחרים יחד
+        (מניעת שכפול ארוחה מיום קודם)
+        """
+        name = f"day_{len(self._day_constraints)}"
+        self.model += pulp.lpSum(self.y[pair] for pair in pairs) <= len(pairs) - 1, name
+        self._day_constraints.append(name)
+
+    def solve(self, relax=False, time_limit=None, mip_gap=None, threads=None, start=None):
+        """
+        פותר את היום הנוכחי. relax=True פותר את הרלקסציה הרציפה (LP).
+        start - פתרון התחלה {(i, j): כמות}; זוג שלא מופיע בו מתחיל מ-0.
+        אחרי הפתרון, start_used - האם ההתחלה נשלחה לפותר.
+
+        Returns:
+            (status, cost, values) - status: OPTIMAL / FEASIBLE / FAILED,
+            values: {(i, j): כמות} רק לזוגות עם כמות חיובית
+        """
+        if start is not None:
+            for pair, var in self.x.items():
+                qty = start.get(pair, 0)
+                var.setInitialValue(qty)
+                self.y[pair].setInitialValue(1 if qty > 0 else 0)
+
+        self.start_used = start is not None and not relax
+        self.model.solve(cbc_command(time_limit, mip_gap, threads, relax=relax, warm_start=self.start_used))
+        status = pulp_status(self.model)
+        if status == FAILED:
+            return status, None, {}
+
+        values = {
+            pair: var.varValue for pair, var in self.x.items()
+            if var.varValue is not None and var.varValue > 0
+        }
+        return status, pulp.value(self.model.objective), values
+
+    def clear_day(self):
+        for name in self._day_constraints:
+            del self.model.constraints[name]
+        for var in self._day_excluded:
+            var.upBound = self.max_qty
+        self._day_constraints = []
+        self._day_excluded = []
+
+
+def template_key(optimizer):
+    """
+    מפתח התבנית: כל מה שקובע את מבנה המודל, בלי המחירים
+    """
+    foods = tuple(zip(
+        optimizer.foods,
+        optimizer.protein,
+        optimizer.calories,
+        optimizer.carbs,
+        optimizer.fat,
+        (optimizer.food_categories[food] for food in optimizer.foods),
+    ))
+    allowed = tuple(
+        (meal, tuple(sorted(optimizer.original_allowed_foods[meal])))
+        for meal in optimizer.meals
+    )
+    params = (
+        optimizer.min_calories, optimizer.max_calories,
+        optimizer.min_protein, optimizer.max_protein,
+        optimizer.max_carbs,
+        optimizer.min_fat, optimizer.max_fat,
+        tuple(sorted(optimizer.min_calories_meal_pct.items())),
+        tuple(sorted(optimizer.max_calories_meal_pct.items())),
+        optimizer.min_carb_qty, optimizer.min_protein_qty,
+        optimizer.min_fruit_qty, optimizer.min_veg_qty, optimizer.max_qty,
+    )
+    return foods, allowed, params
+
+
+def template_class(backend):
+    """
+    מחלקת התבנית של ה-backend:
+        "cbc"   - PuLP + CBC (ברירת המחדל)
+        "highs" - מטריצות NumPy/SciPy דלילות ו-milp של SciPy (HiGHS), בתוך התהליך
+    """
+    if backend == "cbc":
+        return ModelTemplate
+    if backend == "highs":
+        try:
+            from optimizer.highs_backend import MatrixTemplate
+        except ImportError as e:
+            raise RuntimeError(f"backend 'highs' דורש numpy ו-scipy: {e}") from e
+        return MatrixTemplate
+    raise ValueError(f"backend לא מוכר: {backend}")
+
+
+def acquire_template(optimizer, backend="cbc"):
+    """
+    מחזיר תבנית פנויה עבור הקטלוג וה-user_params של optimizer, או בונה חדשה.
+    יש להחזיר אותה עם release_template בסיום.
+    """
+    cls = template_class(backend)
+    key = (backend, template_key(optimizer))
+    with _templates_lock:
+        idle = _templates.get(key)
+        if idle:
+            _templates.move_to_end(key)
+            return idle.pop()
+
+    return cls(optimizer, key)
+
+
+def release_template(template):
+    template.clear_day()
+    with _templates_lock:
+        idle = _templates.setdefault(template.key, [])
+        if len(idle) < MAX_IDLE_PER_KEY:
+            idle.append(template)
+        _templates.move_to_end(template.key)
+        while len(_templates) > MAX_TEMPLATE_KEYS:
+            _templates.popitem(last=False)
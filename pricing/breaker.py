@@ -0,0 +1,171 @@
+import json
+import sqlite3
+import threading
+import time
+
+# מצבי ה-breaker
+CLOSED = "closed"          # החנות תקינה - סורקים
+OPEN = "open"              # K כשלונות רצופים - מדלגים על החנות עד retry_at
+HALF_OPEN = "half_open"    # עבר retry_at - מוצר אחד נסרק כבדיקה
+
+
+class CircuitBreaker:
+    """
+    מפסק לחנות אחת: אחרי threshold כשלונות רצופים (timeout, שגיאה, או תוצאות בלי מחיר)
+    החנות "נפתחת" ושאר המוצרים שלה מדולגים. אחרי backoff שניות מוצר אחד נסרק כבדיקה (half-open):
+    הצלחה סוגרת את המפסק, כשלון פותח אותו שוב עם backoff כפול (עד max_backoff).
+    """
+
+    def __init__(self, store, threshold=5, backoff=60, max_backoff=3600, on_change=None, state=None):
+        self.store = store
+        self.threshold = threshold
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_change = on_change
+        self._lock = threading.Lock()
+
+        state = state or {}
+        self.state = state.get("state", CLOSED)
+        self.failures = state.get("failures", 0)
+        self.backoff = state.get("backoff", backoff)
+        self.opened_at = state.get("opened_at")
+        self.retry_at = state.get("retry_at")
+        self.last_error = state.get("last_error")
+        self._probing = False
+
+    def allow(self):
+        """האם לסרוק את המוצר הבא. במצב half-open - רק בדיקה אחת בכל פעם."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.time() < self.retry_at:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+        self._changed()
+        return True
+
+    def record_success(self):
+        with self._lock:
+            changed = self.state != CLOSED or self.failures
+            self.state = CLOSED
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self.opened_at = self.retry_at = None
+            self._probing = False
+        if changed:
+            self._changed()
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state == HALF_OPEN:
+                # הבדיקה נכשלה - פותחים שוב עם backoff כפול
+                self.backoff = min(self.max_backoff, self.backoff * 2)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.threshold:
+                self._open()
+        self._changed()
+
+    def _open(self):
+        now = time.time()
+        self.state = OPEN
+        self.opened_at = now
+        self.retry_at = now + self.backoff
+        self._probing = False
+        print(f"🔌 {self.store}: {self.failures} כשלונות רצופים - מדלגים על החנות ל-{self.backoff:.0f} שניות "
+              f"({self.last_error})")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "store": self.store,
+                "state": self.state,
+                "failures": self.failures,
+                "backoff": self.backoff,
+                "opened_at": self.opened_at,
+                "retry_at": self.retry_at,
+                "last_error": self.last_error,
+            }
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self.snapshot())
+
+
+class BreakerBoard:
+    """
+    מפסק לכל חנות. המצב נשמר ב-SQLite בכל שינוי, כך ש:
+    - כל worker (גם כזה שלא סורק) יכול להציג אותו ב-API
+    - תהליך שעלה מחדש ממשיך מהמצב האחרון (חנות פתוחה נשארת פתוחה עד retry_at)
+    """
+
+    def __init__(self, path, stores, threshold=5, backoff=60, max_backoff=3600):
+        self.path = path
+        self.stores = list(stores)
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS store_breakers (
+                    store TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _save(self, snapshot):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO store_breakers (store, state, updated_at) VALUES (?, ?, ?)",
+                (snapshot["store"], json.dumps(snapshot, ensure_ascii=False), time.time())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _load(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT store, state FROM store_breakers").fetchall()
+        finally:
+            conn.close()
+        return {store: json.loads(state) for store, state in rows}
+
+    def get(self, store):
+        with self._lock:
+            if store not in self._breakers:
+                self._breakers[store] = CircuitBreaker(
+                    store, self.threshold, self.backoff, self.max_backoff,
+                    on_change=self._save, state=self._load().get(store),
+                )
+            return self._breakers[store]
+
+    def states(self):
+        """{חנות: מצב המפסק} כפי שנשמר לאחרונה (מכל worker)"""
+        saved = self._load()
+        return {
+            store: saved.get(store, {"store": store, "state": CLOSED, "failures": 0})
+            for store in self.stores
+        }
+
+    def reset(self, store):
+        """סוגר את המפסק ידנית (למשל - אחרי תיקון הסורק)"""
+        self.get(store).record_success()
@@ -0,0 +1,197 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from scrapers_config import get_chrome_driver
+from config import (
+    SCRAPER_POOL_SIZE, SCRAPER_POOL_MAX_PAGES, SCRAPER_POOL_MAX_RSS_MB, SCRAPER_POOL_IDLE,
+    SCRAPER_BLOCK_RESOURCES, SCRAPER_STORE_BLOCK_RESOURCES,
+)
+
+
+def process_tree_rss_mb(pid):
+    """
+    זיכרון (RSS, MB) של תהליך וכל צאצאיו - chromedriver וכל תהליכי Chrome שלו.
+    מבוסס /proc (Linux), מחזיר 0 אם אין גישה.
+    """
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class DriverPool:
+    """
+    מאגר דפדפנים משותף לכל התהליך, במקום דפדפן חדש לכל סריקה.
+
+    - דפדפן נפתח רק כשמבקשים אותו ואין פנוי (lazy), עד max_size פתוחים בו-זמנית
+    - בכל השאלה נבדק שהדפדפן חי (health check), דפדפן מת נסגר ומוחלף
+    - דפדפן ממוחזר (נסגר) אחרי max_pages השאלות (= דפים) או כשהזיכרון שלו עובר max_rss_mb
+    - דפדפן פנוי שלא היה בשימוש max_idle שניות נסגר
+    """
+
+    def __init__(self, factory=get_chrome_driver, max_size=6, max_pages=50, max_rss_mb=800, max_idle=300):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.max_idle = max_idle
+
+        self._idle = []          # [(driver, שעת החזרה)]
+        self._pages = {}         # driver -> מספר דפים שנטענו בו
+        self._size = 0           # דפדפנים פתוחים (פנויים + מושאלים)
+        self._cond = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+
+    @contextmanager
+    def driver(self):
+        """
+        משאיל דפדפן לטעינת דף אחד. אם נזרקה שגיאה בתוך הבלוק - הדפדפן נסגר ולא חוזר למאגר.
+        """
+        driver = self._borrow()
+        try:
+            yield driver
+        except Exception:
+            self._discard(driver)
+            raise
+        self._release(driver)
+
+    def _borrow(self):
+        while True:
+            with self._cond:
+                stale = self._take_idle()
+                while not self._idle and self._size >= self.max_size:
+                    self._cond.wait()
+                if self._idle:
+                    driver, _ = self._idle.pop()
+                else:
+                    driver = None
+                    self._size += 1
+
+            # quit יכול לקחת שניות - מחוץ לנעילה, כמו ב-_discard
+            for old in stale:
+                self._quit(old)
+
+            if driver is None:
+                try:
+                    driver = self.factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._pages[driver] = 0
+                    self.created += 1
+                return driver
+
+            if self._healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def _release(self, driver):
+        with self._cond:
+            self._pages[driver] += 1
+            worn_out = self._pages[driver] >= self.max_pages
+        if worn_out or self._memory_mb(driver) > self.max_rss_mb:
+            with self._cond:
+                self.recycled += 1
+            self._discard(driver)
+            return
+        with self._cond:
+            self._idle.append((driver, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, driver):
+        with self._cond:
+            self._pages.pop(driver, None)
+            self._size -= 1
+            self._cond.notify()
+        self._quit(driver)
+
+    def _take_idle(self):
+        """
+        (בתוך הנעילה) מוציא מהמאגר דפדפנים פנויים שעבר עליהם max_idle ומחזיר אותם -
+        הקורא סוגר אותם אחרי שחרור הנעילה
+        """
+        cutoff = time.monotonic() - self.max_idle
+        stale = [driver for driver, released in self._idle if released < cutoff]
+        if not stale:
+            return stale
+        self._idle = [(driver, released) for driver, released in self._idle if released >= cutoff]
+        for driver in stale:
+            self._pages.pop(driver, None)
+            self._size -= 1
+        self._cond.notify_all()
+        return stale
+
+    @staticmethod
+    def _healthy(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _memory_mb(driver):
+        try:
+            return process_tree_rss_mb(driver.service.process.pid)
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """סוגר את כל הדפדפנים הפנויים (מושאלים נסגרים כשיוחזרו)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            for driver, _ in idle:
+                self._pages.pop(driver, None)
+                self._size -= 1
+            self._cond.notify_all()
+        for driver, _ in idle:
+            self._quit(driver)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "open": self._size,
+                "idle": len(self._idle),
+                "created": self.created,
+                "recycled": self.recycled,
+            }
+
+
+# מאגר אחד לכל תהליך (כל worker של gunicorn מחזיק מאגר משלו).
+# אותו דפדפן משרת את כל החנויות - תמונות נחסמות לפי סוג רק כשכל החנויות חוסמות משאבים
+driver_pool = DriverPool(
+    factory=partial(
+        get_chrome_driver,
+        block_images=SCRAPER_BLOCK_RESOURCES and all(SCRAPER_STORE_BLOCK_RESOURCES.values()),
+    ),
+    max_size=SCRAPER_POOL_SIZE,
+    max_pages=SCRAPER_POOL_MAX_PAGES,
+    max_rss_mb=SCRAPER_POOL_MAX_RSS_MB,
+    max_idle=SCRAPER_POOL_IDLE,
+)
+atexit.register(driver_pool.close)
@@ -0,0 +1,60 @@
+import json
+
+import urllib3
+
+# אותו user-agent כמו של Chrome ב-scrapers_config
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class HttpFetcher:
+    """
+    הורדת דפים ב-HTTP רגיל, בלי דפדפן. החיבורים נשמרים פתוחים (keep-alive)
+    ב-pool לכל host, כך שחיפושים רצופים באותה חנות לא פותחים חיבור TCP/TLS חדש.
+    """
+
+    def __init__(self, pool_size=10, timeout=10, retries=1):
+        self.http = urllib3.PoolManager(
+            num_pools=10,
+            maxsize=pool_size,
+            block=False,
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            retries=urllib3.Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504)),
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,*/*;q=0.8",
+                "Accept-Language": "he-IL,he;q=0.9",
+            },
+        )
+
+    def _request(self, method, url, **kwargs):
+        try:
+            response = self.http.request(method, url, **kwargs)
+        except urllib3.exceptions.HTTPError as e:
+            print(f"⚠️ HTTP {url}: {e}")
+            return None
+        if response.status != 200:
+            return None
+        return response.data.decode("utf-8", errors="replace")
+
+    def get(self, url):
+        """תוכן הדף כטקסט, או None אם הבקשה נכשלה או החזירה סטטוס שאינו 200"""
+        return self._request("GET", url)
+
+    def get_json(self, url, body=None):
+        """
+        תשובת JSON של API חיפוש: GET, או POST עם body כ-JSON.
+        None אם הבקשה נכשלה או שהתשובה אינה JSON.
+        """
+        # headers של בקשה מחליפים את ברירת המחדל של ה-pool - משלבים
+        headers = dict(self.http.headers, Accept="application/json")
+        if body is None:
+            text = self._request("GET", url, headers=headers)
+        else:
+            headers["Content-Type"] = "application/json"
+            text = self._request("POST", url, headers=headers, body=json.dumps(body, ensure_ascii=False).encode("utf-8"))
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
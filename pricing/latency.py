@@ -0,0 +1,65 @@
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    """
+    זמני טעינה אחרונים של חנות אחת (מ-driver.get ועד שהופיעו תוצאות / "אין תוצאות"),
+    ומהם ה-timeout לטעינה הבאה: percentile של הזמנים × factor, בין min_timeout ל-max_timeout.
+    עד שיש min_samples מדידות משתמשים ב-initial (ה-timeout הקבוע הישן של החנות).
+
+    טעינה שנכשלה על timeout נרשמת עם זמן ה-timeout - כך ה-timeout גדל כשהאתר מאט.
+    """
+
+    def __init__(self, initial, min_timeout=3, max_timeout=30, percentile=95, factor=2.0,
+                 window=200, min_samples=10):
+        self.initial = initial
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.percentile = percentile
+        self.factor = factor
+        self.min_samples = min_samples
+
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.parse_seconds = 0.0
+
+    def record(self, wait_seconds, parse_seconds=0.0, timed_out=False):
+        with self._lock:
+            self._samples.append(wait_seconds)
+            self.pages += 1
+            self.timeouts += timed_out
+            self.wait_seconds += wait_seconds
+            self.parse_seconds += parse_seconds
+
+    def _quantile(self, samples, percentile):
+        """percentile בשיטת nearest-rank"""
+        ordered = sorted(samples)
+        rank = max(1, -(-percentile * len(ordered) // 100))
+        return ordered[int(rank) - 1]
+
+    def timeout(self):
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < self.min_samples:
+            return self.initial
+        adaptive = self._quantile(samples, self.percentile) * self.factor
+        return min(self.max_timeout, max(self.min_timeout, adaptive))
+
+    def stats(self):
+        with self._lock:
+            samples = list(self._samples)
+            stats = {
+                "pages": self.pages,
+                "timeouts": self.timeouts,
+                "wait_seconds": round(self.wait_seconds, 2),
+                "parse_seconds": round(self.parse_seconds, 2),
+            }
+        if samples:
+            stats["p50"] = round(self._quantile(samples, 50), 2)
+            stats["p95"] = round(self._quantile(samples, 95), 2)
+        stats["timeout"] = round(self.timeout(), 2)
+        return stats
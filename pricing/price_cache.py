@@ -0,0 +1,210 @@
+import sqlite3
+import statistics
+import threading
+import time
+
+
+def normalize_name(name):
+    """שם מוצר קנוני למפתח: בלי רווחים מיותרים, בלי הבדלי אותיות גדולות/קטנות"""
+    return " ".join(str(name).split()).casefold()
+
+
+class PriceCache:
+    """
+    מחירים לגרם שנסרקו, לפי (חנות, שם מוצר מנורמל), בקובץ SQLite (WAL) - משותף לכל ה-workers.
+
+    מחיר תקף ttl שניות מרגע הסריקה - ttl נקבע לכל חנות (store_ttl), ואחרת default_ttl.
+    נשמרים רק מחירים שנמצאו (> 0): מוצר שלא נמצא ייסרק שוב בפעם הבאה.
+    מונים של hits/misses לכל חנות, לכל worker בנפרד.
+    כל מחיר שנמצא נשמר גם ב-price_history - לחישוב תנודתיות (volatility).
+    """
+
+    def __init__(self, path, default_ttl=6 * 3600, store_ttl=None):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.store_ttl = dict(store_ttl or {})
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_cache (
+                    store TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    price_per_gram REAL NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    source_url TEXT,
+                    PRIMARY KEY (store, name)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_history (
+                    store TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    price_per_gram REAL NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS price_history_name ON price_history (name, fetched_at)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def ttl(self, store):
+        return self.store_ttl.get(store, self.default_ttl)
+
+    def get_many(self, store, names, max_age=None):
+        """
+        {שם מנורמל: מחיר לגרם} למוצרים ב-names שיש להם מחיר בתוקף
+        (max_age - גיל מקסימלי בשניות במקום ה-ttl של החנות)
+        """
+        keys = sorted({normalize_name(name) for name in names})
+        if not keys:
+            return {}
+
+        cutoff = time.time() - (self.ttl(store) if max_age is None else max_age)
+        found = {}
+        conn = self._connect()
+        try:
+            # SQLite מגביל את מספר הפרמטרים בשאילתה - בקבוצות
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT name, price_per_gram FROM price_cache "
+                    f"WHERE store = ? AND fetched_at >= ? AND name IN ({','.join('?' * len(chunk))})",
+                    (store, cutoff, *chunk)
+                ).fetchall()
+                found.update(rows)
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.hits[store] = self.hits.get(store, 0) + len(found)
+            self.misses[store] = self.misses.get(store, 0) + len(keys) - len(found)
+        return found
+
+    def put_many(self, store, entries):
+        """
+        entries - [(שם מוצר, מחיר לגרם, כתובת המקור)]; מחירים של 0 (לא נמצא) לא נשמרים
+        """
+        now = time.time()
+        rows = [
+            (store, normalize_name(name), price, now, url)
+            for name, price, url in entries if price and price > 0
+        ]
+        if not rows:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO price_cache (store, name, price_per_gram, fetched_at, source_url) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(
+                "INSERT INTO price_history (store, name, price_per_gram, fetched_at) VALUES (?, ?, ?, ?)",
+                [row[:4] for row in rows]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _select_by_names(self, query, names):
+        """מריץ query עם {names} ברשימת השמות המנורמלים (בקבוצות של 500)"""
+        keys = sorted({normalize_name(name) for name in names})
+        rows = []
+        conn = self._connect()
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows.extend(conn.execute(query.format(names=",".join("?" * len(chunk))), chunk).fetchall())
+        finally:
+            conn.close()
+        return rows
+
+    def changed_since(self, since):
+        """[(חנות, שם מנורמל, מחיר לגרם, זמן הסריקה)] של מחירים שנשמרו אחרי since, לפי הזמן"""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT store, name, price_per_gram, fetched_at FROM price_cache WHERE fetched_at > ? ORDER BY fetched_at",
+                (since,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def last_fetched(self, names, stores):
+        """
+        {שם מנורמל: זמן המחיר הישן ביותר מבין החנויות} - מוצר שחסר לו מחיר באחת החנויות לא מופיע
+        """
+        rows = self._select_by_names(
+            "SELECT name, store, fetched_at FROM price_cache WHERE name IN ({names})", names
+        )
+        by_name = {}
+        for name, store, fetched_at in rows:
+            if store in stores:
+                by_name.setdefault(name, {})[store] = fetched_at
+        return {
+            name: min(times.values())
+            for name, times in by_name.items() if len(times) == len(stores)
+        }
+
+    def volatility(self, names, window=10):
+        """
+        {שם מנורמל: תנודתיות} - מקדם ההשתנות (סטיית תקן / ממוצע) של window המחירים האחרונים
+        בכל חנות, בממוצע על החנויות. מוצר בלי לפחות שני מחירים בחנות כלשהי לא מופיע.
+        """
+        rows = self._select_by_names(
+            "SELECT name, store, price_per_gram FROM price_history WHERE name IN ({names}) ORDER BY fetched_at DESC",
+            names
+        )
+        history = {}
+        for name, store, price in rows:
+            prices = history.setdefault(name, {}).setdefault(store, [])
+            if len(prices) < window:
+                prices.append(price)
+
+        result = {}
+        for name, stores in history.items():
+            variations = [
+                statistics.pstdev(prices) / statistics.mean(prices)
+                for prices in stores.values() if len(prices) >= 2
+            ]
+            if variations:
+                result[name] = statistics.mean(variations)
+        return result
+
+    def clear(self, store=None):
+        conn = self._connect()
+        try:
+            if store is None:
+                conn.execute("DELETE FROM price_cache")
+                conn.execute("DELETE FROM price_history")
+            else:
+                conn.execute("DELETE FROM price_cache WHERE store = ?", (store,))
+                conn.execute("DELETE FROM price_history WHERE store = ?", (store,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = dict(conn.execute("SELECT store, COUNT(*) FROM price_cache GROUP BY store").fetchall())
+        finally:
+            conn.close()
+        with self._lock:
+            return {
+                store: {
+                    "entries": entries.get(store, 0),
+                    "hits": self.hits.get(store, 0),
+                    "misses": self.misses.get(store, 0),
+                    "ttl": self.ttl(store),
+                }
+                for store in sorted(set(entries) | set(self.hits) | set(self.store_ttl))
+            }
@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+import time
+
+from pricing.price_cache import normalize_name
+
+
+class ProductIndex:
+    """
+    המוצר שנבחר בחיפוש, לפי (חנות, שם מזון מנורמל): קוד המוצר בחנות וכתובת דף המוצר.
+    בסריקה הבאה נטען דף המוצר ישירות במקום דף החיפוש. אם המוצר כבר לא נמצא שם -
+    הרשומה נמחקת (forget) והמוצר מחופש מחדש.
+
+    SQLite (WAL) - משותף לכל ה-workers. מונים של hits/misses/stale לכל worker.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS product_index (
+                    store TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    product_code TEXT NOT NULL,
+                    product_url TEXT NOT NULL,
+                    resolved_at REAL NOT NULL,
+                    PRIMARY KEY (store, name)
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, store, name):
+        """{"code", "url"} של המוצר שנבחר בעבר, או None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT product_code, product_url FROM product_index WHERE store = ? AND name = ?",
+                (store, normalize_name(name))
+            ).fetchone()
+        finally:
+            conn.close()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else {"code": row[0], "url": row[1]}
+
+    def put(self, store, name, code, url):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO product_index (store, name, product_code, product_url, resolved_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (store, normalize_name(name), code, url, time.time())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def forget(self, store, name):
+        """המוצר ירד מהאתר או שהקוד השתנה - בפעם הבאה יחופש מחדש"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM product_index WHERE store = ? AND name = ?", (store, normalize_name(name)))
+            conn.commit()
+        finally:
+            conn.close()
+        with self._lock:
+            self.stale += 1
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = dict(conn.execute("SELECT store, COUNT(*) FROM product_index GROUP BY store").fetchall())
+        finally:
+            conn.close()
+        with self._lock:
+            return {"entries": entries, "hits": self.hits, "misses": self.misses, "stale": self.stale}
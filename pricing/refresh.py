@@ -0,0 +1,241 @@
+import json
+import sqlite3
+import time
+import uuid
+
+from pricing.price_cache import normalize_name
+
+# סטטוסים של ריצת רענון
+RUNNING = "running"
+COMPLETED = "completed"
+
+# סיבות לדילוג על מוצר
+SKIPPED_BUDGET = "budget"      # נגמר הזמן של הלילה
+SKIPPED_DELETED = "deleted"    # המזון נמחק מהקטלוג במהלך הריצה
+SKIPPED_FAILED = "failed"      # הסריקה נכשלה בכל החנויות
+SKIPPED_CANCELLED = "cancelled"  # הריצה בוטלה - נשארת פתוחה וממשיכה מכאן בפעם הבאה
+
+# staleness מוגבל - מוצר בלי מחיר בכלל מקבל את הערך המקסימלי
+MAX_STALENESS = 3.0
+
+
+class PriceRefresh:
+    """
+    רענון מחירים לילי הדרגתי: סדר עדיפויות, התקדמות שמורה וחידוש אחרי הפסקה.
+
+    ציון לכל מזון (גבוה = קודם):
+        staleness   - גיל המחיר המוצלח האחרון ביחידות של ttl (מוגבל ל-MAX_STALENESS, בלי מחיר = המקסימום)
+        popularity  - כמה תפריטים מהימים האחרונים כללו את המזון, יחסית למזון הנפוץ ביותר (0..1)
+        volatility  - תנודתיות המחיר בעבר (מקדם השתנות × 10, מוגבל ל-1)
+        score = staleness + menu_weight·popularity + volatility_weight·volatility
+
+    הכל בקובץ SQLite (אותו קובץ של מטמון המחירים כברירת מחדל): שימוש במזונות בתפריטים,
+    הריצות (התוכנית המסודרת והמיקום בה) והמוצרים שדולגו בכל ריצה.
+    """
+
+    def __init__(self, path, price_cache, stores, ttl, menu_weight=1.0, volatility_weight=1.0,
+                 menu_window_days=30, resume_window=24 * 3600):
+        self.path = path
+        self.price_cache = price_cache
+        self.stores = list(stores)
+        self.ttl = ttl
+        self.menu_weight = menu_weight
+        self.volatility_weight = volatility_weight
+        self.menu_window_days = menu_window_days
+        self.resume_window = resume_window
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS menu_usage (
+                    name TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (name, day)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS refresh_runs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    plan TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS refresh_skipped (
+                    run_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    reason TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def record_menu(self, food_names):
+        """סופר תפריט אחד לכל מזון שמופיע בו (פעם אחת למזון, גם אם הופיע בכמה ימים)"""
+        day = time.strftime("%Y-%m-%d")
+        names = {normalize_name(name) for name in food_names}
+        if not names:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT INTO menu_usage (name, day, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (name, day) DO UPDATE SET count = count + 1",
+                [(name, day) for name in names]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _menu_counts(self):
+        since = time.strftime("%Y-%m-%d", time.localtime(time.time() - self.menu_window_days * 86400))
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT name, SUM(count) FROM menu_usage WHERE day >= ? GROUP BY name", (since,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return dict((row[0], row[1]) for row in rows)
+
+    def plan(self, food_names):
+        """
+        המזונות לפי סדר הרענון (הציון הגבוה ראשון), עם פירוט הציון של כל אחד
+        """
+        now = time.time()
+        fetched = self.price_cache.last_fetched(food_names, self.stores) if self.price_cache else {}
+        volatility = self.price_cache.volatility(food_names) if self.price_cache else {}
+        counts = self._menu_counts()
+        most_used = max(counts.values(), default=0)
+
+        plan = []
+        for position, name in enumerate(food_names):
+            key = normalize_name(name)
+            staleness = MAX_STALENESS if key not in fetched else min(MAX_STALENESS, (now - fetched[key]) / self.ttl)
+            popularity = counts.get(key, 0) / most_used if most_used else 0.0
+            variation = min(1.0, 10 * volatility.get(key, 0.0))
+            plan.append({
+                "name": name,
+                "score": round(staleness + self.menu_weight * popularity + self.volatility_weight * variation, 4),
+                "staleness": round(staleness, 4),
+                "popularity": round(popularity, 4),
+                "volatility": round(variation, 4),
+                "order": position,
+            })
+        # ציון שווה - לפי הסדר בקטלוג
+        plan.sort(key=lambda item: (-item["score"], item["order"]))
+        return plan
+
+    def start_or_resume(self, food_names):
+        """
+        ריצה שנקטעה (עדיין running, התחילה לפני פחות מ-resume_window) ממשיכה מהמיקום השמור;
+        אחרת נבנית תוכנית חדשה.
+
+        Returns:
+            {"id", "plan": [שמות לפי הסדר], "position", "resumed"}
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM refresh_runs WHERE status = ? AND started_at >= ? ORDER BY started_at DESC LIMIT 1",
+                (RUNNING, time.time() - self.resume_window)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is not None:
+            # מה שדולג בגלל ביטול מרוענן עכשיו
+            self._clear_skipped(row["id"], SKIPPED_CANCELLED)
+            return {"id": row["id"], "plan": json.loads(row["plan"]), "position": row["position"], "resumed": True}
+
+        # התוכנית נבנית מחוץ לטרנזקציה - מטמון המחירים עשוי להיות באותו קובץ
+        plan = [item["name"] for item in self.plan(food_names)]
+        run_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            # ריצות ישנות שלא הסתיימו לא ימשיכו יותר
+            conn.execute("UPDATE refresh_runs SET status = ? WHERE status = ?", (COMPLETED, RUNNING))
+            conn.execute(
+                "INSERT INTO refresh_runs (id, status, plan, position, started_at, updated_at) VALUES (?, ?, ?, 0, ?, ?)",
+                (run_id, RUNNING, json.dumps(plan, ensure_ascii=False), now, now)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return {"id": run_id, "plan": plan, "position": 0, "resumed": False}
+
+    def advance(self, run_id, position, skipped=()):
+        """שומר את המיקום בתוכנית (ומוצרים שדולגו עד כה) - אחרי כל קבוצה"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE refresh_runs SET position = ?, updated_at = ? WHERE id = ?", (position, time.time(), run_id)
+            )
+            conn.executemany(
+                "INSERT INTO refresh_skipped (run_id, name, reason) VALUES (?, ?, ?)",
+                [(run_id, name, reason) for name, reason in skipped]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _clear_skipped(self, run_id, reason):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM refresh_skipped WHERE run_id = ? AND reason = ?", (run_id, reason))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def cancel(self, run_id, position, names):
+        """
+        ריצה שבוטלה: שומר את המיקום ורושם את שאר המזונות (names) כמדולגים בגלל ביטול.
+        הריצה לא מסתיימת - start_or_resume הבא ממשיך ממנה (ומוחק את הרישום הזה).
+        """
+        self.advance(run_id, position, [(name, SKIPPED_CANCELLED) for name in names])
+
+    def finish(self, run_id, skipped=()):
+        """מסיים את הריצה ורושם את המוצרים שדולגו: [(שם, סיבה)]"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE refresh_runs SET status = ?, updated_at = ? WHERE id = ?", (COMPLETED, time.time(), run_id)
+            )
+            conn.executemany(
+                "INSERT INTO refresh_skipped (run_id, name, reason) VALUES (?, ?, ?)",
+                [(run_id, name, reason) for name, reason in skipped]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def last_run(self):
+        """הריצה האחרונה עם המוצרים שדולגו בה, או None"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM refresh_runs ORDER BY started_at DESC LIMIT 1").fetchone()
+            if row is None:
+                return None
+            skipped = conn.execute(
+                "SELECT name, reason FROM refresh_skipped WHERE run_id = ?", (row["id"],)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "position": row["position"],
+            "total": len(json.loads(row["plan"])),
+            "started_at": row["started_at"],
+            "updated_at": row["updated_at"],
+            "skipped": [{"name": name, "reason": reason} for name, reason in skipped],
+        }
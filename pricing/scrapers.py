@@ -4,302 +4,768 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.options import Options
 
 import urllib.parse
 import re
 import time
-from scrapers_config import get_chrome_driver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pricing.driver_pool import driver_pool
+from pricing.latency import LatencyTracker
+from pricing.http_fetch import HttpFetcher
+from pricing.static_html import parse_html
+from pricing.price_cache import PriceCache, normalize_name
+from pricing.product_index import ProductIndex
+from pricing.breaker import BreakerBoard
+from config import (
+    SCRAPER_SHARDS, SCRAPER_DOMAIN_CONCURRENCY,
+    SCRAPER_WAIT_MIN, SCRAPER_WAIT_MAX, SCRAPER_WAIT_PERCENTILE, SCRAPER_WAIT_FACTOR,
+    SCRAPER_HTTP_FIRST, SCRAPER_HTTP_POOL_SIZE, SCRAPER_HTTP_TIMEOUT, SCRAPER_RAMI_LEVY_STORE_ID,
+    SCRAPER_BLOCK_RESOURCES, SCRAPER_STORE_BLOCK_RESOURCES, SCRAPER_BLOCKED_DOMAINS,
+    PRICE_CACHE_ENABLED, PRICE_CACHE_PATH, PRICE_CACHE_TTL, PRICE_CACHE_STORE_TTL,
+    PRODUCT_INDEX_ENABLED, PRODUCT_INDEX_PATH,
+    SCRAPER_BREAKER_PATH, SCRAPER_BREAKER_THRESHOLD, SCRAPER_BREAKER_BACKOFF, SCRAPER_BREAKER_MAX_BACKOFF,
+)
+from scrapers_config import blocked_url_patterns, set_resource_blocking
+
+# ===============================
+# שופרסל
+# ===============================
+
+def _shufersal_per_gram(price_text):
+    """המרה למחיר ל־גרם"""
+    if price_text is None:
+        return 0
+    try:
+        price = float(price_text.split()[0])
+    except:
+        return 0
 
-def get_prices_shufersal(products):
+    unit = price_text
+    if "1 ק&quot;ג" in unit or "1 יחידה" in unit:
+        return price / 1000
+    if "100 גרם" in unit or "100 מ&quot;ל" in unit:
+        return price / 100
+    return price / 1000
 
-    # ===============================
-    # המרה למחיר ל־גרם
-    # ===============================
-    def convert_to_per_gram(price_text):
-        if price_text is None:
-            return 0
-        try:
-            price = float(price_text.split()[0])
-        except:
-            return 0
 
-        unit = price_text
-        if "1 ק&quot;ג" in unit or "1 יחידה" in unit:
-            return price / 1000
-        if "100 גרם" in unit or "100 מ&quot;ל" in unit:
-            return price / 100
-        return price / 1000
-    # ===============================
-    # פתיחת דפדפן
-    # ===============================
-    driver = get_chrome_driver()
-
-    # ===============================
-    # שליפה מתוך HTML
-    # ===============================
-    def extract_price(item):
-        try:
-            extra = item.find_element(By.CSS_SELECTOR, "div.smallText.pricePerUnit")
-            text = extra.text.strip()
-            is_unit = ("יח" in text)
-            return text, is_unit
-        except:
-            pass
+def _shufersal_extract_price(item):
+    """שליפה מתוך HTML"""
+    try:
+        extra = item.find_element(By.CSS_SELECTOR, "div.smallText.pricePerUnit")
+        text = extra.text.strip()
+        is_unit = ("יח" in text)
+        return text, is_unit
+    except:
+        pass
 
-        try:
-            number = item.find_element(By.CSS_SELECTOR, "span.number").text.strip()
-        except:
-            return None, None
+    try:
+        number = item.find_element(By.CSS_SELECTOR, "span.number").text.strip()
+    except:
+        return None, None
 
-        try:
-            unit = item.find_element(By.CSS_SELECTOR, "span.priceUnit").text.strip()
-        except:
-            unit = ""
+    try:
+        unit = item.find_element(By.CSS_SELECTOR, "span.priceUnit").text.strip()
+    except:
+        unit = ""
 
-        is_unit = ("יח" in unit)
-        return f"{number} {unit}".strip(), is_unit
+    is_unit = ("יח" in unit)
+    return f"{number} {unit}".strip(), is_unit
 
 
-    
-    wait = WebDriverWait(driver, 15)
-    price_per_gram_list = []
+def _shufersal_url(product):
+    return f"https://www.shufersal.co.il/online/he/search?text={urllib.parse.quote(product)}"
 
-    # ===============================
-    # לולאת החיפוש
-    # ===============================
-    for product in products:
-        url = f"https://www.shufersal.co.il/online/he/search?text={urllib.parse.quote(product)}"
-        driver.get(url)
-        time.sleep(2)
 
-        try:
-            items = wait.until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "li[data-product-code]"))
-            )
-        except:
-            price_per_gram_list.append(0)
-            continue
+def _shufersal_product_url(code):
+    return f"https://www.shufersal.co.il/online/he/p/{urllib.parse.quote(code)}"
 
-        if len(items) == 0:
-            price_per_gram_list.append(0)
-            continue
 
-        first_price, first_unit = extract_price(items[0])
+def _shufersal_choose(items):
+    """הפריט שנבחר (אינדקס) ומחירו: הראשון, או השני אם הראשון מתומחר ליחידה והשני לא"""
+    first_price, first_unit = _shufersal_extract_price(items[0])
+
+    if not first_unit:
+        return 0, first_price
+    if len(items) > 1:
+        second_price, second_unit = _shufersal_extract_price(items[1])
+        if not second_unit:
+            return 1, second_price
+    return 0, first_price
+
+
+def _shufersal_parse(items):
+    _, chosen_price = _shufersal_choose(items)
+    per_gram = _shufersal_per_gram(chosen_price)
+    return round(per_gram, 4)
 
-        if not first_unit:
-            chosen_price = first_price
-        else:
-            if len(items) > 1:
-                second_price, second_unit = extract_price(items[1])
-                chosen_price = second_price if not second_unit else first_price
-            else:
-                chosen_price = first_price
-
-        per_gram = convert_to_per_gram(chosen_price)
-        price_per_gram_list.append(round(per_gram, 4))
-
-    driver.quit()
-    return price_per_gram_list
-
-
-def get_prices_victory(products):
-    # ===============================
-    # חילוץ מספר
-    # ===============================
-    def extract_number(text):
-        m = re.search(r"([\d.]+)", text)
-        return float(m.group(1)) if m else None
-
-    # ===============================
-    # המרה למחיר ל־גרם
-    # ===============================
-    def convert_to_per_gram(price_text):
-        if not price_text:
-            return 0
-
-        price = extract_number(price_text)
-        if price is None:
-            return 0
 
-        if  'ק"ג' in price_text or "יחידה" in price_text:
-            return price / 1000
+def _shufersal_resolve(items):
+    """קוד המוצר שנבחר (data-product-code), או None"""
+    index, _ = _shufersal_choose(items)
+    return items[index].get_attribute("data-product-code") or None
 
-        if "100" in price_text:
-            return price / 100
 
+def get_prices_shufersal(products, shards=None, force=False):
+    return scrape_store("shufersal", products, shards, force)
+
+
+# ===============================
+# ויקטורי
+# ===============================
+
+def _victory_number(text):
+    """חילוץ מספר"""
+    m = re.search(r"([\d.]+)", text)
+    return float(m.group(1)) if m else None
+
+
+def _victory_per_gram(price_text):
+    """המרה למחיר ל־גרם"""
+    if not price_text:
         return 0
 
-    # ===============================
-    # שליפת מחיר
-    # ===============================
-    def extract_price(item):
+    price = _victory_number(price_text)
+    if price is None:
+        return 0
 
-        # ק"ג
-        try:
-            text = item.find_element(By.CSS_SELECTOR, "span.price").text.strip()
-            if 'ק"ג' in text:
-                return f"₪{extract_number(text)} לק\"ג"
-        except:
-            pass
+    if  'ק"ג' in price_text or "יחידה" in price_text:
+        return price / 1000
 
-        # 100 גרם
-        try:
-            text = item.find_element(By.CSS_SELECTOR, "span.normalize-price").text.strip()
-            if "100" in text:
-                return f"₪{extract_number(text)} ל־100 גרם"
-        except:
-            pass
+    if "100" in price_text:
+        return price / 100
 
-        # יחידה
-        try:
-            text = item.find_element(By.CSS_SELECTOR, "span.price").text.strip()
-            if extract_number(text) is not None:
-                return f"₪{extract_number(text)} ליחידה"
-        except:
-            pass
+    return 0
 
-        return None
 
-    # ===============================
-    # פתיחת דפדפן
-    # ===============================
-    driver = get_chrome_driver()
+def _victory_extract_price(item):
+    """שליפת מחיר"""
+
+    # ק"ג
+    try:
+        text = item.find_element(By.CSS_SELECTOR, "span.price").text.strip()
+        if 'ק"ג' in text:
+            return f"₪{_victory_number(text)} לק\"ג"
+    except:
+        pass
+
+    # 100 גרם
+    try:
+        text = item.find_element(By.CSS_SELECTOR, "span.normalize-price").text.strip()
+        if "100" in text:
+            return f"₪{_victory_number(text)} ל־100 גרם"
+    except:
+        pass
+
+    # יחידה
+    try:
+        text = item.find_element(By.CSS_SELECTOR, "span.price").text.strip()
+        if _victory_number(text) is not None:
+            return f"₪{_victory_number(text)} ליחידה"
+    except:
+        pass
 
-    wait = WebDriverWait(driver, 15)
-    price = []
+    return None
 
-    # ===============================
-    # לולאת חיפוש
-    # ===============================
-    for product in products:
-        url = f"https://www.victoryonline.co.il/search/{urllib.parse.quote(product)}"
-        driver.get(url)
-        time.sleep(2)
 
-        found_price_text = None
+def _victory_url(product):
+    return f"https://www.victoryonline.co.il/search/{urllib.parse.quote(product)}"
 
+
+def _victory_parse(name_divs):
+    found_price_text = None
+
+    for name_div in name_divs:
         try:
-            name_divs = wait.until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.name"))
+            item = name_div.find_element(
+                By.XPATH, "ancestor::*[contains(@class,'product')]"
             )
+            price_text = _victory_extract_price(item)
+            if price_text:
+                found_price_text = price_text
+                break
         except:
-            price.append(0)
             continue
 
-        for name_div in name_divs:
-            try:
-                item = name_div.find_element(
-                    By.XPATH, "ancestor::*[contains(@class,'product')]"
-                )
-                price_text = extract_price(item)
-                if price_text:
-                    found_price_text = price_text
-                    break
-            except:
-                continue
+    if not found_price_text:
+        return 0
+    return round(_victory_per_gram(found_price_text), 4)
 
-        if not found_price_text:
-            price.append(0)
-        else:
-            price.append(round(convert_to_per_gram(found_price_text), 4))
 
-    driver.quit()
-    return price
+def get_prices_victory(products, shards=None, force=False):
+    return scrape_store("victory", products, shards, force)
 
 
-def get_prices_from_rami_levy(products):
-    def get_unit_type(card):
-        try:
-            spans = card.find_elements(By.CSS_SELECTOR, "span.xs-text.mr-1.weight-500")
-            for s in spans:
-                t = s.text.strip()
-                if 'ק"ג' in t:
-                    return 'kg'
-                if 'יח' in t:
-                    return 'unit'
-        except:
-            pass
-        return None
+# ===============================
+# רמי לוי
+# ===============================
+
+def _rami_levy_unit_type(card):
+    try:
+        spans = card.find_elements(By.CSS_SELECTOR, "span.xs-text.mr-1.weight-500")
+        for s in spans:
+            t = s.text.strip()
+            if 'ק"ג' in t:
+                return 'kg'
+            if 'יח' in t:
+                return 'unit'
+    except:
+        pass
+    return None
+
 
-    # ===============================
-    # מחיר רגיל
-    # ===============================
-    def extract_regular_price(card):
-        text = card.text.replace("₪", " ").replace(",", ".")
+def _rami_levy_regular_price(card):
+    """מחיר רגיל"""
+    text = card.text.replace("₪", " ").replace(",", ".")
+    m = re.search(r"\d+\.\d{1,2}", text)
+    return float(m.group()) if m else None
+
+
+def _rami_levy_price_100g(card):
+    """מחיר ל־100 גרם"""
+    try:
+        span = card.find_element(
+            By.CSS_SELECTOR, "span.gray-dark.xs-text.font-weight-light"
+        )
+        text = span.text.replace("₪", "").replace(",", ".")
         m = re.search(r"\d+\.\d{1,2}", text)
         return float(m.group()) if m else None
+    except:
+        return None
 
-    # ===============================
-    # מחיר ל־100 גרם
-    # ===============================
-    def extract_price_100g(card):
-        try:
-            span = card.find_element(
-                By.CSS_SELECTOR, "span.gray-dark.xs-text.font-weight-light"
-            )
-            text = span.text.replace("₪", "").replace(",", ".")
-            m = re.search(r"\d+\.\d{1,2}", text)
-            return float(m.group()) if m else None
-        except:
-            return None
 
-    # ===============================
-    # פתיחת דפדפן
-    # ===============================
-    driver = get_chrome_driver()
+def _rami_levy_url(product):
+    return f"https://www.rami-levy.co.il/he/online/search?q={urllib.parse.quote(product)}"
 
-    wait = WebDriverWait(driver, 25)
 
-    price = []
+def _rami_levy_parse(items):
+    card = items[0]  # פריט ראשון
+    unit_type = _rami_levy_unit_type(card)
 
-    # ===============================
-    # לולאת חיפוש
-    # ===============================
-    for product in products:
-        url = f"https://www.rami-levy.co.il/he/online/search?q={urllib.parse.quote(product)}"
-        driver.get(url)
+    # ---------- לוגיקה ----------
+    if unit_type == 'unit':
+        # אם יחידה – ננסה 100 גרם
+        p100 = _rami_levy_price_100g(card)
+        if p100 is not None:
+            return round(p100 / 100, 4)  # /100
+        pr = _rami_levy_regular_price(card)
+        if pr is not None:
+            return round(pr / 1000, 4)  # /1000 גם ליחידה
+        return 0
 
-        try:
-            items = wait.until(
-                EC.presence_of_all_elements_located(
-                    (By.CSS_SELECTOR, "div[role='list'] div.product-flex")
-                )
-            )
-        except:
-            price.append(0)
-            continue
+    # ק״ג (או לא ידוע)
+    pr = _rami_levy_regular_price(card)
+    if pr is not None:
+        return round(pr / 1000, 4)  # /1000
+    return 0
 
-        if not items:
-            price.append(0)
-            continue
 
-        card = items[0]  # פריט ראשון
-        unit_type = get_unit_type(card)
-
-        # ---------- לוגיקה ----------
-        if unit_type == 'unit':
-            # אם יחידה – ננסה 100 גרם
-            p100 = extract_price_100g(card)
-            if p100 is not None:
-                price.append(round(p100 / 100, 4))  # /100
-            else:
-                pr = extract_regular_price(card)
-                if pr is not None:
-                    price.append(round(pr / 1000, 4))  # /1000 גם ליחידה
-                else:
-                    price.append(0)
+# API החיפוש שמאחורי דף החיפוש (הדף עצמו נבנה ב-JavaScript)
+RAMI_LEVY_API_URL = "https://www.rami-levy.co.il/api/catalog"
+
+
+def _rami_levy_api_url(product):
+    return RAMI_LEVY_API_URL
+
+
+def _rami_levy_api_body(product):
+    return {"q": product, "aggs": 1, "store": SCRAPER_RAMI_LEVY_STORE_ID}
+
+
+def _rami_levy_net_grams(item):
+    """תכולה נטו בגרם (או מ"ל) מתוך gs.Net_Content, או None"""
+    content = ((item.get("gs") or {}).get("Net_Content") or {})
+    try:
+        value = float(str(content.get("value", "")).replace(",", "."))
+    except ValueError:
+        return None
+    uom = content.get("UOM") or ""
+    if 'ק"ג' in uom or "קילו" in uom or "ליטר" in uom:
+        value *= 1000
+    return value if value > 0 else None
+
+
+def _rami_levy_parse_json(data):
+    """
+    אותה לוגיקה של _rami_levy_parse על תשובת ה-API: הפריט הראשון;
+    נמכר לפי משקל - מחיר לק"ג /1000, יחידה - מחיר / תכולה בגרם (כמו "ל-100 גרם" בדף), אחרת /1000
+    """
+    items = (data or {}).get("data") or []
+    if not items:
+        return 0
+    item = items[0]
+    price = (item.get("price") or {}).get("price")
+    if not price:
+        return 0
+    if (item.get("prop") or {}).get("by_kilo"):
+        return round(price / 1000, 4)
+    grams = _rami_levy_net_grams(item)
+    if grams:
+        return round(price / grams, 4)
+    return round(price / 1000, 4)
+
+
+def get_prices_from_rami_levy(products, shards=None, force=False):
+    return scrape_store("rami_levy", products, shards, force)
+
+
+# ===============================
+# סריקה מחולקת לכמה דפדפנים
+# ===============================
+
+# לכל חנות: כתובת החיפוש, selector של רשימת התוצאות, selector של "לא נמצאו מוצרים",
+# פונקציה שמחלצת מחיר לגרם מהתוצאות, וה-timeout ההתחלתי (עד שנצברות מדידות).
+# http - לנסות קודם את המסלול המהיר על דף החיפוש (רק בחנות שהמחירים בה מגיעים ב-HTML מהשרת),
+# api - API חיפוש שמחזיר JSON: כתובת, גוף הבקשה (None = GET) ופונקציה שמחלצת מחיר לגרם מהתשובה,
+# block_resources - לחסום בדפדפן תמונות/מדיה/פונטים/SCRAPER_BLOCKED_DOMAINS בחנות הזו
+# (SCRAPER_BLOCK_RESOURCES_<STORE> בסביבה).
+# resolve - קוד המוצר שנבחר מתוך התוצאות (נשמר ב-product_index); בסריקה הבאה נטען
+# product_url(קוד) ישירות, והמחיר מחולץ באותה פונקציית parse רק מהאלמנט של product_results
+# שה-data-product-code שלו הוא הקוד השמור (בדף יש גם מוצרים קשורים/מומלצים)
+STORE_PAGES = {
+    "shufersal": {
+        "url": _shufersal_url,
+        "results": "li[data-product-code]",
+        "empty": ".noResults, .no-results, .searchNoResults",
+        "parse": _shufersal_parse,
+        "http": True,
+        "api": None,
+        "block_resources": SCRAPER_STORE_BLOCK_RESOURCES["shufersal"],
+        "timeout": 15,
+        "resolve": _shufersal_resolve,
+        "product_url": _shufersal_product_url,
+        "product_results": "[data-product-code]",
+    },
+    "victory": {
+        "url": _victory_url,
+        "results": "div.name",
+        "empty": ".no-results, .noResults, .empty-search",
+        "parse": _victory_parse,
+        # רשימת התוצאות נבנית ב-JavaScript - בקשת HTTP לא תמצא בה מחיר
+        "http": False,
+        "api": None,
+        "block_resources": SCRAPER_STORE_BLOCK_RESOURCES["victory"],
+        "timeout": 15,
+        # אין בכרטיס קוד מוצר יציב - תמיד דרך החיפוש
+        "resolve": None,
+    },
+    "rami_levy": {
+        "url": _rami_levy_url,
+        "results": "div[role='list'] div.product-flex",
+        "empty": ".no-results, .empty-search, .search-no-results",
+        "parse": _rami_levy_parse,
+        # הדף נבנה ב-JavaScript; המחירים מגיעים מ-API החיפוש
+        "http": False,
+        "api": {"url": _rami_levy_api_url, "body": _rami_levy_api_body, "parse": _rami_levy_parse_json},
+        "block_resources": SCRAPER_STORE_BLOCK_RESOURCES["rami_levy"],
+        "timeout": 25,
+        # אין בכרטיס קוד מוצר יציב - תמיד דרך החיפוש
+        "resolve": None,
+    },
+}
+
+# זמני טעינה לכל חנות - מהם נגזר ה-timeout של הטעינה הבאה
+STORE_LATENCY = {
+    store: LatencyTracker(
+        page["timeout"],
+        min_timeout=SCRAPER_WAIT_MIN,
+        max_timeout=SCRAPER_WAIT_MAX,
+        percentile=SCRAPER_WAIT_PERCENTILE,
+        factor=SCRAPER_WAIT_FACTOR,
+    )
+    for store, page in STORE_PAGES.items()
+}
+
+# חיבורי HTTP משותפים לכל הסריקות בתהליך (מסלול מהיר בלי דפדפן)
+http_fetcher = HttpFetcher(pool_size=SCRAPER_HTTP_POOL_SIZE, timeout=SCRAPER_HTTP_TIMEOUT)
+
+# מחירים שכבר נסרקו, לפי (חנות, מוצר) - משותף לכל ה-workers
+price_cache = PriceCache(PRICE_CACHE_PATH, PRICE_CACHE_TTL, PRICE_CACHE_STORE_TTL) if PRICE_CACHE_ENABLED else None
+
+# המוצר שנבחר בחיפוש לכל (חנות, מזון) - הסריקה הבאה הולכת ישר לדף המוצר
+product_index = ProductIndex(PRODUCT_INDEX_PATH) if PRODUCT_INDEX_ENABLED else None
+
+# מפסק לכל חנות - חנות שלא עונה מדולגת במקום לחכות ל-timeout על כל מוצר
+breakers = BreakerBoard(
+    SCRAPER_BREAKER_PATH, STORE_PAGES,
+    threshold=SCRAPER_BREAKER_THRESHOLD,
+    backoff=SCRAPER_BREAKER_BACKOFF,
+    max_backoff=SCRAPER_BREAKER_MAX_BACKOFF,
+)
+
+# תבניות ה-URL שנחסמות בחנויות עם block_resources
+BLOCKED_URLS = blocked_url_patterns(SCRAPER_BLOCKED_DOMAINS)
+
+# תוצאת ההמתנה כשהאתר הציג "לא נמצאו מוצרים"
+NO_RESULTS = "no-results"
+
+
+def _results_or_empty(results, empty):
+    """
+    תנאי ל-WebDriverWait: רשימת התוצאות ברגע שהיא מופיעה, NO_RESULTS אם הופיע סימון "אין תוצאות"
+    """
+    def condition(driver):
+        items = driver.find_elements(By.CSS_SELECTOR, results)
+        if items:
+            return items
+        if driver.find_elements(By.CSS_SELECTOR, empty):
+            return NO_RESULTS
+        return False
+    return condition
+
+
+def _resolved_code(store, product):
+    """קוד המוצר שנבחר בחיפוש קודם, או None"""
+    if product_index is None or not STORE_PAGES[store]["resolve"]:
+        return None
+    entry = product_index.get(store, product)
+    return entry["code"] if entry else None
+
+
+def _remember_product(store, product, items):
+    """שומר את המוצר שנבחר מתוך תוצאות החיפוש, כדי שבפעם הבאה ייטען דף המוצר ישירות"""
+    page = STORE_PAGES[store]
+    if product_index is None or not page["resolve"]:
+        return
+    code = page["resolve"](items)
+    if code:
+        product_index.put(store, product, code, page["product_url"](code))
+
+
+def _product_items(items, code):
+    """
+    רק התוצאות של המוצר השמור (data-product-code == code) - דף מוצר מציג גם מוצרים קשורים.
+    מוצר שלא מופיע בדף - NO_RESULTS; None (timeout) נשאר None.
+    """
+    if items is None or items == NO_RESULTS:
+        return items
+    return [item for item in items if item.get_attribute("data-product-code") == code] or NO_RESULTS
+
+
+def _http_items(url, results):
+    html = http_fetcher.get(url)
+    if html is None:
+        return []
+    return parse_html(html).find_elements(By.CSS_SELECTOR, results)
+
+
+def _api_price(store, product):
+    """מחיר לגרם מ-API החיפוש של החנות, או None"""
+    api = STORE_PAGES[store]["api"]
+    body = api["body"](product) if api["body"] else None
+    data = http_fetcher.get_json(api["url"](product), body)
+    if data is None:
+        return None
+    try:
+        return api["parse"](data) or None
+    except Exception as e:
+        print(f"⚠️ {store}: חילוץ מ-JSON נכשל עבור {product}: {e}")
+        return None
+
+
+def _html_price(store, product, url, results, code=None):
+    """
+    מחיר לגרם מדף HTML סטטי באותה פונקציית חילוץ של הדפדפן, או None.
+    code - דף המוצר השמור: המחיר נלקח רק מהאלמנט של הקוד; בלי code - דף חיפוש,
+    והמוצר שנבחר נשמר ב-product_index.
+    """
+    page = STORE_PAGES[store]
+    items = _http_items(url, results)
+    if code is not None:
+        items = _product_items(items, code)
+    if not items or items == NO_RESULTS:
+        return None
+    try:
+        price = page["parse"](items)
+    except Exception as e:
+        print(f"⚠️ {store}: חילוץ מ-HTML נכשל עבור {product}: {e}")
+        return None
+    if price and code is None:
+        _remember_product(store, product, items)
+    return price or None
+
+
+def _http_price(store, product):
+    """
+    מסלול מהיר ב-HTTP רגיל, בלי דפדפן, לפי הסדר: דף המוצר (אם המוצר כבר נמצא בעבר),
+    API החיפוש (api), ודף החיפוש הסטטי (http).
+
+    Returns:
+        (מחיר, כתובת הדף שממנו נקרא) - (None, None) אם לא חולץ מחיר, ואז המוצר נסרק בדפדפן.
+        מחיר מה-API נרשם עם כתובת דף החיפוש שה-API מגיש.
+    """
+    page = STORE_PAGES[store]
+    code = _resolved_code(store, product)
+    if code is not None:
+        url = page["product_url"](code)
+        price = _html_price(store, product, url, page["product_results"], code)
+        if price:
+            return price, url
+        # המוצר לא בדף (ירד מהאתר או שהקוד השתנה) - חיפוש מחדש
+        product_index.forget(store, product)
+    if page["api"]:
+        price = _api_price(store, product)
+        if price:
+            return price, page["url"](product)
+    if page["http"]:
+        url = page["url"](product)
+        price = _html_price(store, product, url, page["results"])
+        if price:
+            return price, url
+    return None, None
+
+
+def _wait_for_results(driver, url, results, empty, timeout):
+    """
+    טוען url ומחכה עד שמופיעות תוצאות או "אין תוצאות" - בלי השהייה קבועה.
+
+    Returns:
+        (רשימת התוצאות / NO_RESULTS / None אם נגמר ה-timeout, שניות המתנה)
+    """
+    started = time.perf_counter()
+    driver.get(url)
+    try:
+        items = WebDriverWait(driver, timeout, poll_frequency=0.1).until(_results_or_empty(results, empty))
+    except TimeoutException:
+        items = None
+    return items, time.perf_counter() - started
+
+
+def _parse_items(parse, items):
+    """(מחיר, שניות חילוץ) - 0 אם אין תוצאות"""
+    if items is None or items == NO_RESULTS:
+        return 0, 0.0
+    started = time.perf_counter()
+    price = parse(items)
+    return price, time.perf_counter() - started
+
+
+def _load_page(store, driver, product):
+    """
+    מחיר לגרם של מוצר בדפדפן (0 אם לא נמצא).
+    אם המוצר נמצא בעבר - נטען דף המוצר ישירות; אם המוצר השמור לא מופיע בו או שאין לו מחיר
+    (ירד מהאתר) הרשומה נמחקת מ-product_index וחוזרים לדף החיפוש, והמוצר שנבחר בו נשמר מחדש.
+
+    Returns:
+        (מחיר, שניות המתנה, שניות חילוץ, כתובת הדף שממנו נקרא המחיר)
+    """
+    page = STORE_PAGES[store]
+    latency = STORE_LATENCY[store]
+
+    blocking = SCRAPER_BLOCK_RESOURCES and page["block_resources"]
+    set_resource_blocking(driver, BLOCKED_URLS if blocking else [])
+
+    wait_seconds = parse_seconds = 0.0
+
+    code = _resolved_code(store, product)
+    if code is not None:
+        url = page["product_url"](code)
+        items, waited = _wait_for_results(driver, url, page["product_results"], page["empty"], latency.timeout())
+        items = _product_items(items, code)
+        price, parsed = _parse_items(page["parse"], items)
+        latency.record(waited, parsed, timed_out=items is None)
+        wait_seconds += waited
+        parse_seconds += parsed
+        if price:
+            _record_outcome(store, items, price)
+            return price, wait_seconds, parse_seconds, url
+        product_index.forget(store, product)
+
+    timeout = latency.timeout()
+    url = page["url"](product)
+    items, waited = _wait_for_results(driver, url, page["results"], page["empty"], timeout)
+    price, parsed = _parse_items(page["parse"], items)
+    latency.record(waited, parsed, timed_out=items is None)
+    if price:
+        _remember_product(store, product, items)
+    _record_outcome(store, items, price, timeout)
+    return price, wait_seconds + waited, parse_seconds + parsed, url
+
+
+def _record_outcome(store, items, price, timeout=None):
+    """
+    הצלחה/כשלון של טעינה למפסק החנות: timeout, או תוצאות שלא חולץ מהן מחיר
+    (כנראה שהמבנה של הדף השתנה) - כשלון. "אין תוצאות" - האתר עונה, הצלחה.
+    """
+    if breakers is None:
+        return
+    breaker = breakers.get(store)
+    if items is None:
+        breaker.record_failure(f"timeout ({timeout:.0f}s)" if timeout else "timeout")
+    elif items != NO_RESULTS and not price:
+        breaker.record_failure("התוצאות נטענו אבל לא חולץ מחיר")
+    else:
+        breaker.record_success()
+
+
+# כמה דפדפנים פתוחים לכל היותר מול כל אתר - משותף לכל הסריקות בתהליך
+_domain_slots = {
+    store: threading.BoundedSemaphore(SCRAPER_DOMAIN_CONCURRENCY) for store in STORE_PAGES
+}
+
+# זמני הסריקה האחרונה לכל חנות, רשומה לכל shard
+SHARD_STATS = {}
+_stats_lock = threading.Lock()
+
+
+def _scrape_shard(store, shard, indexed_products, prices, sources):
+    """
+    סורק את המוצרים של shard אחד וכותב כל מחיר לאינדקס המקורי שלו,
+    ואת כתובת הדף שממנו נקרא (דף המוצר או דף החיפוש) לאותו אינדקס ב-sources.
+    קודם מנסה HTTP רגיל (_http_price), ורק אם לא נמצא מחיר - דפדפן.
+    כשמפסק החנות פתוח המוצר מדולג (None - המחיר הקיים נשמר), ושגיאה במוצר אחד לא עוצרת את השאר.
+    כל דף נטען בדפדפן מושאל מ-driver_pool (דפדפן שנשחק ממוחזר בין דף לדף).
+    """
+    wait_seconds = parse_seconds = 0.0
+    http_hits = skipped = 0
+    use_http = SCRAPER_HTTP_FIRST and bool(STORE_PAGES[store]["http"] or STORE_PAGES[store]["api"])
+    breaker = breakers.get(store) if breakers is not None else None
+    with _domain_slots[store]:
+        started = time.perf_counter()
+        for index, product in indexed_products:
+            # המפסק פתוח - לא מחכים ל-timeout על כל מוצר; המחיר הקיים נשאר (None)
+            if breaker is not None and not breaker.allow():
+                prices[index] = None
+                skipped += 1
+                continue
+            if use_http:
+                price, url = _http_price(store, product)
+                if price is not None:
+                    prices[index], sources[index] = price, url
+                    http_hits += 1
+                    if breaker is not None:
+                        breaker.record_success()
+                    continue
+            try:
+                with driver_pool.driver() as driver:
+                    prices[index], waited, parsed, sources[index] = _load_page(store, driver, product)
+            except Exception as e:
+                print(f"⚠️ {store}: {product}: {e}")
+                prices[index] = None
+                if breaker is not None:
+                    breaker.record_failure(e)
+                continue
+            wait_seconds += waited
+            parse_seconds += parsed
+        elapsed = time.perf_counter() - started
+
+    return {
+        "shard": shard,
+        "products": len(indexed_products),
+        "seconds": round(elapsed, 2),
+        "seconds_per_product": round(elapsed / len(indexed_products), 2),
+        "wait_seconds": round(wait_seconds, 2),
+        "parse_seconds": round(parse_seconds, 2),
+        "http_hits": http_hits,
+        "skipped": skipped,
+    }
+
+
+def scrape_store(store, products, shards=None, force=False):
+    """
+    מחירים לגרם לכל המוצרים בחנות, באותו סדר של products
+    (None למוצר שלא נסרק - מפסק החנות פתוח או שגיאה).
+
+    קודם נבדק price_cache: מוצר עם מחיר בתוקף לא נסרק שוב (force=True - סורק הכל).
+    השאר מחולקים ל-shards חלקים (ברירת מחדל SCRAPER_SHARDS), כל אחד בדפדפן משלו.
+    לכל היותר SCRAPER_DOMAIN_CONCURRENCY דפדפנים רצים מול אותה חנות בו-זמנית.
+    זמני כל shard (כולל המתנה מול חילוץ) נשמרים ב-SHARD_STATS[store],
+    וזמני הטעינה המצטברים ב-STORE_LATENCY[store].
+    """
+    products = list(products)
+    if not products:
+        return []
+
+    prices = [0] * len(products)
+    sources = [None] * len(products)
+    cached = {}
+    if price_cache is not None and not force:
+        cached = price_cache.get_many(store, products)
+
+    pending = []
+    for index, product in enumerate(products):
+        price = cached.get(normalize_name(product))
+        if price is None:
+            pending.append((index, product))
         else:
-            # ק״ג (או לא ידוע)
-            pr = extract_regular_price(card)
-            if pr is not None:
-                price.append(round(pr / 1000, 4))  # /1000
-            else:
-                price.append(0)
-
-    driver.quit()
-
-    # ===============================
-    # הפלט היחיד
-    # ===============================
-    return price
\ No newline at end of file
+            prices[index] = price
+
+    if not pending:
+        print(f"💾 {store}: כל {len(products)} המחירים מהמטמון")
+        return prices
+
+    shards = max(1, min(shards or SCRAPER_SHARDS, len(pending)))
+
+    # חלוקה לסירוגין - מוצרים "קשים" סמוכים לא נופלים כולם על אותו shard
+    parts = [pending[k::shards] for k in range(shards)]
+
+    if shards == 1:
+        stats = [_scrape_shard(store, 0, parts[0], prices, sources)]
+    else:
+        with ThreadPoolExecutor(max_workers=shards) as executor:
+            futures = [
+                executor.submit(_scrape_shard, store, k, part, prices, sources)
+                for k, part in enumerate(parts)
+            ]
+            stats = [future.result() for future in futures]
+
+    if price_cache is not None:
+        price_cache.put_many(store, [(product, prices[index], sources[index]) for index, product in pending])
+    if cached:
+        print(f"💾 {store}: {len(products) - len(pending)} מחירים מהמטמון, {len(pending)} נסרקו")
+
+    with _stats_lock:
+        SHARD_STATS[store] = stats
+    for stat in stats:
+        print(f"⏱️ {store} shard {stat['shard']}: {stat['products']} מוצרים ב-{stat['seconds']} שניות "
+              f"({stat['seconds_per_product']} למוצר, המתנה {stat['wait_seconds']}, חילוץ {stat['parse_seconds']}, "
+              f"{stat['http_hits']} בלי דפדפן, {stat['skipped']} דולגו - חנות לא זמינה)")
+    latency = STORE_LATENCY[store].stats()
+    print(f"⏱️ {store}: p50 {latency.get('p50')} / p95 {latency.get('p95')} שניות, "
+          f"timeout הבא {latency['timeout']}, {latency['timeouts']} טעינות נכשלו על timeout")
+
+    return prices
+
+
+# ===============================
+# כל החנויות במקביל
+# ===============================
+
+# שם החנות (כמו ב-food["prices"]) -> פונקציית הסריקה שלה
+STORE_SCRAPERS = {
+    "shufersal": get_prices_shufersal,
+    "victory": get_prices_victory,
+    "rami_levy": get_prices_from_rami_levy,
+}
+
+
+def get_prices_all_stores(products, workers=3, stores=None, force=False):
+    """
+    סורק את החנויות במקביל - כל חנות בדפדפן משלה, עד workers חנויות בו-זמנית.
+    force=True - מתעלם ממחירים שמורים ב-price_cache.
+
+    Returns:
+        {חנות: רשימת מחירים לגרם באותו סדר של products}, או None לחנות שהסריקה שלה נכשלה
+        (כדי שהמחירים הקיימים שלה לא יימחקו)
+    """
+    stores = list(stores or STORE_SCRAPERS)
+    results = {}
+
+    def scrape(store):
+        started = time.perf_counter()
+        try:
+            prices = STORE_SCRAPERS[store](products, force=force)
+        except Exception as e:
+            print(f"❌ סריקת {store} נכשלה: {e}")
+            return None
+        print(f"⏱️ {store}: {len(products)} מוצרים ב-{time.perf_counter() - started:.1f} שניות")
+        return prices
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(stores)))) as executor:
+        futures = {store: executor.submit(scrape, store) for store in stores}
+        for store, future in futures.items():
+            results[store] = future.result()
+
+    return results
@@ -0,0 +1,140 @@
+import re
+from html.parser import HTMLParser
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+# תגיות בלי תגית סגירה
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# תוכן שלא מוצג בדף - לא נכנס ל-text
+HIDDEN_TAGS = {"script", "style", "template", "noscript", "head", "title"}
+
+ANCESTOR_CLASS_XPATH = re.compile(r"""^ancestor::\*\[contains\(@class,\s*'([^']+)'\)\]$""")
+COMPOUND = re.compile(r"""([a-zA-Z][\w-]*)|\.([\w-]+)|\[([\w-]+)(=['"]?([^'"\]]*)['"]?)?\]""")
+
+
+class Element:
+    """
+    אלמנט ב-HTML סטטי עם אותו ממשק כמו WebElement של Selenium שבו משתמשות פונקציות החילוץ:
+    find_element / find_elements (CSS selector פשוט או XPath של ancestor לפי class) ו-text.
+    """
+
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = set((attrs.get("class") or "").split())
+        self.parent = parent
+        self.children = []   # Element או str
+
+    @property
+    def text(self):
+        """הטקסט המוצג - כמו WebElement.text (רווחים מנורמלים)"""
+        parts = []
+
+        def collect(node):
+            for child in node.children:
+                if isinstance(child, str):
+                    parts.append(child)
+                elif child.tag not in HIDDEN_TAGS:
+                    collect(child)
+                    if child.tag in ("br", "p", "div", "li"):
+                        parts.append(" ")
+
+        collect(self)
+        return " ".join("".join(parts).split())
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def _descendants(self):
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+                yield from child._descendants()
+
+    def _matches(self, compound):
+        for tag, cls, attr, equals, value in compound:
+            if tag and self.tag != tag.lower():
+                return False
+            if cls and cls not in self.classes:
+                return False
+            if attr and (attr not in self.attrs or (equals and self.attrs[attr] != value)):
+                return False
+        return True
+
+    def _matches_chain(self, chain):
+        """chain - compound selectors מופרדים ברווח (descendant); האחרון חייב להתאים לאלמנט עצמו"""
+        if not self._matches(chain[-1]):
+            return False
+        rest = chain[:-1]
+        node = self.parent
+        while rest and node is not None:
+            if node._matches(rest[-1]):
+                rest = rest[:-1]
+            node = node.parent
+        return not rest
+
+    def find_elements(self, by, selector):
+        if by == By.XPATH:
+            match = ANCESTOR_CLASS_XPATH.match(selector.strip())
+            if not match:
+                raise ValueError(f"XPath לא נתמך: {selector}")
+            found = []
+            node = self.parent
+            while node is not None and node.tag != "#document":
+                if match.group(1) in node.attrs.get("class", ""):
+                    found.append(node)
+                node = node.parent
+            # כמו ב-Selenium: התוצאות בסדר המסמך (החיצוני ביותר ראשון)
+            return found[::-1]
+
+        chains = [
+            [COMPOUND.findall(part) for part in group.split()]
+            for group in selector.split(",") if group.strip()
+        ]
+        return [
+            element for element in self._descendants()
+            if any(element._matches_chain(chain) for chain in chains)
+        ]
+
+    def find_element(self, by, selector):
+        found = self.find_elements(by, selector)
+        if not found:
+            raise NoSuchElementException(selector)
+        return found[0]
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", {})
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, {name: value or "" for name, value in attrs}, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_TAGS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        element = Element(tag, {name: value or "" for name, value in attrs}, self.current)
+        self.current.children.append(element)
+
+    def handle_endtag(self, tag):
+        # סוגר עד התגית התואמת (HTML לא תקין - תגיות שלא נסגרו)
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def parse_html(html):
+    """עץ Element מ-HTML (השורש הוא #document)"""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
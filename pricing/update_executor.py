@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueueFull(Exception):
+    """יותר מדי עדכוני מחירים ממתינים - לנסות שוב מאוחר יותר"""
+
+
+class PriceUpdateExecutor:
+    """
+    עדכוני מחירים של מזונות בודדים (אחרי הוספה/עריכה) במספר קבוע של threads, במקום thread
+    ושלושה דפדפנים לכל מזון:
+
+    - מזון שכבר ממתין בתור (או רץ עכשיו באותו שם) לא נכנס שוב - מקבלים את המשימה הקיימת.
+      עריכה נותנת למזון id חדש: submit עם replaces=ה-id הקודם מעביר את המשימה הממתינה ל-id החדש
+    - מזונות שממתינים יחד נסרקים בקריאה אחת לכל חנות (עד batch_size), אחרי המתנה קצרה
+      של batch_wait שניות לעוד מזונות
+    - מעל max_pending מזונות ממתינים - QueueFull (backpressure)
+
+    create_task(food_id, name) -> task_id   יוצר את רשומת המשימה
+    retarget_task(task_id, food_id, name)    מעדכן משימה ממתינה שהמזון שלה קיבל id חדש
+    run_batch([(task_id, food_id)])          מעדכן את המחירים ואת סטטוס המשימות
+    """
+
+    def __init__(self, create_task, run_batch, workers=1, max_pending=20, batch_size=10, batch_wait=2.0,
+                 retarget_task=None):
+        self.create_task = create_task
+        self.run_batch = run_batch
+        self.retarget_task = retarget_task
+        self.workers = workers
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+        self._pending = OrderedDict()   # food_id -> {"task_id", "name"}
+        self._running = {}              # food_id -> {"task_id", "name"}
+        self._cond = threading.Condition()
+        self._threads = []
+        self.merged = 0
+        self.rejected = 0
+        self.batches = 0
+
+    def submit(self, food_id, name, replaces=None):
+        """
+        מחזיר task_id - של משימה חדשה או של המשימה הקיימת של המזון.
+        replaces - ה-id הקודם של המזון (עריכה מחליפה את ה-id); משימה שעוד ממתינה עבורו
+        עוברת ל-food_id במקום שתיכשל על מזון שכבר לא קיים.
+        Raises QueueFull אם התור מלא.
+        """
+        with self._cond:
+            pending = self._pending.get(food_id)
+            if pending is None and replaces is not None and replaces in self._pending:
+                pending = self._pending.pop(replaces)
+                self._pending[food_id] = pending
+                if self.retarget_task is not None:
+                    self.retarget_task(pending["task_id"], food_id, name)
+            if pending is not None:
+                # השם נקרא מהקטלוג בזמן הסריקה - עריכה נוספת נכנסת לאותה משימה
+                pending["name"] = name
+                self.merged += 1
+                return pending["task_id"]
+
+            running = self._running.get(food_id)
+            if running is not None and running["name"] == name:
+                self.merged += 1
+                return running["task_id"]
+
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{len(self._pending)} עדכוני מחירים כבר ממתינים")
+
+            task_id = self.create_task(food_id, name)
+            self._pending[food_id] = {"task_id": task_id, "name": name}
+            self._start_workers()
+            self._cond.notify()
+            return task_id
+
+    def _start_workers(self):
+        # ה-threads נוצרים רק בשימוש הראשון (ולא ב-import, לפני ה-fork של gunicorn)
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _ready(self):
+        """מזונות ממתינים שלא רצים עכשיו (מזון שנערך באמצע סריקה מחכה לסיומה)"""
+        return [food_id for food_id in self._pending if food_id not in self._running]
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._ready():
+                self._cond.wait()
+
+            deadline = time.monotonic() + self.batch_wait
+            while len(self._ready()) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            for food_id in self._ready()[:self.batch_size]:
+                entry = self._pending.pop(food_id)
+                self._running[food_id] = entry
+                batch.append((entry["task_id"], food_id))
+            self.batches += 1
+            return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self.run_batch(batch)
+            except Exception as e:
+                print(f"❌ עדכון מחירים ל-{len(batch)} מזונות: {e}")
+            finally:
+                with self._cond:
+                    for _, food_id in batch:
+                        self._running.pop(food_id, None)
+                    self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "running": len(self._running),
+                "max_pending": self.max_pending,
+                "batches": self.batches,
+                "merged": self.merged,
+                "rejected": self.rejected,
+            }
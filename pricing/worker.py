@@ -0,0 +1,139 @@
+"""
+תהליך סריקה נפרד מה-workers של gunicorn:
+
+    python -m pricing.worker
+
+ה-web מכניס משימת סריקה לתור (submit_scrape) - טבלת jobs של JobStore בקובץ SQLite משותף -
+ותהליך הסריקה לוקח משימות מהתור, מריץ את הדפדפנים וכותב את המחירים בחזרה:
+לתוצאת המשימה (מחיר לכל מוצר בכל חנות) ולמטמון המחירים המשותף.
+ה-workers של ה-web קוראים את המחירים החדשים מהמטמון (sync_prices_from_cache ב-app.py),
+כך שגם worker שלא שלח את המשימה מגיש אותם.
+כך Chrome לא רץ בתוך תהליכי ה-web, ואפשר להריץ כמה תהליכי סריקה על אותו תור.
+"""
+
+import argparse
+import signal
+import threading
+import time
+
+from job_store import JobStore, RUNNING, COMPLETED, FAILED
+from pricing import scrapers
+from config import (
+    SCRAPER_STORE_WORKERS, SCRAPER_QUEUE_PATH, SCRAPER_WORKER_POLL,
+    SCRAPER_WORKER_TIMEOUT, SCRAPER_WORKER_HEARTBEAT, SCRAPER_WORKER_STALE, JOB_TTL,
+)
+
+SCRAPE_JOB = "scrape"
+
+
+def submit_scrape(queue, products, force=False, timeout=SCRAPER_WORKER_TIMEOUT, interval=0.5):
+    """
+    צד ה-web: מכניס משימת סריקה לתור ומחכה לתוצאה.
+
+    Returns:
+        {חנות: רשימת מחירים לגרם או None} - כמו get_prices_all_stores
+
+    Raises:
+        TimeoutError אם תהליך הסריקה לא סיים תוך timeout שניות (למשל - לא רץ),
+        RuntimeError אם המשימה נכשלה
+    """
+    job_id = queue.create(SCRAPE_JOB, f"{len(products)} מוצרים", payload={
+        "products": list(products),
+        "force": bool(force),
+    })
+    deadline = time.monotonic() + timeout
+    after = 0
+    while True:
+        job = queue.wait(job_id, after, timeout=max(0.0, min(10.0, deadline - time.monotonic())), interval=interval)
+        if job is None:
+            raise RuntimeError(f"משימת הסריקה {job_id} נמחקה")
+        if job["events"]:
+            after = job["events"][-1]["seq"]
+        if job["status"] == COMPLETED:
+            return job["result"]["prices"]
+        if job["status"] == FAILED:
+            raise RuntimeError(job["message"] or "הסריקה נכשלה")
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"תהליך הסריקה לא סיים את משימה {job_id} תוך {timeout:.0f} שניות")
+
+
+def _heartbeat(queue, job_id, done, interval):
+    """מעדכן את updated_at של המשימה כל interval שניות עד done - כדי ש-requeue_stale לא יחזיר אותה לתור"""
+    while not done.wait(interval):
+        if not queue.update(job_id, RUNNING):
+            return
+
+
+def run_job(queue, job, heartbeat=SCRAPER_WORKER_HEARTBEAT):
+    """מריץ משימת סריקה אחת שנלקחה מהתור ושומר את התוצאה"""
+    job_id = job["id"]
+    payload = job["payload"] or {}
+    products = payload.get("products", [])
+    started = time.time()
+    done = threading.Event()
+    threading.Thread(target=_heartbeat, args=(queue, job_id, done, heartbeat), daemon=True).start()
+    try:
+        queue.add_event(job_id, {"type": "started", "products": len(products)})
+        prices = scrapers.get_prices_all_stores(
+            products, workers=SCRAPER_STORE_WORKERS, force=payload.get("force", False)
+        )
+        failed = [store for store, store_prices in prices.items() if store_prices is None]
+        queue.update(job_id, COMPLETED, f"נסרקו {len(products)} מוצרים ב-{time.time() - started:.1f} שניות", result={
+            "prices": prices,
+            "failed_stores": failed,
+        })
+    except Exception as e:
+        print(f"❌ משימת סריקה {job_id}: {e}")
+        queue.update(job_id, FAILED, f"שגיאה בסריקה: {e}")
+    finally:
+        done.set()
+
+
+def run_worker(queue, poll_interval=SCRAPER_WORKER_POLL, stop=None, once=False):
+    """
+    הלולאה של תהליך הסריקה: לוקח משימה (claim), מריץ, וחוזר. בלי משימות - ממתין poll_interval.
+    stop (threading.Event) - עוצר אחרי המשימה הנוכחית. once - יוצא כשהתור ריק.
+    """
+    stop = stop or threading.Event()
+
+    last_requeue = last_evict = float("-inf")
+    while not stop.is_set():
+        # משימות של תהליך סריקה אחר שנפל (הפסיק לשלוח heartbeat) חוזרות לתור
+        if time.monotonic() - last_requeue > SCRAPER_WORKER_HEARTBEAT:
+            requeued = queue.requeue_stale(SCRAPE_JOB, SCRAPER_WORKER_STALE)
+            if requeued:
+                print(f"♻️ {requeued} משימות סריקה שנקטעו חזרו לתור")
+            last_requeue = time.monotonic()
+
+        job = queue.claim(SCRAPE_JOB)
+        if job is None:
+            if once:
+                return
+            # ניקוי משימות ישנות מדי פעם, כשאין עבודה
+            if time.monotonic() - last_evict > 300:
+                queue.evict()
+                last_evict = time.monotonic()
+            stop.wait(poll_interval)
+            continue
+        run_job(queue, job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="תהליך סריקת מחירים")
+    parser.add_argument("--queue", default=SCRAPER_QUEUE_PATH, help="קובץ ה-SQLite של התור")
+    parser.add_argument("--once", action="store_true", help="לצאת כשהתור ריק")
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    # SIGTERM (deploy/restart) - מסיימים את המשימה הנוכחית ויוצאים; הדפדפנים נסגרים ב-atexit
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    print(f"🛒 תהליך סריקה מחכה למשימות ב-{args.queue}")
+    try:
+        run_worker(JobStore(args.queue, JOB_TTL), stop=stop, once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
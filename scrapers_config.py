@@ -3,12 +3,50 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 import os
+import shutil
+import threading
 
-def get_chrome_driver():
+# סוגי משאבים שנחסמים במצב חסימה - הסורקים קוראים רק טקסט.
+# התבנית חלה על כל ה-URL, ולכן "*" בסוף - נכסי CDN מגיעים עם query string (img.jpg?w=300).
+# תמונות בלי סיומת נחסמות לפי סוג בהגדרות הדפדפן (get_chrome_driver(block_images=True))
+BLOCKED_EXTENSIONS = [
+    # תמונות
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",
+    # וידאו ושמע
+    "mp4", "webm", "mp3", "m3u8",
+    # פונטים
+    "woff", "woff2", "ttf", "otf", "eot",
+]
+BLOCKED_RESOURCE_PATTERNS = [f"*.{extension}*" for extension in BLOCKED_EXTENSIONS]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def chromedriver_path():
+    """
+    הנתיב ל-chromedriver - נקבע פעם אחת לכל תהליך.
+    ב-Railway: chromedriver מה-PATH (None = Selenium מאתר בעצמו), בפיתוח מקומי: ChromeDriverManager.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            if os.getenv('RAILWAY_ENVIRONMENT') or os.getenv('CHROME_BIN'):
+                _driver_path = shutil.which('chromedriver') or ""
+            else:
+                _driver_path = ChromeDriverManager().install()
+        return _driver_path or None
+
+
+def get_chrome_driver(block_images=False):
     """
-    מחזיר Chrome WebDriver מוגדר כראוי לסביבת הפרודקשן או הפיתוח
+    מחזיר Chrome WebDriver מוגדר כראוי לסביבת הפרודקשן או הפיתוח.
+    block_images - הדפדפן לא טוען תמונות בכלל (לפי סוג המשאב, גם בלי סיומת ב-URL);
+    חל על כל הדפים של הדפדפן, בניגוד ל-set_resource_blocking שמוגדר לכל טעינה.
     """
     options = Options()
+    if block_images:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
     
     # הגדרות בסיסיות
     options.add_argument("--headless=new")
@@ -30,15 +68,29 @@ def get_chrome_driver():
             options.binary_location = chrome_bin
         
         try:
-            driver = webdriver.Chrome(options=options)
+            driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
             return driver
         except Exception as e:
             print(f"⚠️ Error with Railway Chrome: {e}")
     
     # פיתוח מקומי
     driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
+        service=Service(chromedriver_path() or ChromeDriverManager().install()),
         options=options
     )
     
-    return driver
\ No newline at end of file
+    return driver
+
+
+def blocked_url_patterns(blocked_domains=()):
+    """תבניות URL לחסימה: תמונות, מדיה, פונטים וכל בקשה לדומיינים ברשימה"""
+    return BLOCKED_RESOURCE_PATTERNS + [f"*{domain}*" for domain in blocked_domains]
+
+
+def set_resource_blocking(driver, patterns):
+    """
+    חסימת בקשות דרך DevTools (Network.setBlockedURLs) - חלה על כל טעינה עד הקריאה הבאה.
+    patterns ריק מבטל את החסימה. כך אותו דפדפן מהמאגר משרת חנויות עם חסימה ובלי.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
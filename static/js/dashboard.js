@@ -113,9 +113,11 @@ async function calculateMenu(selectedSources) {
     
     document.getElementById('loadingIndicator').classList.add('show');
     document.getElementById('planningSection').style.display = 'none';
+    document.getElementById('loadingProgress').innerText = '';
     
     try {
-        const response = await fetch('/calculate', {
+        // החישוב רץ ברקע - מקבלים job_id ועוקבים אחרי ההתקדמות (long-poll)
+        const response = await fetch('/api/calculate/jobs', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -123,7 +125,14 @@ async function calculateMenu(selectedSources) {
             body: JSON.stringify(data)
         });
         
-        const result = await response.json();
+        const submitted = await response.json();
+        if (!submitted.success) {
+            alert(submitted.message || 'שגיאה בחישוב התפריט');
+            showPlanSection();
+            return;
+        }
+
+        const result = await waitForCalculateJob(submitted.job_id);
 
         
         if (result.success) {
@@ -149,6 +158,47 @@ async function calculateMenu(selectedSources) {
     }
 }
 
+// מחכה לסיום משימת החישוב ומציג התקדמות לכל סופר.
+// מחזיר את גוף התשובה של /calculate
+async function waitForCalculateJob(jobId) {
+    const storeNames = {
+        manual: "מחיר ידני",
+        shufersal: "שופרסל",
+        rami_levy: "רמי לוי",
+        victory: "ויקטורי"
+    };
+    const storeProgress = {};
+    let after = 0;
+
+    while (true) {
+        const response = await fetch(`/api/calculate/jobs/${jobId}?after=${after}&wait=10`);
+        const body = await response.json();
+        if (!body.success) {
+            return { success: false, message: body.message };
+        }
+
+        const job = body.job;
+        job.events.forEach(event => {
+            after = event.seq;
+            const name = storeNames[event.store] || event.store;
+            if (event.type === 'day') {
+                storeProgress[event.store] = `${name}: יום ${event.day} מתוך ${event.num_days}`;
+            } else if (event.status === 'pruned') {
+                storeProgress[event.store] = `${name}: דולג - יקר יותר`;
+            } else if (event.status === 'solved') {
+                storeProgress[event.store] = `${name}: ✓ ₪${event.total_cost.toFixed(2)}`;
+            } else {
+                storeProgress[event.store] = `${name}: לא נמצא פתרון`;
+            }
+        });
+        document.getElementById('loadingProgress').innerText = Object.values(storeProgress).join('\n');
+
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job.result || { success: false, message: job.message };
+        }
+    }
+}
+
 function displayResults(data) {
     currentResults = data;
     
@@ -241,6 +291,21 @@ function displayResults(data) {
     const chosenBox = document.getElementById('chosenSourceBox');
     if (data.chosen_price_source && chosenBox) {
         chosenBox.innerText = "🏪 הסופר שנבחר לתפריט האופטימלי: " + sourceMap[data.chosen_price_source];
+
+        // השוואה בין הסופרים - חנות שנגזמה לא חושבה עד הסוף כי החסם שלה יקר מהנבחרת
+        Object.entries(data.stores || {}).forEach(([store, info]) => {
+            if (info.pruned) {
+                const bound = info.lp_bound !== null ? ` (לפחות ₪${info.lp_bound.toFixed(2)})` : '';
+                chosenBox.innerText += `\n${sourceMap[store] || store}: לא חושב - יקר יותר${bound}`;
+            } else if (info.total_cost !== null) {
+                chosenBox.innerText += `\n${sourceMap[store] || store}: ₪${info.total_cost.toFixed(2)}`;
+            }
+        });
+
+        // החישוב נעצר על מגבלת זמן - התפריט הוא הטוב ביותר שנמצא, לא בהכרח הזול ביותר
+        if (data.optimal === false) {
+            chosenBox.innerText += "\n⏱️ החישוב הוגבל בזמן - ייתכן שקיים תפריט זול יותר";
+        }
     }
 }
 
@@ -93,12 +93,15 @@ document.addEventListener('DOMContentLoaded', function() {
     const updateBtn = document.getElementById('updatePricesBtn');
     const priceStatus = document.getElementById('priceStatus');
 
+    const cancelBtn = document.getElementById('cancelPricesBtn');
+
     if (updateBtn) {
         updateBtn.addEventListener('click', async () => {
-            priceStatus.innerText = "⏳ עדכון מחירים... זה יכול לקחת כמה דקות";
+            priceStatus.innerText = "⏳ מתחיל עדכון מחירים...";
             updateBtn.disabled = true;
 
             try {
+                // העדכון רץ ברקע בשרת - מקבלים job_id מיד (409 - עדכון אחר כבר רץ, עוקבים אחריו)
                 const res = await fetch('/api/prices/update', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' }
@@ -106,10 +109,8 @@ document.addEventListener('DOMContentLoaded', function() {
 
                 const data = await res.json();
 
-                if (data.success) {
-                    priceStatus.innerText = "✅ המחירים עודכנו בהצלחה";
-                    loadFoods();
-                    loadLastPriceUpdate();
+                if (data.job_id) {
+                    await followBulkPriceUpdate(data.job_id, priceStatus, cancelBtn);
                 } else {
                     priceStatus.innerText = "❌ שגיאה בעדכון מחירים";
                 }
@@ -132,6 +133,61 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+// ===============================
+// 🔄 עדכון כל המחירים (משימת רקע)
+// ===============================
+async function followBulkPriceUpdate(jobId, priceStatus, cancelBtn) {
+    let after = 0;
+    let stoppedMessage = '';
+
+    cancelBtn.style.display = '';
+    cancelBtn.disabled = false;
+    cancelBtn.onclick = async () => {
+        cancelBtn.disabled = true;
+        await fetch(`/api/prices/update/${jobId}/cancel`, { method: 'POST' });
+    };
+
+    try {
+        while (true) {
+            // long-poll - התשובה חוזרת עם אירוע התקדמות חדש או בסיום
+            const res = await fetch(`/api/prices/update/${jobId}?after=${after}&wait=10`);
+            const data = await res.json();
+            if (!data.success) {
+                priceStatus.innerText = "❌ " + (data.message || "שגיאה בעדכון מחירים");
+                return;
+            }
+
+            const job = data.job;
+            for (const event of job.events) {
+                after = event.seq;
+                if (event.type === 'progress') {
+                    priceStatus.innerText = `⏳ עודכנו ${event.done}/${event.total} מזונות`;
+                    event.products.forEach(product => patchFoodRow(product.food_id, product.prices));
+                } else if (event.type === 'stopped') {
+                    // העדכון נעצר - כמה מזונות הספיקו להתעדכן
+                    stoppedMessage = event.message;
+                }
+            }
+
+            if (job.status === 'completed') {
+                priceStatus.innerText = "✅ המחירים עודכנו בהצלחה";
+                loadLastPriceUpdate();
+                return;
+            }
+            if (job.status === 'cancelled') {
+                priceStatus.innerText = "⏹️ " + job.message + (stoppedMessage ? ` - ${stoppedMessage}` : '');
+                return;
+            }
+            if (job.status === 'failed') {
+                priceStatus.innerText = "❌ " + job.message;
+                return;
+            }
+        }
+    } finally {
+        cancelBtn.style.display = 'none';
+    }
+}
+
 // ===============================
 // 🔍 סינון
 // ===============================
@@ -246,6 +302,7 @@ function displayFoods(foods) {
 
 function createFoodRow(food) {
     const row = document.createElement('tr');
+    row.dataset.foodId = food.id;
 
     const categoryMap = {
         protein: ['protein', 'חלבון'],
@@ -415,7 +472,11 @@ document.getElementById('foodForm').addEventListener('submit', async function(e)
             // STEP 3: הצגת הודעה שמתחיל תהליך עדכון מחירים
             // ============================================================
             setTimeout(() => {
-                showNotification('🔍 מתחיל עדכון מחירים מהסופרמרקטים... זה יכול לקחת כמה דקות', 15000);
+                if (result.price_update_rejected) {
+                    showNotification('⚠️ יש כרגע יותר מדי עדכוני מחירים בתור - המחיר יתעדכן בעדכון הבא', 5000);
+                } else {
+                    showNotification('🔍 מתחיל עדכון מחירים מהסופרמרקטים... זה יכול לקחת כמה דקות', 15000);
+                }
             }, 1500);
 
             // ============================================================
@@ -424,10 +485,10 @@ document.getElementById('foodForm').addEventListener('submit', async function(e)
             await loadFoods();
 
             // ============================================================
-            // STEP 5: התחלת פולינג לבדיקת סטטוס המשימה
+            // STEP 5: מעקב אחרי המשימה - עדכונים נשלחים מהשרת (SSE)
             // ============================================================
             if (result.task_id) {
-                pollPriceUpdateTask(result.task_id);
+                watchPriceUpdateTask(result.task_id);
             }
         } else {
             showNotification('❌ ' + (result.message || 'שגיאה בשמירה'));
@@ -439,8 +500,62 @@ document.getElementById('foodForm').addEventListener('submit', async function(e)
 });
 
 // ===============================
-// 🔄 פולינג לבדיקת סטטוס עדכון מחירים
+// 🔄 מעקב אחרי עדכון מחירים
 // ===============================
+
+// עדכון השורה של המזון בלבד, בלי לטעון מחדש את כל הרשימה
+function patchFoodRow(foodId, prices) {
+    const food = foodsData.find(f => f.id === foodId);
+    if (!food) return;
+    if (prices) food.prices = prices;
+
+    const row = document.querySelector(`#foodTableBody tr[data-food-id="${CSS.escape(foodId)}"]`);
+    if (row) row.replaceWith(createFoodRow(food));
+}
+
+function handlePriceTaskUpdate(task) {
+    console.log(`Task status: ${task.status} - ${task.message}`);
+
+    if (task.status === 'completed') {
+        patchFoodRow(task.food_id, task.prices);
+        showNotification('✅ המחירים עודכנו בהצלחה', 3000);
+        return true;
+    }
+    if (task.status === 'failed') {
+        showNotification('❌ שגיאה בעדכון מחירים: ' + task.message, 5000);
+        return true;
+    }
+    // 'pending' או 'running' - ממשיכים לחכות
+    return false;
+}
+
+function watchPriceUpdateTask(taskId) {
+    if (!window.EventSource) {
+        pollPriceUpdateTask(taskId);
+        return;
+    }
+
+    // השרת שולח event בכל שינוי סטטוס; החיבור נסגר מדי פעם והדפדפן מתחבר מחדש לבד
+    const source = new EventSource(`/api/prices/tasks/events?ids=${encodeURIComponent(taskId)}`);
+
+    source.addEventListener('task', (e) => {
+        if (handlePriceTaskUpdate(JSON.parse(e.data))) {
+            source.close();
+        }
+    });
+    source.addEventListener('missing', () => source.close());
+    source.addEventListener('done', () => source.close());
+
+    // השרת סירב (503 - יותר מדי חיבורים פתוחים): הדפדפן לא מתחבר מחדש לבד, עוברים לפולינג.
+    // סגירה רגילה של החיבור (CONNECTING) - EventSource מתחבר מחדש לבד
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            pollPriceUpdateTask(taskId);
+        }
+    };
+}
+
+// גיבוי לדפדפנים בלי EventSource
 async function pollPriceUpdateTask(taskId) {
     const maxAttempts = 60; // עד 60 בדיקות (כ-5 דקות)
     let attempts = 0;
@@ -452,44 +567,12 @@ async function pollPriceUpdateTask(taskId) {
             const res = await fetch(`/api/prices/task/${taskId}`);
             const result = await res.json();
 
-            if (result.success && result.task) {
-                const task = result.task;
-                console.log(`Task status: ${task.status} - ${task.message}`);
-
-                if (task.status === 'completed') {
-                    // ============================================================
-                    // המשימה הסתיימה בהצלחה
-                    // ============================================================
-                    clearInterval(pollInterval);
-                    showNotification('✅ המחירים עודכנו בהצלחה', 3000);
-                    
-                    // טעינה מחדש של המזונות כדי להציג את המחירים החדשים
-                    await loadFoods();
-                    
-                    // רענון הדף אחרי 2 שניות
-                    setTimeout(() => {
-                        window.location.reload();
-                    }, 2000);
-
-                } else if (task.status === 'failed') {
-                    // ============================================================
-                    // המשימה נכשלה
-                    // ============================================================
-                    clearInterval(pollInterval);
-                    showNotification('❌ שגיאה בעדכון מחירים: ' + task.message, 5000);
-                }
-                // אם הסטטוס הוא 'running' או 'pending' - ממשיך לפולינג
-            }
-
-            if (attempts >= maxAttempts) {
-                // ============================================================
-                // חריגה מהזמן המקסימלי
-                // ============================================================
+            if (result.success && result.task && handlePriceTaskUpdate(result.task)) {
+                clearInterval(pollInterval);
+            } else if (attempts >= maxAttempts) {
                 clearInterval(pollInterval);
-                showNotification('⚠️ עדכון המחירים לוקח זמן רב מהרגיל, הדף ירענן אוטומטית', 5000);
-                setTimeout(() => {
-                    window.location.reload();
-                }, 3000);
+                showNotification('⚠️ עדכון המחירים לוקח זמן רב מהרגיל', 5000);
+                await loadFoods();
             }
 
         } catch (e) {
@@ -96,6 +96,126 @@ def test_multiple_days():
         print(f"❌ כשלון: {result.get('message', 'לא ידוע')}")
         return False
 
+def test_horizon_mode():
+    """בדיקת מצב horizon - מודל אחד לכל הימים"""
+    print("\n" + "="*60)
+    print("🧪 בדיקה 3: תפריט ל-4 ימים במצב horizon")
+    print("="*60)
+
+    # קטלוג הבדיקה הקטן לא פתיר - משתמשים בקטלוג ברירת המחדל של האפליקציה
+    from app import get_default_foods
+
+    optimizer = MenuOptimizer(get_default_foods(), test_params)
+    result = optimizer.generate_menu_horizon(4, time_limit=5)
+
+    assert result['success'], result.get('message')
+    assert len(result['days']) == 4
+
+    # אותה ארוחה לא חוזרת על מזון שאינו ירק ביומיים רצופים
+    for prev_day, day in zip(result['days'], result['days'][1:]):
+        for meal in ['breakfast', 'lunch', 'dinner']:
+            prev_foods = {food for food, qty in prev_day[meal] if food not in optimizer.vegetables}
+            foods = {food for food, qty in day[meal] if food not in optimizer.vegetables}
+            assert not (prev_foods & foods), f"{meal}: {prev_foods & foods}"
+
+    print(f"✅ הצלחה! עלות כוללת: ₪{result['total_cost']:.2f}, חלון אי-חזרה: {result['repeat_window']}")
+
+
+def test_horizon_mode_uses_backend():
+    """בדיקה שמצב horizon נפתר עם ה-backend שהוגדר, ושהפער שלו נפרד מ-mip_gap"""
+    from app import get_default_foods
+    import optimizer.highs_backend as highs_backend
+
+    calls = []
+    original = highs_backend.milp
+
+    def milp(*args, **kwargs):
+        calls.append(kwargs["options"])
+        return original(*args, **kwargs)
+
+    highs_backend.milp = milp
+    try:
+        optimizer = MenuOptimizer(get_default_foods(), test_params, {"backend": "highs", "mip_gap": 0})
+        result = optimizer.generate_menu(3, mode="horizon")
+    finally:
+        highs_backend.milp = original
+
+    assert result['success'], result.get('message')
+    assert len(result['days']) == 3
+    assert result['solver']['backend'] == "highs"
+    assert calls and all(options["mip_rel_gap"] == 0.02 for options in calls)
+
+
+def test_model_template_shared_across_prices():
+    """בדיקה שמבנה המודל נבנה פעם אחת ומשותף לחנויות עם מחירים שונים"""
+    from app import get_default_foods
+    from optimizer.template import acquire_template, release_template
+
+    cheap = get_default_foods()
+    expensive = get_default_foods()
+    for food in expensive:
+        food['prices']['manual'] *= 2
+
+    first = MenuOptimizer(cheap, test_params)
+    template = acquire_template(first)
+    release_template(template)
+
+    second = MenuOptimizer(expensive, test_params)
+    assert acquire_template(second) is template
+    release_template(template)
+
+    # אותו תפריט, מחיר כפול
+    cheap_result = first.generate_menu(2)
+    expensive_result = second.generate_menu(2)
+    assert cheap_result['success'] and expensive_result['success']
+    assert abs(expensive_result['total_cost'] - 2 * cheap_result['total_cost']) < 0.05
+
+
+def test_highs_backend_matches_cbc():
+    """בדיקה שה-backend של HiGHS (מטריצות NumPy) מחזיר את אותו תפריט כמו CBC"""
+    from app import get_default_foods
+
+    cbc_result = MenuOptimizer(get_default_foods(), test_params).generate_menu(3)
+    highs_result = MenuOptimizer(get_default_foods(), test_params).generate_menu(3, backend="highs")
+
+    assert cbc_result['success'] and highs_result['success']
+    assert abs(cbc_result['total_cost'] - highs_result['total_cost']) < 0.01
+    for cbc_day, highs_day in zip(cbc_result['days'], highs_result['days']):
+        for meal in ['breakfast', 'lunch', 'dinner', 'snacks']:
+            assert sorted(food for food, qty in cbc_day[meal]) == sorted(food for food, qty in highs_day[meal])
+
+
+def test_solver_deadline_returns_incumbent():
+    """בדיקה שכשנגמר ה-deadline מוחזר תפריט מלא, מסומן כלא אופטימלי"""
+    from app import get_default_foods
+
+    optimizer = MenuOptimizer(get_default_foods(), test_params, {"deadline": 0})
+    result = optimizer.generate_menu(5)
+
+    assert result['success'], result.get('message')
+    assert len(result['days']) == 5
+    assert result['optimal'] is False
+    assert result['solver']['deadline_reached']
+
+
+def test_warm_start_keeps_menu():
+    """בדיקה שה-warm start מהיום הקודם לא משנה את התפריט"""
+    from app import get_default_foods
+
+    cold = MenuOptimizer(get_default_foods(), test_params, {"warm_start": False}).generate_menu(4)
+    warm = MenuOptimizer(get_default_foods(), test_params, {"warm_start": True}).generate_menu(4)
+
+    assert cold['success'] and warm['success']
+    assert abs(cold['total_cost'] - warm['total_cost']) < 0.01
+    assert len(warm['solver']['solve_times']) == len(cold['solver']['solve_times'])
+    assert warm['solver']['warm_start'] and not cold['solver']['warm_start']
+
+    # HiGHS לא מקבל פתרון התחלה - לא מדווחים warm start
+    highs = MenuOptimizer(get_default_foods(), test_params, {"backend": "highs", "warm_start": True}).generate_menu(4)
+    assert highs['success']
+    assert highs['solver']['warm_start'] is False and highs['solver']['warm_started_days'] == 0
+
+
 def run_all_tests():
     """הרצת כל הבדיקות"""
     print("\n🚀 מתחיל בדיקות אלגוריתם...")
@@ -0,0 +1,409 @@
+"""
+בדיקות לנתיבי ה-API של האפליקציה (Flask test client)
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import app as app_module
+from algorithm import MenuOptimizer
+from job_store import JobStore, CANCELLED, COMPLETED, FAILED, FINISHED, RUNNING
+from pricing.breaker import BreakerBoard
+from pricing.refresh import PriceRefresh, SKIPPED_CANCELLED
+from pricing.update_executor import PriceUpdateExecutor
+
+
+def make_client(user_id=1):
+    """
+    client מחובר, עם קטלוג ברירת המחדל וקבצי SQLite בתיקייה זמנית -
+    בלי מטמון תפריטים, בלי מטמון מחירים משותף ועם מפסקים משלו
+    """
+    tmp = tempfile.mkdtemp()
+    app_module.job_store = JobStore(os.path.join(tmp, "jobs.db"))
+    app_module.menu_cache = None
+    app_module.price_cache = None
+    app_module.breakers = BreakerBoard(os.path.join(tmp, "breakers.db"), app_module.STORE_SCRAPERS)
+    app_module.foods_db = app_module.get_default_foods()
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+
+def food_body(food, **changes):
+    body = {
+        'name': food['name'],
+        'protein': food['protein'],
+        'calories': food['calories'],
+        'carbs': food['carbs'],
+        'fat': food['fat'],
+        'price': food['prices']['manual'],
+        'category': food['category'],
+        'allowed_meals': food['allowed_meals'],
+    }
+    body.update(changes)
+    return body
+
+
+# פרמטרי משתמש לחישובי תפריט קצרים בבדיקות
+MENU_PARAMS = {
+    'min_protein': 60,
+    'max_protein': 100,
+    'min_calories': 2000,
+    'max_calories': 2500,
+    'min_fat': 60,
+    'max_fat': 90,
+    'max_carbs': 250,
+    'num_days': 2,
+}
+
+
+def store_catalog(factors):
+    """קטלוג ברירת המחדל עם מחיר לכל חנות: {חנות: מכפיל של המחיר הידני}"""
+    foods = app_module.get_default_foods()
+    for food in foods:
+        manual = food['prices']['manual']
+        food['prices'] = {'manual': manual, **{store: manual * factor for store, factor in factors.items()}}
+    return foods
+
+
+def test_lp_pruning_skips_expensive_store():
+    """
+    חנות שהחסם התחתון שלה יקר מהתפריט הזול ביותר שנמצא לא נפתרת; חנות בתוך
+    הסבולת של 0.01 (עלות מעוגלת) נפתרת; הבחירה והעלות כמו בלי גיזום
+    """
+    foods = store_catalog({'a': 1.0, 'b': 3.0, 'c': 1.0001})
+    stores = ['b', 'a', 'c']
+    plain, plain_source = app_module.run_optimizer_for_all_price_sources(
+        foods, MENU_PARAMS, stores, workers=3, pool="thread", prune=False
+    )
+    cost = plain['total_cost']
+
+    # חסמים קבועים: a מתחת לתפריט, c בתוך הסבולת, b הרבה מעליו
+    bounds = {1.0: cost - 1, 1.0001: cost + 0.005, 3.0: cost + 5}
+    original_bound = MenuOptimizer.lp_lower_bound
+    original_solve = app_module.solve_menu
+    solved = []
+
+    def lp_lower_bound(optimizer, num_days, backend=None):
+        factor = round(optimizer.price[0] / (foods[0]['prices']['manual'] / 100), 4)
+        return bounds[factor]
+
+    def solve_menu(store_foods, *args, **kwargs):
+        solved.append(store_foods[0]['prices']['temp'] / foods[0]['prices']['manual'])
+        return original_solve(store_foods, *args, **kwargs)
+
+    MenuOptimizer.lp_lower_bound = lp_lower_bound
+    app_module.solve_menu = solve_menu
+    events = []
+    try:
+        pruned, pruned_source = app_module.run_optimizer_for_all_price_sources(
+            foods, MENU_PARAMS, stores, workers=3, pool="thread", prune=True, progress=events.append
+        )
+    finally:
+        MenuOptimizer.lp_lower_bound = original_bound
+        app_module.solve_menu = original_solve
+
+    assert pruned_source == plain_source == 'a'
+    assert pruned['total_cost'] == cost
+    assert sorted(round(factor, 4) for factor in solved) == [1.0, 1.0001]
+    assert pruned['stores']['b']['pruned'] and pruned['stores']['b']['total_cost'] is None
+    assert not pruned['stores']['c']['pruned'] and pruned['stores']['c']['total_cost'] is not None
+    assert {"type": "store", "store": "b", "status": "pruned", "total_cost": None} in events
+
+
+def test_parallel_pools_match_serial_run():
+    """
+    חנויות במקביל (threads או תהליכים) - אותו תפריט, חנות ועלות כמו ברצף;
+    בשוויון עלות נבחרת החנות הראשונה ב-price_sources
+    """
+    foods = store_catalog({'x': 1.2, 'tie_first': 1.0, 'tie_second': 1.0})
+    stores = ['x', 'tie_first', 'tie_second']
+
+    runs = {
+        pool_name: app_module.run_optimizer_for_all_price_sources(
+            foods, MENU_PARAMS, stores, workers=workers, pool=pool, prune=False
+        )
+        for pool_name, pool, workers in [("serial", "thread", 1), ("thread", "thread", 3), ("process", "process", 3)]
+    }
+
+    serial, serial_source = runs["serial"]
+    assert serial_source == 'tie_first'
+    for result, source in runs.values():
+        assert source == serial_source
+        assert result['total_cost'] == serial['total_cost']
+        assert result['days'] == serial['days']
+        assert result['stores'] == serial['stores']
+
+
+def test_second_edit_joins_pending_price_update():
+    """
+    עריכה נותנת למזון id חדש - עריכה שנייה לפני הסריקה נכנסת לאותה משימה,
+    והמשימה לא נכשלת על ה-id הקודם שכבר לא קיים
+    """
+    client = make_client()
+    scraped = []
+
+    def fake_update(names, force=False):
+        scraped.append(list(names))
+        return [0.01] * len(names), [0.02] * len(names), [0.03] * len(names)
+
+    original = app_module.price_update_executor, app_module.update_prices_by_names
+    app_module.update_prices_by_names = fake_update
+    app_module.price_update_executor = PriceUpdateExecutor(
+        app_module.add_price_update_task, app_module.update_prices_for_foods,
+        batch_wait=0.5, retarget_task=app_module.retarget_price_update_task,
+    )
+    try:
+        food = app_module.foods_db[0]
+        first = client.put(f"/api/foods/{food['id']}", json=food_body(food, name="ביצים L")).get_json()
+        second_id = first['data']['id']
+        second = client.put(f"/api/foods/{second_id}", json=food_body(food, name="ביצים XL")).get_json()
+        third_id = second['data']['id']
+        assert second['task_id'] == first['task_id']
+
+        job = app_module.job_store.wait(first['task_id'], timeout=5)
+    finally:
+        app_module.price_update_executor, app_module.update_prices_by_names = original
+
+    assert job['status'] == COMPLETED, job['message']
+    assert job['payload']['food_id'] == third_id
+    assert scraped == [["ביצים XL"]]
+
+    tasks = app_module.job_store.find_by_ref(app_module.PRICE_TASK, [food['id'], second_id, third_id])
+    assert [task['id'] for task in tasks.values()] == [first['task_id']]
+    assert all(task['status'] != FAILED for task in tasks.values())
+
+    edited = next(f for f in app_module.foods_db if f['id'] == third_id)
+    assert edited['prices']['shufersal'] == 1.0
+
+
+def test_calculate_job_routes():
+    """
+    POST מחזיר 202 ו-job_id; wait מוגבל ל-CALCULATE_JOB_POLL_WAIT; 429 כשהתור מלא;
+    404 למשימה שלא קיימת ולמשימה של משתמש אחר
+    """
+    client = make_client(user_id=1)
+    release = threading.Event()
+
+    def compute_menu(user_params, selected_sources, progress=None):
+        progress({"type": "store", "store": selected_sources[0], "status": "solving"})
+        release.wait(5)
+        return {'success': True, 'num_days': user_params['num_days']}
+
+    original = app_module.compute_menu, app_module.calculate_slots, app_module.CALCULATE_JOB_POLL_WAIT
+    app_module.compute_menu = compute_menu
+    app_module.calculate_slots = threading.BoundedSemaphore(1)
+    app_module.CALCULATE_JOB_POLL_WAIT = 0.3
+    try:
+        response = client.post("/api/calculate/jobs", json={**MENU_PARAMS, 'price_sources': ['manual']})
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+
+        # המשבצת היחידה תפוסה עד שהחישוב מסתיים
+        busy = client.post("/api/calculate/jobs", json={**MENU_PARAMS, 'price_sources': ['manual']})
+        assert busy.status_code == 429
+
+        # אין אירוע חדש אחרי האירוע הראשון - התשובה חוזרת אחרי 0.3 שניות ולא 30
+        first = app_module.job_store.wait(job_id, timeout=5)
+        started = time.monotonic()
+        polled = client.get(f"/api/calculate/jobs/{job_id}?after={first['events'][-1]['seq']}&wait=30")
+        assert time.monotonic() - started < 2
+        assert polled.status_code == 200
+        assert polled.get_json()['job']['status'] == RUNNING
+
+        other = app_module.app.test_client()
+        with other.session_transaction() as session:
+            session['user_id'] = 2
+        assert other.get(f"/api/calculate/jobs/{job_id}").status_code == 404
+        assert client.get("/api/calculate/jobs/missing").status_code == 404
+
+        release.set()
+        done = client.get(f"/api/calculate/jobs/{job_id}?wait=0.3").get_json()['job']
+        while done['status'] == RUNNING:
+            done = client.get(f"/api/calculate/jobs/{job_id}?wait=0.3").get_json()['job']
+        assert done['status'] == COMPLETED
+        assert done['result'] == {'success': True, 'num_days': 2}
+
+        # המשבצת שוחררה בסיום
+        assert app_module.calculate_slots.acquire(timeout=1)
+        app_module.calculate_slots.release()
+    finally:
+        release.set()
+        app_module.compute_menu, app_module.calculate_slots, app_module.CALCULATE_JOB_POLL_WAIT = original
+
+
+def test_price_task_events_stream():
+    """
+    SSE: 503 כשכל החיבורים תפוסים; ניתוק של הלקוח משחרר את החיבור;
+    הזרם נסגר עם "done" כשהמשימה מסתיימת
+    """
+    client = make_client()
+    task_id = app_module.add_price_update_task(1, "ביצים")
+    url = f"/api/prices/tasks/events?ids={task_id}"
+
+    original = app_module.price_task_streams, app_module.PRICE_TASK_STREAM_INTERVAL
+    app_module.price_task_streams = threading.BoundedSemaphore(1)
+    app_module.PRICE_TASK_STREAM_INTERVAL = 0.05
+    try:
+        first = client.get(url, buffered=False)
+        assert first.status_code == 200
+        chunks = first.iter_encoded()
+        assert next(chunks).startswith(b"retry:")
+        assert next(chunks).startswith(b"event: task")
+
+        busy = client.get(url, buffered=False)
+        assert busy.status_code == 503
+        assert busy.headers['Retry-After'] == '3'
+
+        # ניתוק באמצע הזרם - החיבור חוזר למאגר
+        first.close()
+        second = client.get(url, buffered=False)
+        assert second.status_code == 200
+
+        app_module.job_store.update(task_id, COMPLETED, 'המחירים עודכנו', result={'prices': {'shufersal': 1.0}})
+        body = b"".join(second.iter_encoded()).decode()
+        second.close()
+        assert '"status": "completed"' in body
+        assert body.endswith("event: done\ndata: {}\n\n")
+
+        assert app_module.price_task_streams.acquire(blocking=False)
+        app_module.price_task_streams.release()
+    finally:
+        app_module.price_task_streams, app_module.PRICE_TASK_STREAM_INTERVAL = original
+
+
+def wait_for(predicate, timeout=5):
+    """מחכה עד ש-predicate() מחזיר ערך אמיתי ומחזיר אותו"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.02)
+    raise AssertionError("timed out")
+
+
+def stopped_job(job_id):
+    """המשימה, אם העדכון שלה כבר נעצר (אירוע stopped) - אחרת None"""
+    job = app_module.job_store.get(job_id)
+    return job if any(event['type'] == 'stopped' for event in job['events']) else None
+
+
+def test_bulk_price_update_routes():
+    """
+    POST מחזיר 202 ואז 409 עם אותו job_id; GET מחזיר את ההתקדמות; ביטול עוצר את
+    update_all_prices לפני השלב הבא; משימה תקועה (בלי עדכון PRICE_BULK_STALE שניות) מוחלפת
+    """
+    client = make_client()
+    calls = []
+    entered = threading.Semaphore(0)
+    go = threading.Event()
+
+    def fake_update(names, force=False):
+        calls.append(list(names))
+        entered.release()
+        go.wait(5)
+        return [[0.01] * len(names) for _ in app_module.STORE_SCRAPERS]
+
+    original = app_module.update_prices_by_names, app_module.PRICE_BULK_BATCH, app_module.PRICE_BULK_STALE
+    app_module.update_prices_by_names = fake_update
+    app_module.PRICE_BULK_BATCH = 2
+    try:
+        response = client.post("/api/prices/update", json={})
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+        assert entered.acquire(timeout=5)
+
+        again = client.post("/api/prices/update", json={})
+        assert again.status_code == 409
+        assert again.get_json()['job_id'] == job_id
+
+        progress = client.get(f"/api/prices/update/{job_id}")
+        assert progress.status_code == 200
+        assert progress.get_json()['job']['status'] == RUNNING
+        assert client.get("/api/prices/update/missing").status_code == 404
+
+        # ביטול באמצע השלב הראשון - השלב מסתיים והשני לא מתחיל
+        assert client.post(f"/api/prices/update/{job_id}/cancel").get_json()['success']
+        go.set()
+        job = wait_for(lambda: stopped_job(job_id))
+        assert job['status'] == CANCELLED
+        assert len(calls) == 1
+        assert [e['done'] for e in job['events'] if e['type'] == 'progress'] == [2]
+        assert client.post(f"/api/prices/update/{job_id}/cancel").status_code == 409
+
+        # עדכון שה-worker שלו נפל - לא מתעדכן PRICE_BULK_STALE שניות ומוחלף בעדכון חדש
+        go.clear()
+        app_module.PRICE_BULK_STALE = 0.2
+        stale_id = client.post("/api/prices/update", json={}).get_json()['job_id']
+        assert entered.acquire(timeout=5)
+        time.sleep(0.3)
+        takeover = client.post("/api/prices/update", json={})
+        assert takeover.status_code == 202
+        new_id = takeover.get_json()['job_id']
+        assert new_id != stale_id
+        assert app_module.job_store.get(stale_id)['status'] == FAILED
+
+        app_module.PRICE_BULK_STALE = original[2]
+        go.set()
+        job = app_module.job_store.get(new_id)
+        while job['status'] not in FINISHED:
+            job = app_module.job_store.wait(new_id, timeout=1)
+        assert job['status'] == COMPLETED
+        assert job['result']['done'] == job['result']['total'] == len(app_module.foods_db)
+        # העדכון שהוחלף לא דורס את הסטטוס שלו
+        stale = wait_for(lambda: stopped_job(stale_id))
+        assert stale['status'] == FAILED
+    finally:
+        go.set()
+        app_module.update_prices_by_names, app_module.PRICE_BULK_BATCH, app_module.PRICE_BULK_STALE = original
+
+
+def test_cancelled_refresh_resumes():
+    """
+    רענון לילי שבוטל לא מסתיים: שאר המזונות נרשמים כמדולגים בגלל ביטול,
+    והרענון הבא ממשיך מאותו מיקום ומסיים
+    """
+    make_client()
+    scraped = []
+
+    def fake_update(names, force=False):
+        scraped.extend(names)
+        return [[0.01] * len(names) for _ in app_module.STORE_SCRAPERS]
+
+    original = app_module.update_prices_by_names, app_module.price_refresh, app_module.PRICE_REFRESH_BATCH
+    app_module.update_prices_by_names = fake_update
+    app_module.price_refresh = PriceRefresh(
+        os.path.join(tempfile.mkdtemp(), "refresh.db"), None, app_module.STORE_SCRAPERS, ttl=3600
+    )
+    app_module.PRICE_REFRESH_BATCH = 2
+    try:
+        app_module.refresh_prices_incremental(cancelled=lambda: len(scraped) >= 2)
+        run = app_module.price_refresh.last_run()
+        assert run["status"] == "running" and run["position"] == 2
+        assert {item["reason"] for item in run["skipped"]} == {SKIPPED_CANCELLED}
+        assert len(run["skipped"]) == run["total"] - 2
+
+        app_module.refresh_prices_incremental()
+        resumed = app_module.price_refresh.last_run()
+    finally:
+        app_module.update_prices_by_names, app_module.price_refresh, app_module.PRICE_REFRESH_BATCH = original
+
+    assert resumed["id"] == run["id"]
+    assert resumed["status"] == "completed" and resumed["skipped"] == []
+    assert sorted(scraped) == sorted(food["name"] for food in app_module.foods_db)
+
+
+if __name__ == "__main__":
+    test_lp_pruning_skips_expensive_store()
+    test_parallel_pools_match_serial_run()
+    test_second_edit_joins_pending_price_update()
+    test_calculate_job_routes()
+    test_price_task_events_stream()
+    test_bulk_price_update_routes()
+    test_cancelled_refresh_resumes()
+    print("✅ כל הבדיקות עברו")
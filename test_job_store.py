@@ -0,0 +1,78 @@
+"""
+בדיקות למאגר משימות הרקע
+"""
+
+import os
+import tempfile
+import time
+
+from job_store import JobStore, COMPLETED, PENDING, FAILED, CANCELLED
+
+
+def test_events_and_result():
+    store = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    job_id = store.create("calculate")
+    assert store.get(job_id)["status"] == PENDING
+
+    store.add_event(job_id, {"type": "day", "day": 1})
+    store.add_event(job_id, {"type": "day", "day": 2})
+
+    # רק אירועים שאחרי after
+    events = store.get(job_id, after=1)["events"]
+    assert [event["day"] for event in events] == [2]
+    assert events[0]["seq"] == 2
+
+    store.update(job_id, COMPLETED, result={"success": True})
+    job = store.wait(job_id, after=2, timeout=5)
+    assert job["status"] == COMPLETED and job["result"] == {"success": True}
+
+    assert store.get("missing") is None
+
+
+def test_lookup_by_ref_bulk_and_eviction():
+    store = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"), ttl=0.2)
+    first = store.create("price_update", ref="7")
+    second = store.create("price_update", ref="7")
+    other = store.create("price_update", ref="8")
+
+    # המשימה האחרונה של כל מזון
+    latest = store.find_by_ref("price_update", ["7", "8", "9"])
+    assert latest["7"]["id"] == second and latest["8"]["id"] == other and "9" not in latest
+    assert set(store.get_many([first, other, "missing"])) == {first, other}
+
+    # רק משימות שהסתיימו נמחקות אחרי ttl
+    store.update(first, COMPLETED)
+    time.sleep(0.3)
+    store.evict()
+    assert store.get(first) is None
+    assert store.get(second)["status"] == PENDING
+
+
+def test_exclusive_job_and_cancel():
+    store = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    job_id, created = store.create_exclusive("price_bulk")
+    assert created
+    # משימה פעילה - לא נוצרת שנייה
+    assert store.create_exclusive("price_bulk") == (job_id, False)
+
+    assert store.cancel(job_id)
+    assert store.get(job_id)["status"] == CANCELLED
+    assert not store.cancel(job_id)
+    # משימה שבוטלה לא חוזרת ל-running/completed
+    assert not store.update(job_id, COMPLETED) and not store.is_active(job_id)
+    assert store.get(job_id)["status"] == CANCELLED
+
+    second, created = store.create_exclusive("price_bulk")
+    assert created and second != job_id
+
+    # משימה פעילה שלא התעדכנה (ה-worker נפל) לא חוסמת
+    time.sleep(0.1)
+    third, created = store.create_exclusive("price_bulk", stale_after=0.05)
+    assert created and store.get(second)["status"] == FAILED
+
+
+if __name__ == "__main__":
+    test_events_and_result()
+    test_lookup_by_ref_bulk_and_eviction()
+    test_exclusive_job_and_cancel()
+    print("✅ כל הבדיקות עברו")
@@ -0,0 +1,59 @@
+"""
+בדיקות למטמון תוצאות /calculate
+"""
+
+import os
+import tempfile
+import time
+
+from menu_cache import MenuCache, menu_cache_key
+
+FOODS = [
+    {"id": "1", "name": "ביצים", "protein": 12.6, "calories": 155, "carbs": 1.0, "fat": 11.0,
+     "prices": {"manual": 4.16, "shufersal": None}, "category": "protein", "allowed_meals": ["breakfast"]},
+]
+PARAMS = {"num_days": 7, "min_protein": 56}
+SOLVER = {"backend": "cbc", "time_limit": 20, "deadline": 90}
+
+
+def new_cache(**kwargs):
+    path = os.path.join(tempfile.mkdtemp(), "menu_cache.db")
+    return MenuCache(path, **kwargs)
+
+
+def test_key_is_canonical():
+    """מפתח זהה לסדר אחר של מקורות מחיר ולפרמטרים כ-int/float, שונה כשמחיר משתנה"""
+    key = menu_cache_key(FOODS, PARAMS, ["shufersal", "manual"], "sequential", SOLVER)
+    same = menu_cache_key(FOODS, {"min_protein": 56.0, "num_days": 7.0}, ["manual", "shufersal"], "sequential",
+                          dict(SOLVER, deadline=10))
+    assert key == same
+
+    changed = [dict(FOODS[0], prices={"manual": 5.0, "shufersal": None})]
+    assert menu_cache_key(changed, PARAMS, ["manual", "shufersal"], "sequential", SOLVER) != key
+
+
+def test_lru_and_ttl():
+    cache = new_cache(max_entries=2, ttl=60)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+
+    # "b" הוא הכי פחות בשימוש - הוא מפונה
+    time.sleep(0.01)
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    expired = new_cache(ttl=0)
+    expired.put("a", {"v": 1})
+    time.sleep(0.01)
+    assert expired.get("a") is None
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+if __name__ == "__main__":
+    test_key_is_canonical()
+    test_lru_and_ttl()
+    print("✅ כל הבדיקות עברו")
@@ -0,0 +1,645 @@
+"""
+בדיקות ללוגיקת עדכון המחירים - בלי דפדפן ובלי רשת (הסורקים מוחלפים בפונקציות מזויפות)
+"""
+
+import fnmatch
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pricing import scrapers
+from pricing.driver_pool import DriverPool
+from pricing.latency import LatencyTracker
+from pricing.price_cache import PriceCache
+from pricing.product_index import ProductIndex
+from pricing.breaker import BreakerBoard, CLOSED, HALF_OPEN, OPEN
+from pricing.refresh import PriceRefresh, SKIPPED_BUDGET
+from pricing.worker import submit_scrape, run_worker, run_job, SCRAPE_JOB
+from pricing.update_executor import PriceUpdateExecutor, QueueFull
+from job_store import JobStore, COMPLETED
+
+# הבדיקות לא קוראות ולא כותבות למטמון המחירים, לאינדקס המוצרים ולמפסקים של הפרויקט
+scrapers.price_cache = None
+scrapers.product_index = None
+scrapers.breakers = None
+
+
+def fake_scraper(delay, factor):
+    def scrape(products, force=False):
+        time.sleep(delay)
+        return [factor * (i + 1) for i in range(len(products))]
+    return scrape
+
+
+def test_all_stores_run_concurrently():
+    """שלוש החנויות במקביל: הזמן הכולל כזמן החנות האיטית, והמחירים לפי סדר המוצרים"""
+    original = dict(scrapers.STORE_SCRAPERS)
+    scrapers.STORE_SCRAPERS.update({
+        "shufersal": fake_scraper(0.3, 1),
+        "victory": fake_scraper(0.3, 2),
+        "rami_levy": fake_scraper(0.3, 3),
+    })
+    try:
+        started = time.perf_counter()
+        prices = scrapers.get_prices_all_stores(["א", "ב", "ג"], workers=3)
+        elapsed = time.perf_counter() - started
+    finally:
+        scrapers.STORE_SCRAPERS.update(original)
+
+    assert elapsed < 0.6, elapsed
+    assert prices == {"shufersal": [1, 2, 3], "victory": [2, 4, 6], "rami_levy": [3, 6, 9]}
+
+
+def test_failed_store_returns_none():
+    """חנות שהסריקה שלה נכשלה מחזירה None ולא מפילה את השאר"""
+    def broken(products, force=False):
+        raise RuntimeError("chrome crashed")
+
+    original = dict(scrapers.STORE_SCRAPERS)
+    scrapers.STORE_SCRAPERS.update({"shufersal": broken, "victory": fake_scraper(0, 1), "rami_levy": fake_scraper(0, 1)})
+    try:
+        prices = scrapers.get_prices_all_stores(["א"])
+    finally:
+        scrapers.STORE_SCRAPERS.update(original)
+
+    assert prices["shufersal"] is None
+    assert prices["victory"] == [1]
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+def test_sharded_store_keeps_order_and_domain_cap():
+    """מוצרי חנות אחת מחולקים בין כמה דפדפנים: המחירים בסדר המקורי ולא יותר מ-cap דפדפנים פתוחים"""
+    open_browsers = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def fake_driver():
+        with lock:
+            open_browsers.append(1)
+            peak[0] = max(peak[0], len(open_browsers))
+        driver = FakeDriver()
+        driver.quit = lambda: open_browsers.pop()
+        return driver
+
+    def fake_page(store, driver, product):
+        time.sleep(0.05)
+        return int(product), 0.05, 0.0, None
+
+    original_pool, original_page, original_http = scrapers.driver_pool, scrapers._load_page, scrapers._http_price
+    original_slots = scrapers._domain_slots["victory"]
+    scrapers.driver_pool = DriverPool(fake_driver, max_size=6)
+    scrapers._load_page = fake_page
+    scrapers._http_price = lambda store, product: (None, None)
+    scrapers._domain_slots["victory"] = threading.BoundedSemaphore(2)
+    try:
+        products = [str(n) for n in range(10)]
+        prices = scrapers.get_prices_victory(products, shards=4)
+    finally:
+        scrapers.driver_pool.close()
+        scrapers.driver_pool = original_pool
+        scrapers._load_page = original_page
+        scrapers._http_price = original_http
+        scrapers._domain_slots["victory"] = original_slots
+
+    assert prices == list(range(10))
+    assert peak[0] == 2
+    stats = scrapers.SHARD_STATS["victory"]
+    assert [s["products"] for s in stats] == [3, 3, 2, 2]
+    assert not open_browsers
+
+
+def test_driver_pool_reuses_and_recycles():
+    """דפדפן חוזר לשימוש, ממוחזר אחרי max_pages דפים, ודפדפן מת מוחלף בחדש"""
+    class Driver:
+        alive = True
+        closed = False
+
+        @property
+        def current_url(self):
+            if not self.alive:
+                raise RuntimeError("session deleted")
+            return "about:blank"
+
+        def quit(self):
+            self.closed = True
+
+    pool = DriverPool(Driver, max_size=1, max_pages=3)
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+    assert second is first
+
+    with pool.driver():
+        pass
+    # 3 דפים - ממוחזר
+    assert first.closed
+    with pool.driver() as fresh:
+        pass
+    assert fresh is not first
+
+    fresh.alive = False
+    with pool.driver() as replacement:
+        pass
+    assert replacement is not fresh and fresh.closed
+    assert pool.stats() == {"open": 1, "idle": 1, "created": 3, "recycled": 1}
+
+
+def test_driver_pool_closes_idle_outside_lock():
+    """דפדפן פנוי שעבר עליו max_idle נסגר בהשאלה הבאה - בלי להחזיק את נעילת המאגר בזמן quit"""
+    pool = DriverPool(lambda: Driver(), max_size=2, max_idle=0.05)
+    locked_during_quit = []
+
+    class Driver:
+        current_url = "about:blank"
+
+        def quit(self):
+            # thread אחר מנסה לקחת את הנעילה בזמן הסגירה
+            def probe():
+                acquired = pool._cond.acquire(timeout=1)
+                locked_during_quit.append(not acquired)
+                if acquired:
+                    pool._cond.release()
+
+            thread = threading.Thread(target=probe)
+            thread.start()
+            thread.join()
+
+    with pool.driver() as first:
+        pass
+    time.sleep(0.1)
+    with pool.driver() as second:
+        pass
+    assert second is not first
+    assert locked_during_quit == [False]
+    assert pool.stats()["open"] == 1
+
+
+class PageDriver:
+    """דפדפן מזויף: התוצאות (או סימון "אין תוצאות") מופיעות delay שניות אחרי get"""
+
+    def __init__(self, delay, found=True):
+        self.delay = delay
+        self.found = found
+        self.blocked = None
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.setBlockedURLs":
+            self.blocked = params["urls"]
+
+    def get(self, url):
+        self.loaded_at = time.perf_counter()
+
+    def find_elements(self, by, selector):
+        if time.perf_counter() - self.loaded_at < self.delay:
+            return []
+        is_results = selector == scrapers.STORE_PAGES["rami_levy"]["results"]
+        return ["card"] if is_results == self.found else []
+
+
+def test_wait_ends_on_results_or_empty_marker():
+    """ההמתנה נגמרת כשמופיעות תוצאות או "אין תוצאות" - בלי השהייה קבועה, והזמנים נמדדים"""
+    original_parse = scrapers.STORE_PAGES["rami_levy"]["parse"]
+    original_latency = scrapers.STORE_LATENCY["rami_levy"]
+    scrapers.STORE_PAGES["rami_levy"]["parse"] = lambda items: 0.01
+    scrapers.STORE_LATENCY["rami_levy"] = LatencyTracker(5)
+    try:
+        driver = PageDriver(0.2)
+        price, waited, parsed, url = scrapers._load_page("rami_levy", driver, "חלב")
+        assert price == 0.01 and 0.2 <= waited < 1.0, waited
+        assert "*.woff2*" in driver.blocked
+        # setBlockedURLs מתאים את התבנית לכל ה-URL - גם נכסי CDN עם query string נחסמים
+        for url in ["https://cdn.example.com/img/p.jpg?w=300", "https://fonts.example.com/a.woff2?v=3"]:
+            assert any(fnmatch.fnmatchcase(url, pattern) for pattern in driver.blocked), url
+
+        price, waited, parsed, url = scrapers._load_page("rami_levy", PageDriver(0.1, found=False), "אין כזה")
+        assert price == 0 and waited < 1.0, waited
+
+        stats = scrapers.STORE_LATENCY["rami_levy"].stats()
+        assert stats["pages"] == 2 and stats["timeouts"] == 0
+    finally:
+        scrapers.STORE_PAGES["rami_levy"]["parse"] = original_parse
+        scrapers.STORE_LATENCY["rami_levy"] = original_latency
+
+
+def test_timeout_adapts_to_observed_latency():
+    """ה-timeout ההתחלתי עד שיש מספיק מדידות, ואז p95 × factor בתוך הגבולות"""
+    tracker = LatencyTracker(15, min_timeout=3, max_timeout=30, percentile=95, factor=2.0, min_samples=10)
+    assert tracker.timeout() == 15
+    for seconds in [1.0] * 19 + [2.5]:
+        tracker.record(seconds)
+    assert tracker.timeout() == 3  # p95 = 1.0 -> 2.0, מוגבל למינימום 3
+
+    for _ in range(20):
+        tracker.record(20, timed_out=True)
+    assert tracker.timeout() == 30
+    assert tracker.stats()["timeouts"] == 20
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    שרת מקומי במקום אתרי החנויות: GET /<name>?q=... מחזיר את fixtures/<name>.html,
+    POST /<name> (API חיפוש) מחזיר את fixtures/<name>.json
+    """
+    protocol_version = "HTTP/1.1"   # keep-alive
+    connections = set()
+    paths = []
+    bodies = []
+
+    def do_POST(self):
+        FixtureHandler.bodies.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self._serve("json", "application/json")
+
+    def do_GET(self):
+        self._serve("html", "text/html; charset=utf-8")
+
+    def _serve(self, extension, content_type):
+        FixtureHandler.connections.add(self.client_address)
+        name = urllib.parse.urlparse(self.path).path.strip("/")
+        FixtureHandler.paths.append(name)
+        path = os.path.join(FIXTURES, f"{name}.{extension}")
+        if not os.path.exists(path):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_fast_path_with_browser_fallback():
+    """
+    מחירים מה-HTML הסטטי ומ-API החיפוש בלי דפדפן, על חיבור keep-alive אחד;
+    חנות שהדף שלה נבנה ב-JavaScript (http=False), או דף בלי מחירים - נסרקים בדפדפן
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    browser_products = []
+
+    def fake_browser_page(store, driver, product):
+        browser_products.append(product)
+        return 0.5, 0.0, 0.0, None
+
+    original_urls = {store: page["url"] for store, page in scrapers.STORE_PAGES.items()}
+    api = scrapers.STORE_PAGES["rami_levy"]["api"]
+    original_api_url = api["url"]
+    original_pool, original_page = scrapers.driver_pool, scrapers._load_page
+    scrapers.driver_pool = DriverPool(FakeDriver, max_size=2)
+    scrapers._load_page = fake_browser_page
+    for store in ["shufersal", "victory", "rami_levy"]:
+        scrapers.STORE_PAGES[store]["url"] = (
+            lambda product, store=store: f"{base}/{store}_search?q={urllib.parse.quote(product)}"
+        )
+    api["url"] = lambda product: f"{base}/rami_levy_api"
+    try:
+        FixtureHandler.connections = set()
+        FixtureHandler.paths = []
+        FixtureHandler.bodies = []
+        assert scrapers.get_prices_shufersal(["אורז", "אורז בסמטי", "אורז מלא"], shards=1) == [0.0129] * 3
+        assert len(FixtureHandler.connections) == 1
+
+        # JSON מה-API: 5.90 ליחידה של 250 גרם
+        assert scrapers.get_prices_from_rami_levy(["יוגורט"], shards=1) == [0.0236]
+        assert FixtureHandler.bodies[0]["q"] == "יוגורט"
+        assert scrapers.SHARD_STATS["rami_levy"][0]["http_hits"] == 1
+        assert browser_products == []
+
+        # ויקטורי - ישר לדפדפן, בלי בקשת HTTP מיותרת
+        assert scrapers.get_prices_victory(["חזה עוף"], shards=1) == [0.5]
+        assert browser_products == ["חזה עוף"]
+        assert not any(path.startswith("victory") for path in FixtureHandler.paths)
+
+        scrapers.STORE_PAGES["shufersal"]["url"] = lambda product: f"{base}/js_shell?q={urllib.parse.quote(product)}"
+        assert scrapers.get_prices_shufersal(["טחינה"], shards=1) == [0.5]
+        assert browser_products == ["חזה עוף", "טחינה"]
+    finally:
+        for store, url in original_urls.items():
+            scrapers.STORE_PAGES[store]["url"] = url
+        api["url"] = original_api_url
+        scrapers.driver_pool.close()
+        scrapers.driver_pool = original_pool
+        scrapers._load_page = original_page
+        server.shutdown()
+        server.server_close()
+
+
+def test_price_cache_skips_fresh_prices():
+    """מחיר בתוקף לא נסרק שוב, force סורק הכל, TTL לכל חנות, ומונים של hits/misses"""
+    cache = PriceCache(os.path.join(tempfile.mkdtemp(), "price_cache.db"), default_ttl=60, store_ttl={"victory": 0})
+    scraped = []
+
+    def fake_page(store, driver, product):
+        scraped.append(product)
+        return 0.01 if product != "לא קיים" else 0, 0.0, 0.0, f"search/{product}"
+
+    original = scrapers.price_cache, scrapers.driver_pool, scrapers._load_page, scrapers._http_price
+    scrapers.price_cache = cache
+    scrapers.driver_pool = DriverPool(FakeDriver, max_size=2)
+    scrapers._load_page = fake_page
+    scrapers._http_price = lambda store, product: (None, None)
+    try:
+        assert scrapers.get_prices_shufersal(["ביצים", "לא קיים"], shards=1) == [0.01, 0]
+        # שם זהה אחרי נרמול - מהמטמון; מוצר שלא נמצא נסרק שוב
+        assert scrapers.get_prices_shufersal(["  ביצים ", "טחינה", "לא קיים"], shards=1) == [0.01, 0.01, 0]
+        assert scraped == ["ביצים", "לא קיים", "טחינה", "לא קיים"]
+
+        scraped.clear()
+        scrapers.get_prices_shufersal(["ביצים"], shards=1, force=True)
+        assert scraped == ["ביצים"]
+
+        # ttl=0 לויקטורי - תמיד נסרק
+        scrapers.get_prices_victory(["ביצים"], shards=1)
+        time.sleep(0.01)
+        scrapers.get_prices_victory(["ביצים"], shards=1)
+        assert scraped == ["ביצים", "ביצים", "ביצים"]
+    finally:
+        scrapers.driver_pool.close()
+        scrapers.price_cache, scrapers.driver_pool, scrapers._load_page, scrapers._http_price = original
+
+    stats = cache.stats()
+    assert stats["shufersal"] == {"entries": 2, "hits": 1, "misses": 4, "ttl": 60}
+    assert stats["victory"]["hits"] == 0 and stats["victory"]["entries"] == 1
+
+    # מה שנשמר מאז זמן נתון - כך workers אחרים של ה-web מקבלים את המחירים החדשים
+    changed = cache.changed_since(0)
+    assert sorted((store, name) for store, name, _, _ in changed) == [
+        ("shufersal", "ביצים"), ("shufersal", "טחינה"), ("victory", "ביצים")
+    ]
+    assert cache.changed_since(changed[-1][3]) == []
+
+    # כתובת המקור - הדף שממנו נקרא המחיר
+    conn = sqlite3.connect(cache.path)
+    assert conn.execute(
+        "SELECT source_url FROM price_cache WHERE store = 'shufersal' AND name = 'טחינה'"
+    ).fetchone() == ("search/טחינה",)
+    conn.close()
+
+
+def test_refresh_plan_order_and_resume():
+    """
+    סדר הרענון: בלי מחיר קודם, ואז לפי שימוש בתפריטים ותנודתיות;
+    ריצה שנקטעה ממשיכה מהמיקום השמור, ומה שלא רוענן נרשם כמדולג
+    """
+    path = os.path.join(tempfile.mkdtemp(), "price_cache.db")
+    cache = PriceCache(path, default_ttl=3600)
+    stores = ["shufersal", "victory"]
+    for name in ["ביצים", "חלב", "אורז"]:
+        for store in stores:
+            cache.put_many(store, [(name, 0.01, None)])
+    # מחיר החלב השתנה - קצת תנודתי
+    cache.put_many("shufersal", [("חלב", 0.0105, None)])
+
+    refresh = PriceRefresh(path, cache, stores, ttl=3600)
+    refresh.record_menu(["אורז", "ביצים"])
+    refresh.record_menu(["אורז"])
+
+    names = ["ביצים", "חלב", "אורז", "טחינה"]
+    plan = refresh.plan(names)
+    assert [item["name"] for item in plan] == ["טחינה", "אורז", "ביצים", "חלב"]
+    assert plan[0]["staleness"] == 3.0 and plan[1]["popularity"] == 1.0 and plan[2]["popularity"] == 0.5
+    assert 0 < plan[3]["volatility"] < 0.5
+
+    run = refresh.start_or_resume(names)
+    refresh.advance(run["id"], 2)
+    # "נפילה" באמצע - הריצה הבאה ממשיכה מאותה תוכנית ומאותו מיקום
+    resumed = refresh.start_or_resume(names)
+    assert resumed["resumed"] and resumed["id"] == run["id"]
+    assert resumed["plan"] == run["plan"] and resumed["position"] == 2
+    # המחירים של מה שכבר רוענן נקראים מהמטמון בלבד, גם אם עבר ה-ttl
+    time.sleep(0.05)
+    assert cache.get_many("shufersal", ["אורז"], max_age=0.01) == {}
+    assert cache.get_many("shufersal", ["אורז"], max_age=3600) == {"אורז": 0.01}
+
+    refresh.finish(run["id"], [(name, SKIPPED_BUDGET) for name in run["plan"][3:]])
+    last = refresh.last_run()
+    assert last["status"] == "completed"
+    assert last["skipped"] == [{"name": "חלב", "reason": SKIPPED_BUDGET}]
+    assert not refresh.start_or_resume(names)["resumed"]
+
+
+def test_product_index_skips_search():
+    """
+    אחרי חיפוש מוצלח נשמר קוד המוצר, והסריקה הבאה טוענת את דף המוצר בלי חיפוש;
+    מוצר שירד מהאתר - חוזרים לחיפוש
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    page = scrapers.STORE_PAGES["shufersal"]
+    original = page["url"], page["product_url"], scrapers.product_index
+    page["url"] = lambda product: f"{base}/shufersal_search?q={urllib.parse.quote(product)}"
+    page["product_url"] = lambda code: f"{base}/shufersal_product_{code}"
+    index = ProductIndex(os.path.join(tempfile.mkdtemp(), "price_cache.db"))
+    scrapers.product_index = index
+    try:
+        FixtureHandler.paths = []
+        search_url = page["url"]("אורז")
+        assert scrapers._http_price("shufersal", "אורז") == (0.0129, search_url)
+        assert index.get("shufersal", "אורז")["code"] == "P_7290000000011"
+
+        # דף המוצר בלבד, בלי דף החיפוש
+        FixtureHandler.paths = []
+        # כתובת המקור - דף המוצר שממנו נקרא המחיר
+        assert scrapers._http_price("shufersal", "אורז") == (0.0135, f"{base}/shufersal_product_P_7290000000011")
+        assert FixtureHandler.paths == ["shufersal_product_P_7290000000011"]
+
+        # המוצר "ירד" (404) - חיפוש מחדש
+        index.put("shufersal", "אורז", "P_GONE", page["product_url"]("P_GONE"))
+        FixtureHandler.paths = []
+        assert scrapers._http_price("shufersal", "אורז") == (0.0129, search_url)
+        assert FixtureHandler.paths == ["shufersal_product_P_GONE", "shufersal_search"]
+        assert index.get("shufersal", "אורז")["code"] == "P_7290000000011"
+
+        # בדף המוצר יש גם מוצרים קשורים - המחיר רק מהאלמנט של הקוד השמור,
+        # גם כשהמוצר מתומחר ליחידה והמוצר הקשור ל-100 גרם
+        index.put("shufersal", "מלפפון", "P_7290000000035", page["product_url"]("P_7290000000035"))
+        assert scrapers._http_price("shufersal", "מלפפון") == (0.0012, f"{base}/shufersal_product_P_7290000000035")
+
+        # הדף נטען אבל הקוד השמור לא בו - הרשומה נמחקת וחוזרים לחיפוש
+        original_product_url = page["product_url"]
+        page["product_url"] = lambda code: f"{base}/shufersal_product_P_7290000000011"
+        index.put("shufersal", "אורז", "P_OLD", page["product_url"]("P_OLD"))
+        FixtureHandler.paths = []
+        assert scrapers._http_price("shufersal", "אורז") == (0.0129, search_url)
+        assert FixtureHandler.paths == ["shufersal_product_P_7290000000011", "shufersal_search"]
+        assert index.get("shufersal", "אורז")["code"] == "P_7290000000011"
+        page["product_url"] = original_product_url
+    finally:
+        page["url"], page["product_url"], scrapers.product_index = original
+        server.shutdown()
+        server.server_close()
+
+
+def test_breaker_skips_dead_store_and_reprobes():
+    """
+    אחרי K כשלונות רצופים שאר המוצרים של החנות מדולגים (None) בלי לחכות ל-timeout;
+    אחרי ה-backoff מוצר אחד נבדק, וכשלון מכפיל את ה-backoff
+    """
+    path = os.path.join(tempfile.mkdtemp(), "price_cache.db")
+    board = BreakerBoard(path, ["victory"], threshold=3, backoff=0.2, max_backoff=10)
+    loaded = []
+
+    def dead_page(store, driver, product):
+        loaded.append(product)
+        scrapers._record_outcome(store, None, 0, timeout=15)
+        return 0, 15.0, 0.0, None
+
+    original = scrapers.breakers, scrapers.driver_pool, scrapers._load_page, scrapers._http_price
+    scrapers.breakers = board
+    scrapers.driver_pool = DriverPool(FakeDriver, max_size=1)
+    scrapers._load_page = dead_page
+    scrapers._http_price = lambda store, product: (None, None)
+    try:
+        products = [str(n) for n in range(8)]
+        prices = scrapers.get_prices_victory(products, shards=1)
+        assert loaded == ["0", "1", "2"]
+        assert prices == [0, 0, 0] + [None] * 5
+        assert scrapers.SHARD_STATS["victory"][0]["skipped"] == 5
+
+        # worker אחר רואה את המצב דרך SQLite
+        state = BreakerBoard(path, ["victory"]).states()["victory"]
+        assert state["state"] == OPEN and state["failures"] == 3 and "timeout" in state["last_error"]
+
+        # אחרי ה-backoff - בדיקה אחת, שנכשלת: פתוח שוב עם backoff כפול
+        time.sleep(0.25)
+        loaded.clear()
+        scrapers.get_prices_victory(products, shards=1)
+        assert loaded == ["0"]
+        assert board.states()["victory"]["backoff"] == 0.4
+
+        # החנות חזרה
+        time.sleep(0.45)
+        assert board.get("victory").allow() and board.get("victory").state == HALF_OPEN
+        board.get("victory").record_success()
+        assert board.states()["victory"]["state"] == CLOSED
+    finally:
+        scrapers.driver_pool.close()
+        scrapers.breakers, scrapers.driver_pool, scrapers._load_page, scrapers._http_price = original
+
+
+def test_worker_process_scrapes_queued_jobs():
+    """ה-web מכניס משימה לתור ומחכה; תהליך הסריקה (כאן - thread) לוקח אותה ומחזיר את המחירים"""
+    queue = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    stop = threading.Event()
+    original = dict(scrapers.STORE_SCRAPERS)
+    scrapers.STORE_SCRAPERS.update({
+        "shufersal": fake_scraper(0, 1),
+        "victory": fake_scraper(0, 2),
+        "rami_levy": lambda products, force=False: 1 / 0,
+    })
+    worker = threading.Thread(target=run_worker, args=(queue, 0.05, stop))
+    worker.start()
+    try:
+        prices = submit_scrape(queue, ["א", "ב"], timeout=10, interval=0.05)
+    finally:
+        stop.set()
+        worker.join()
+        scrapers.STORE_SCRAPERS.update(original)
+
+    assert prices == {"shufersal": [1, 2], "victory": [2, 4], "rami_levy": None}
+    # משימה נלקחת פעם אחת בלבד
+    assert queue.claim(SCRAPE_JOB) is None
+
+    # אין תהליך סריקה - ה-web לא נתקע לנצח
+    try:
+        submit_scrape(queue, ["א"], timeout=0.3, interval=0.05)
+        assert False, "expected TimeoutError"
+    except TimeoutError:
+        pass
+
+    # סריקה ארוכה שולחת heartbeat - requeue_stale לא מחזיר אותה לתור באמצע
+    scrapers.STORE_SCRAPERS.update({store: fake_scraper(0.6, 1) for store in original})
+    try:
+        job = queue.claim(SCRAPE_JOB)
+        runner = threading.Thread(target=run_job, args=(queue, job, 0.05))
+        runner.start()
+        time.sleep(0.4)
+        assert queue.requeue_stale(SCRAPE_JOB, 0.2) == 0
+        runner.join()
+    finally:
+        scrapers.STORE_SCRAPERS.update(original)
+    assert queue.get(job["id"])["status"] == COMPLETED
+
+
+def test_update_executor_merges_batches_and_rejects():
+    """מזון שכבר בתור לא נכנס שוב, מזונות ממתינים נסרקים יחד, ומעל הגבול - QueueFull"""
+    created = []
+    batches = []
+    release = threading.Event()
+
+    def create_task(food_id, name):
+        created.append(food_id)
+        return f"task-{food_id}"
+
+    def run_batch(batch):
+        batches.append([food_id for _, food_id in batch])
+        release.wait(5)
+
+    executor = PriceUpdateExecutor(create_task, run_batch, workers=1, max_pending=3, batch_size=10, batch_wait=0.2)
+    assert executor.submit("1", "חלב") == "task-1"
+    assert executor.submit("2", "לחם") == "task-2"
+    # עריכה של מזון שממתין - אותה משימה
+    assert executor.submit("1", "חלב 3%") == "task-1"
+
+    # הקבוצה הראשונה רצה (ממתינה ל-release) - עכשיו ממלאים את התור
+    deadline = time.monotonic() + 5
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert batches == [["1", "2"]]
+    assert executor.submit("2", "לחם") == "task-2"     # רץ עכשיו באותו שם
+    for food_id in ("3", "4", "5"):
+        executor.submit(food_id, food_id)
+    try:
+        executor.submit("6", "6")
+        assert False, "expected QueueFull"
+    except QueueFull:
+        pass
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(batches) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert batches[1] == ["3", "4", "5"]
+    assert created == ["1", "2", "3", "4", "5"]
+    assert executor.stats()["merged"] == 2 and executor.stats()["rejected"] == 1
+
+
+if __name__ == "__main__":
+    test_all_stores_run_concurrently()
+    test_failed_store_returns_none()
+    test_sharded_store_keeps_order_and_domain_cap()
+    test_driver_pool_reuses_and_recycles()
+    test_driver_pool_closes_idle_outside_lock()
+    test_wait_ends_on_results_or_empty_marker()
+    test_timeout_adapts_to_observed_latency()
+    test_http_fast_path_with_browser_fallback()
+    test_price_cache_skips_fresh_prices()
+    test_refresh_plan_order_and_resume()
+    test_product_index_skips_search()
+    test_breaker_skips_dead_store_and_reprobes()
+    test_worker_process_scrapes_queued_jobs()
+    test_update_executor_merges_batches_and_rejects()
+    print("✅ כל הבדיקות עברו")